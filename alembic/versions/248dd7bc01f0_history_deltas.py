@@ -0,0 +1,43 @@
+"""Delta history for notices and opening hours
+
+Revision ID: 248dd7bc01f0
+Revises: bfcbab74a65d
+Create Date: 2026-10-19 00:05:12.301992
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '248dd7bc01f0'
+down_revision: Union[str, Sequence[str], None] = 'bfcbab74a65d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("notice", "opening_hours")
+
+
+def _columns(table: str) -> set[str]:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_db_and_tables() may already have created the columns on fresh databases
+    for table in TABLES:
+        existing = _columns(table)
+        if "is_keyframe" not in existing:
+            op.add_column(table, sa.Column("is_keyframe", sa.Boolean(), server_default="true", nullable=False))
+        if "patch" not in existing:
+            op.add_column(table, sa.Column("patch", postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_column(table, "patch")
+        op.drop_column(table, "is_keyframe")
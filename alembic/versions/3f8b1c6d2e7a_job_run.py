@@ -0,0 +1,52 @@
+"""Run reports of the cron jobs
+
+Revision ID: 3f8b1c6d2e7a
+Revises: 7c41e0a9d2b3
+Create Date: 2026-10-19 14:05:12.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8b1c6d2e7a'
+down_revision: Union[str, Sequence[str], None] = '7c41e0a9d2b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_db_and_tables() may already have created the table on fresh databases
+    if "job_run" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "job_run",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("job", sa.String(length=20), nullable=False),
+        sa.Column("snapshot", sa.String(length=32), nullable=True),
+        sa.Column("snapshot_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("status", sa.String(length=10), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_seconds", sa.Float(), nullable=False),
+        sa.Column("peak_memory_kib", sa.Float(), nullable=True),
+        sa.Column("bytes_read", sa.BigInteger(), nullable=False),
+        sa.Column("rows_inserted", sa.Integer(), nullable=False),
+        sa.Column("rows_skipped", sa.Integer(), nullable=False),
+        sa.Column("report", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+    op.create_index("ix_job_run_job", "job_run", ["job"])
+    op.create_index("ix_job_run_started_at", "job_run", ["started_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_job_run_started_at", table_name="job_run")
+    op.drop_index("ix_job_run_job", table_name="job_run")
+    op.drop_table("job_run")
@@ -0,0 +1,67 @@
+"""Blue/green generations of updater output
+
+Revision ID: 7c41e0a9d2b3
+Revises: 248dd7bc01f0
+Create Date: 2026-10-19 11:42:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41e0a9d2b3'
+down_revision: Union[str, Sequence[str], None] = '248dd7bc01f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("notice", "opening_hours", "meal", "processed_input")
+INDEXED = ("notice", "opening_hours", "meal")
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_db_and_tables() may already have created tables and columns on fresh databases
+    existing_tables = set(_inspector().get_table_names())
+    if "generation" not in existing_tables:
+        op.create_table(
+            "generation",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("label", sa.String(length=100), nullable=False),
+            sa.Column("status", sa.String(length=12), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("published_at", sa.DateTime(timezone=True), nullable=True),
+        )
+    if "publish_pointer" not in existing_tables:
+        op.create_table(
+            "publish_pointer",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("generation_id", sa.Integer(), sa.ForeignKey("generation.id"), nullable=True),
+        )
+
+    for table in TABLES:
+        if table not in existing_tables:
+            continue
+        if "generation_id" not in {c["name"] for c in _inspector().get_columns(table)}:
+            op.add_column(table, sa.Column("generation_id", sa.Integer(), sa.ForeignKey("generation.id"), nullable=True))
+            if table in INDEXED:
+                op.create_index(f"ix_{table}_generation_id", table, ["generation_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing_tables = set(_inspector().get_table_names())
+    for table in TABLES:
+        if table not in existing_tables:
+            continue
+        if table in INDEXED:
+            op.drop_index(f"ix_{table}_generation_id", table_name=table)
+        op.drop_column(table, "generation_id")
+    op.drop_table("publish_pointer")
+    op.drop_table("generation")
@@ -9,6 +9,12 @@ from app.src.config.database import create_db_and_tables, get_session
 from app.src.routes.organization.organization import router as organization_router
 from app.src.routes.location.location import router as location_router
 from app.src.routes.facility.facility import router as facility_router
+from app.src.routes.export.export import router as export_router
+from app.src.routes.statistics.statistics import router as statistics_router
+from app.src.routes.dish.dish import router as dish_router
+from app.src.routes.metrics.metrics import router as metrics_router
+from app.src.routes.job_run.job_run import router as job_run_router
+from app.src.metrics.instrumentation import MetricsMiddleware
 
 
 
@@ -32,6 +38,12 @@ app = FastAPI(title="Mensabuddies API",
 app.include_router(organization_router)
 app.include_router(location_router)
 app.include_router(facility_router)
+app.include_router(export_router)
+app.include_router(statistics_router)
+app.include_router(dish_router)
+app.include_router(metrics_router)
+app.include_router(job_run_router)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/")
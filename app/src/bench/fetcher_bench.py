@@ -0,0 +1,159 @@
+"""
+Offline benchmark of the fetcher against the local stand-in server (app.src.bench.standin_server).
+
+The server runs in a subprocess and serves a synthetic snapshot (or recorded pages with `--pages` and their
+`--registry`) with the configured latency, errors, throttling and ETags. The benchmark points all facility URLs at
+it, gives every organization the swerk-wue.de adapter (with `--concurrency` pages in flight, if given) and runs
+`fetcher.main()` `--runs` times. Per run it reports pages per second, bytes received and stored, and what the
+server saw: requests, repeated requests of the same page (retries), conditional requests and the status codes -
+the second run shows whether the fetcher revalidates instead of downloading every page again. With
+`--store-parsed`, the fetcher also stores the parse results of the pages (see fetcher.main).
+
+Usage:
+    python -m app.src.bench.fetcher_bench --facilities 50 --concurrency 8 --latency 120
+    python -m app.src.bench.fetcher_bench --error-rate 0.1 --rate 20 --runs 3
+    python -m app.src.bench.fetcher_bench --pages assets/fetched/20251013_060000 --registry assets/facilities.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+
+from app.src.bench import standin_server
+from app.src.bench.synthetic import Scale, generate_registry, write_files
+from app.src.cron.adapters.base import ADAPTERS, get_adapter
+from app.src.cron.db_updater.schema import FacilitiesRoot
+from app.src.cron.fetcher import fetcher
+from app.src.cron.registry import BASE_DIR, FacilityRegistry
+
+OUT_FILE = BASE_DIR / "assets" / "bench" / "fetcher.json"
+TEMPLATE_DOMAIN = "swerk-wue.de"
+
+
+@contextmanager
+def standin(pages: Path, registry: Path, registry_out: Path, behaviour: standin_server.Behaviour,
+            padding_kib: int) -> Iterator[str]:
+    """Run the stand-in server in a subprocess; yields its URL once `registry_out` points at it."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.src.bench.standin_server", "--pages", str(pages), "--facilities", str(registry),
+         "--registry-out", str(registry_out), *standin_server.behaviour_to_argv(behaviour, padding_kib)],
+        cwd=BASE_DIR, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        line = process.stdout.readline()
+        if not line.startswith("Serving"):
+            raise RuntimeError(f"The stand-in server did not start (exit code {process.wait(timeout=30)})")
+        yield line.split()[-1]
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def install_adapters(domains: Iterable[str], concurrency: Optional[int]) -> Dict[str, int]:
+    """Adapters for all `domains` (the swerk-wue.de one for unknown domains); returns their concurrency."""
+    template = get_adapter(TEMPLATE_DOMAIN)
+    for domain in domains:
+        adapter = ADAPTERS.get(domain) or replace(template, domain=domain)
+        ADAPTERS[domain] = replace(adapter, max_concurrency=concurrency) if concurrency else adapter
+    return {domain: ADAPTERS[domain].max_concurrency for domain in domains}
+
+
+def expected_pages(registry: FacilityRegistry) -> int:
+    return sum(bool(e.facility.detail_url) + bool(e.facility.menu_url) for e in registry.entries())
+
+
+def run_once(registry: FacilityRegistry, url: str, fetched_dir: Path, store_parsed: bool = False) -> Dict[str, Any]:
+    httpx.post(f"{url}/_reset").raise_for_status()
+    start = time.perf_counter()
+    outdir = fetcher.main(registry, fetched_dir, report=False, store_parsed=store_parsed)
+    seconds = time.perf_counter() - start
+    server = httpx.get(f"{url}/_stats").raise_for_status().json()
+
+    saved = list(outdir.glob("*/*.html"))
+    expected = expected_pages(registry)
+    return {
+        "seconds": round(seconds, 3),
+        "pages_expected": expected,
+        "pages_saved": len(saved),
+        "pages_failed": expected - len(saved),
+        "pages_per_s": len(saved) / seconds,
+        "requests_per_s": server["requests"] / seconds,
+        "bytes_received": server["bytes_sent"],
+        "mib_per_s": server["bytes_sent"] / seconds / 2 ** 20,
+        "bytes_saved": sum(p.stat().st_size for p in saved),
+        "parses_saved": len(list(outdir.glob("*/*.json"))),
+        "server": server,
+    }
+
+
+def print_runs(runs: List[Dict[str, Any]]) -> None:
+    print(f"{'run':>3} {'saved':>11} {'s':>7} {'pages/s':>8} {'MiB':>7} {'req':>6} {'retries':>7} "
+          f"{'cond.':>6} {'304':>5} {'429':>5} {'5xx':>5} {'dropped':>7}")
+    for n, r in enumerate(runs, 1):
+        server, statuses = r["server"], r["server"]["statuses"]
+        errors = sum(v for k, v in statuses.items() if k.startswith("5"))
+        print(f"{n:>3} {r['pages_saved']:>5}/{r['pages_expected']:<5} {r['seconds']:>7.2f} {r['pages_per_s']:>8.1f} "
+              f"{r['bytes_received'] / 2 ** 20:>7.2f} {server['requests']:>6} {server['retries']:>7} "
+              f"{server['conditional']:>6} {statuses.get('304', 0):>5} {statuses.get('429', 0):>5} {errors:>5} "
+              f"{server['dropped']:>7}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the fetcher against a local stand-in server.")
+    parser.add_argument("--pages", type=Path, help="fetched snapshot to serve instead of a synthetic one")
+    parser.add_argument("--registry", type=Path, help="facilities.json of --pages")
+    parser.add_argument("--organizations", type=int, default=Scale.organizations)
+    parser.add_argument("--facilities", type=int, default=Scale.facilities, help="facilities per organization")
+    parser.add_argument("--menu-size", type=int, default=Scale.menu_size, help="dishes per menu day")
+    parser.add_argument("--concurrency", type=int, help="pages in flight per organization (default: the adapter's)")
+    parser.add_argument("--runs", type=int, default=2, help="fetcher runs against the same pages")
+    parser.add_argument("--store-parsed", action="store_true", help="store the parse results of the pages as well")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=OUT_FILE, help="where to write the JSON results")
+    standin_server.add_behaviour_arguments(parser)
+    args = parser.parse_args(argv)
+    if bool(args.pages) != bool(args.registry):
+        parser.error("--pages and --registry go together")
+    behaviour = standin_server.behaviour_from_args(args)
+
+    with tempfile.TemporaryDirectory(prefix="fetcher_bench_") as tmp:
+        tmp = Path(tmp)
+        pages, registry_file = args.pages, args.registry
+        if not pages:
+            scale = Scale(args.organizations, args.facilities, menu_size=args.menu_size)
+            [pages] = write_files(generate_registry(scale, args.seed), scale, tmp / "site", seed=args.seed)
+            registry_file = tmp / "site" / "facilities.json"
+
+        with standin(pages, registry_file, tmp / "facilities.json", behaviour, args.padding) as url:
+            data = json.loads((tmp / "facilities.json").read_text(encoding="utf-8"))
+            registry = FacilityRegistry(FacilitiesRoot.from_json(data))
+            concurrency = install_adapters(registry.by_organization, args.concurrency)
+            runs = [run_once(registry, url, tmp / f"fetched-{n}", args.store_parsed) for n in range(args.runs)]
+
+    print_runs(runs)
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "behaviour": asdict(behaviour),
+        "padding_kib": args.padding,
+        "concurrency": concurrency,
+        "store_parsed": args.store_parsed,
+        "runs": runs,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
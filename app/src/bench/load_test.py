@@ -0,0 +1,292 @@
+"""
+Load test of the API: concurrent request mixes with latency percentiles, throughput and error rate per route.
+
+By default the benchmark seeds a synthetic dataset (app.src.bench.synthetic) into a scratch schema of the
+configured database, boots the app with uvicorn against it and drives it over HTTP with `--concurrency` clients
+for `--duration` seconds. With `--url`, an already running server is tested instead. Path parameters are picked
+at random from the organizations and facilities the API itself lists, so both modes run the same mix.
+
+A request counts as an error if it fails on the transport level or answers with a 5xx status; the status codes of
+every route are part of the report. The image route is not in the default mix: synthetic facilities have no image,
+so it would only measure 404s (add it with --mix against a server with real images).
+
+The JSON report can be compared against a saved one: the run fails if a route's p95 latency grew by more than
+`--tolerance`, or its error rate or throughput got worse by the same margin.
+
+Usage:
+    python -m app.src.bench.load_test --facilities 100 --concurrency 32 --duration 30 --out run.json
+    python -m app.src.bench.load_test --baseline assets/bench/load_test.json
+    python -m app.src.bench.load_test --url http://127.0.0.1:8000 --mix "/facility/id/{facility_id}/meals=1"
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+from sqlmodel import Session, SQLModel
+
+from app.src.bench.synthetic import Scale, scratch_schema, seed_database
+from app.src.config.database import engine
+from app.src.cron.registry import BASE_DIR
+
+SCHEMA = "load_test"
+OUT_FILE = BASE_DIR / "assets" / "bench" / "load_test.json"
+
+# route template → relative weight
+DEFAULT_MIX: Dict[str, float] = {
+    "/organization/{organization_id}/facilities": 2,
+    "/facility/uuid/{facility_uuid}": 3,
+    "/facility/id/{facility_id}/meals": 4,
+    "/facility/id/{facility_id}/opening_hours": 2,
+    "/facility/id/{facility_id}/notices": 1,
+    "/statistics/facility/{facility_id}": 1,
+}
+
+
+@dataclass
+class Sample:
+    route: str
+    seconds: float
+    status: Optional[int]   # None on transport errors
+
+    @property
+    def error(self) -> bool:
+        return self.status is None or self.status >= 500
+
+
+@dataclass
+class RouteStats:
+    requests: int
+    errors: int
+    error_rate: float
+    throughput_rps: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile (0 < q <= 100) of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples: List[Sample], elapsed: float) -> RouteStats:
+    latencies = sorted(s.seconds * 1000 for s in samples)
+    errors = sum(s.error for s in samples)
+    return RouteStats(
+        requests=len(samples),
+        errors=errors,
+        error_rate=errors / len(samples) if samples else 0.0,
+        throughput_rps=len(samples) / elapsed if elapsed else 0.0,
+        mean_ms=sum(latencies) / len(latencies) if latencies else 0.0,
+        p50_ms=percentile(latencies, 50),
+        p95_ms=percentile(latencies, 95),
+        p99_ms=percentile(latencies, 99),
+        max_ms=latencies[-1] if latencies else 0.0,
+        statuses=dict(sorted(Counter(str(s.status or "error") for s in samples).items())),
+    )
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'/route/{param}=3,/other=1' → {route: weight}"""
+    mix = {}
+    for part in value.split(","):
+        route, _, weight = part.strip().rpartition("=")
+        mix[route] = float(weight)
+    return mix
+
+
+async def discover(client: httpx.AsyncClient) -> Dict[str, List[Any]]:
+    """Path parameter values to pick from, as listed by the API."""
+    organizations = (await client.get("/organization")).raise_for_status().json()
+    values: Dict[str, List[Any]] = {"organization_id": [o["id"] for o in organizations],
+                                    "facility_id": [], "facility_uuid": []}
+    for org in organizations:
+        facilities = (await client.get(f"/organization/{org['id']}/facilities")).raise_for_status().json()
+        values["facility_id"] += [f["id"] for f in facilities]
+        values["facility_uuid"] += [f["uuid"] for f in facilities]
+    if not values["facility_id"]:
+        raise RuntimeError("The API lists no facilities to test with")
+    return values
+
+
+async def drive(client: httpx.AsyncClient, mix: Dict[str, float], values: Dict[str, List[Any]],
+                concurrency: int, duration: float, seed: int = 0) -> tuple[List[Sample], float]:
+    """Run `concurrency` clients, each sending one request after the other, for `duration` seconds."""
+    routes, weights = list(mix), list(mix.values())
+    samples: List[Sample] = []
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(n: int):
+        rng = random.Random(f"{seed}/{n}")
+        while time.perf_counter() < deadline:
+            route = rng.choices(routes, weights)[0]
+            url = route.format(**{k: rng.choice(v) for k, v in values.items()})
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                await response.aread()
+                status = response.status_code
+            except httpx.HTTPError:
+                status = None
+            samples.append(Sample(route, time.perf_counter() - start, status))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(n) for n in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+async def run(url: str, mix: Dict[str, float], concurrency: int, duration: float, warmup: float,
+              seed: int) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        values = await discover(client)
+        if warmup:
+            await drive(client, mix, values, concurrency, warmup, seed=seed + 1)
+        samples, elapsed = await drive(client, mix, values, concurrency, duration, seed=seed)
+
+    by_route: Dict[str, List[Sample]] = defaultdict(list)
+    for s in samples:
+        by_route[s.route].append(s)
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "url": url,
+        "concurrency": concurrency,
+        "duration": round(elapsed, 3),
+        "mix": mix,
+        "total": asdict(summarize(samples, elapsed)),
+        "routes": {route: asdict(summarize(by_route[route], elapsed)) for route in mix if by_route[route]},
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of `report` against `baseline`, as readable lines."""
+    regressions = []
+    for route, stats in report["routes"].items():
+        before = baseline.get("routes", {}).get(route)
+        if before is None:
+            continue
+        if stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {before['p95_ms']:.1f} → {stats['p95_ms']:.1f} ms")
+        if stats["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{route}: throughput {before['throughput_rps']:.1f} → {stats['throughput_rps']:.1f}/s")
+        if stats["error_rate"] > before["error_rate"] + tolerance / 10:
+            regressions.append(f"{route}: error rate {before['error_rate']:.2%} → {stats['error_rate']:.2%}")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'route':<48} {'req':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>7}")
+    for route, s in [*report["routes"].items(), ("total", report["total"])]:
+        print(f"{route:<48} {s['requests']:>7} {s['throughput_rps']:>8.1f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+              f"{s['p99_ms']:>8.1f} {s['error_rate']:>7.2%}")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def serve(schema: str, workers: int) -> Iterator[str]:
+    """Run the app with uvicorn in a subprocess whose database connections use `schema`; yields its URL."""
+    port = _free_port()
+    env = {**os.environ, "PGOPTIONS": f"-c search_path={schema}"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BASE_DIR, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(300):
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {process.returncode}")
+            try:
+                httpx.get(url + "/", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("uvicorn did not come up within 30 seconds")
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the API and report latency percentiles per route.")
+    parser.add_argument("--url", help="test a running server instead of booting one on synthetic data")
+    parser.add_argument("--organizations", type=int, default=Scale.organizations)
+    parser.add_argument("--facilities", type=int, default=Scale.facilities, help="facilities per organization")
+    parser.add_argument("--days", type=int, default=Scale.days, help="days of history per facility")
+    parser.add_argument("--menu-size", type=int, default=Scale.menu_size, help="dishes per menu day")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to measure")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured requests first")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="route=weight,... (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=OUT_FILE, help="where to write the JSON report")
+    parser.add_argument("--baseline", type=Path, help="report to compare against; exits with 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    def measure(url: str) -> Dict[str, Any]:
+        return asyncio.run(run(url, args.mix, args.concurrency, args.duration, args.warmup, args.seed))
+
+    if args.url:
+        report = measure(args.url)
+    else:
+        scale = Scale(args.organizations, args.facilities, args.days, args.menu_size)
+        with scratch_schema(SCHEMA):
+            SQLModel.metadata.create_all(engine)
+            with Session(engine) as db:
+                seed_database(db, scale, seed=args.seed)
+            with serve(SCHEMA, args.workers) as url:
+                report = measure(url)
+        report["scale"] = asdict(scale)
+
+    print_report(report)
+    # read first: the baseline may be the previous report at the same path
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Report written to {args.out}")
+
+    if baseline is not None:
+        for key in ("concurrency", "mix", "scale"):
+            if baseline.get(key) != report.get(key):
+                print(f"⚠️ The baseline ran with a different {key}: {baseline.get(key)}")
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Micro-benchmarks of the menu and detail page parsers, with output-equivalence checks.
+
+Fixtures are the `.gastronomy` pages in assets/fixtures/parsers (menus of one to three weeks, detail pages with
+multi-slot and abbreviated opening ranges, a closed cafeteria) plus oversized synthetic pages rendered by
+app.src.bench.synthetic. For every fixture the benchmark reports time and allocation peak of
+  - the whole parse (`parse_html_menu` / `parse_html_detail`),
+  - building the soup alone,
+  - the helpers the parse spends its time in (`_parse_date_label`, `_expand_days`, `_parse_time_range`), run over
+    all inputs of that kind the page contains; the memoized detail helpers also with an emptied memo (":cold"),
+and checks that the parse still returns the recorded output (`{name}.expected.json`; the known documents for
+synthetic pages). An optimization is only an optimization if the check still passes; when a parser change is
+meant to change the output, re-record the expectations with `--update-expected` and review their diff.
+
+The bs4 parsers are the reference. With `--backend lxml` / `--backend selectolax`, the tree parsers of that
+backend (see app.src.cron.db_updater.html_backends) are timed as well, and their output must equal the reference
+output on every fixture.
+
+Usage:
+    python -m app.src.bench.parser_bench                     # benchmark, exits with 1 on output differences
+    python -m app.src.bench.parser_bench --check             # only check the outputs
+    python -m app.src.bench.parser_bench --baseline before.json --oversized 4
+    python -m app.src.bench.parser_bench --backend lxml --backend selectolax
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import timeit
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from app.src.bench import synthetic
+from app.src.cron.db_updater.detail_parser import (_expand_days, _parse_day_label, _parse_time_range,
+                                                   parse_html_detail_bs4, parse_html_detail_tree)
+from app.src.cron.db_updater.html_backends import BACKENDS, HtmlBackend, get_backend
+from app.src.cron.db_updater.meal_parser import _parse_date_label, parse_html_menu_bs4, parse_html_menu_tree
+from app.src.cron.registry import BASE_DIR
+
+FIXTURES_DIR = BASE_DIR / "assets" / "fixtures" / "parsers"
+OUT_FILE = BASE_DIR / "assets" / "bench" / "parsers.json"
+
+# the reference parsers, whatever HTML_PARSER_BACKEND says
+PARSERS: Dict[str, Callable[[str], Dict[str, Any]]] = {"menu": parse_html_menu_bs4, "detail": parse_html_detail_bs4}
+TREE_PARSERS: Dict[str, Callable[[str, HtmlBackend], Dict[str, Any]]] = {
+    "menu": parse_html_menu_tree, "detail": parse_html_detail_tree,
+}
+
+
+@dataclass
+class Fixture:
+    name: str
+    kind: str       # "menu" or "detail"
+    html: str
+    # recorded output; may cover only part of the parse result (synthetic pages)
+    expected: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class StageResult:
+    calls: int              # parses / helper calls per run
+    best_ms: float
+    median_ms: float
+    alloc_peak_kib: float
+
+
+@dataclass
+class FixtureResult:
+    name: str
+    kind: str
+    size_kib: float
+    equivalent: Optional[bool]
+    mismatch: Optional[str] = None
+    # first difference of every backend's output from the bs4 output (None: identical)
+    backends: Dict[str, Optional[str]] = field(default_factory=dict)
+    stages: Dict[str, StageResult] = field(default_factory=dict)
+
+
+def load_fixtures(directory: Path = FIXTURES_DIR) -> List[Fixture]:
+    fixtures = []
+    for path in sorted(directory.glob("*.html")):
+        kind = path.stem.split("_")[0]
+        expected_path = path.with_suffix(".expected.json")
+        expected = json.loads(expected_path.read_text(encoding="utf-8")) if expected_path.exists() else None
+        fixtures.append(Fixture(path.stem, kind, path.read_text(encoding="utf-8"), expected))
+    return fixtures
+
+
+def oversized_fixtures(factor: int, seed: int = 0) -> List[Fixture]:
+    """
+    A menu of 4×`factor` weeks with 25×`factor` dishes a day, and a detail page with the notices of 50×`factor` days.
+    """
+    scale = synthetic.Scale(menu_size=25 * factor)
+    dishes = synthetic.dish_pool(scale, seed)
+    monday = date(2025, 10, 13)
+    weeks = []
+    for w in range(4 * factor):
+        days = []
+        for d in range(7):
+            day = monday + timedelta(days=7 * w + d)
+            days.append({
+                "day_id": day.isoformat(),
+                "date_label": synthetic.german_date_label(day),
+                "date_iso": day.isoformat(),
+                "entries": synthetic.menu_day(seed, "oversized", day, dishes, scale.menu_size),
+                "is_closed": False,
+            })
+        weeks.append({"week": str(w), "days": days})
+
+    notices = [n for i in range(50 * factor) for n in synthetic.notices_doc(seed, "oversized", monday + timedelta(i))]
+    hours = synthetic.opening_hours_doc(seed, "oversized", monday)
+    return [
+        Fixture(f"menu_oversized_x{factor}", "menu", synthetic.render_menu_html(weeks), {"weeks": weeks}),
+        Fixture(f"detail_oversized_x{factor}", "detail", synthetic.render_detail_html(notices, hours),
+                {"notices_html": notices, "opening_times": {"by_day": hours}}),
+    ]
+
+
+def first_difference(expected: Any, actual: Any, path: str = "") -> Optional[str]:
+    """Path of the first difference between `expected` and `actual` (keys missing in `expected` are ignored)."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key, value in expected.items():
+            if key not in actual:
+                return f"{path}.{key}: missing"
+            diff = first_difference(value, actual[key], f"{path}.{key}")
+            if diff:
+                return diff
+        return None
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return f"{path}: {len(expected)} items expected, got {len(actual)}"
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            diff = first_difference(e, a, f"{path}[{i}]")
+            if diff:
+                return diff
+        return None
+    if expected != actual:
+        return f"{path}: expected {expected!r}, got {actual!r}"
+    return None
+
+
+def stages(fixture: Fixture, parsed: Dict[str, Any], backends: List[HtmlBackend]) -> Dict[str, Callable[[], Any]]:
+    """Callables for every stage of `fixture`, their helper inputs taken from its parse result."""
+    parse = PARSERS[fixture.kind]
+    out: Dict[str, Callable[[], Any]] = {
+        "parse": lambda: parse(fixture.html),
+        "soup": lambda: BeautifulSoup(fixture.html, "html.parser"),
+    }
+    tree_parse = TREE_PARSERS[fixture.kind]
+    for backend in backends:
+        out[f"parse:{backend.name}"] = lambda b=backend: tree_parse(fixture.html, b)
+        out[f"tree:{backend.name}"] = lambda b=backend: b.parse(fixture.html)
+    if fixture.kind == "menu":
+        labels = [d["date_label"] for w in parsed["weeks"] for d in w["days"]]
+        if labels:
+            out["_parse_date_label"] = lambda: [_parse_date_label(label) for label in labels]
+    else:
+        ranges = parsed["opening_times"]["ranges"]
+        labels = [r["days"] for r in ranges]
+        times = [t["time"] for r in ranges for t in r["times"]]
+        if labels:
+            out["_expand_days"] = lambda: [_expand_days(label) for label in labels]
+            out["_expand_days:cold"] = lambda: (_parse_day_label.cache_clear(), [_expand_days(x) for x in labels])
+        if times:
+            out["_parse_time_range"] = lambda: [_parse_time_range(t) for t in times]
+            out["_parse_time_range:cold"] = lambda: (_parse_time_range.cache_clear(),
+                                                     [_parse_time_range(t) for t in times])
+    return out
+
+
+def calls_per_run(name: str, fixture: Fixture, parsed: Dict[str, Any]) -> int:
+    name = name.split(":")[0]
+    if name == "_parse_date_label":
+        return sum(len(w["days"]) for w in parsed["weeks"])
+    if name == "_expand_days":
+        return len(parsed["opening_times"]["ranges"])
+    if name == "_parse_time_range":
+        return sum(len(r["times"]) for r in parsed["opening_times"]["ranges"])
+    return 1
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> tuple[float, float, float]:
+    """(best, median) milliseconds per run and the allocation peak of one run in KiB."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = [t / number * 1000 for t in timer.repeat(repeat, number)]
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return min(runs), statistics.median(runs), peak / 1024
+
+
+def run_fixture(fixture: Fixture, repeat: int, backends: List[HtmlBackend],
+                check_only: bool = False) -> FixtureResult:
+    parsed = PARSERS[fixture.kind](fixture.html)
+    result = FixtureResult(fixture.name, fixture.kind, len(fixture.html.encode("utf-8")) / 1024, None)
+    if fixture.expected is not None:
+        # JSON round trip, so tuples and the like compare like the recorded file
+        result.mismatch = first_difference(fixture.expected, json.loads(json.dumps(parsed)))
+        result.equivalent = result.mismatch is None
+    for backend in backends:
+        output = TREE_PARSERS[fixture.kind](fixture.html, backend)
+        result.backends[backend.name] = first_difference(parsed, output)
+        if result.backends[backend.name] is not None:
+            result.equivalent = False
+    if check_only:
+        return result
+
+    for name, fn in stages(fixture, parsed, backends).items():
+        best, median, peak = measure(fn, repeat)
+        result.stages[name] = StageResult(calls_per_run(name, fixture, parsed), best, median, peak)
+    return result
+
+
+def print_results(results: List[FixtureResult], baseline: Optional[Dict[str, Any]] = None) -> None:
+    before = {r["name"]: r["stages"] for r in (baseline or {}).get("fixtures", [])}
+    print(f"{'fixture':<26} {'stage':<22} {'calls':>6} {'best ms':>9} {'median ms':>10} {'peak KiB':>9}"
+          + ("  vs baseline" if baseline else ""))
+    for r in results:
+        status = {True: "ok", False: "DIFFERENT", None: "unchecked"}[r.equivalent]
+        print(f"{r.name:<26} {r.size_kib:>7.1f} KiB, output {status}")
+        if r.mismatch:
+            print(f"    {r.mismatch}")
+        for backend, mismatch in r.backends.items():
+            print(f"    {backend}: {'DIFFERENT from bs4, ' + mismatch if mismatch else 'same output as bs4'}")
+        for name, s in r.stages.items():
+            line = f"{'':<26} {name:<22} {s.calls:>6} {s.best_ms:>9.3f} {s.median_ms:>10.3f} {s.alloc_peak_kib:>9.1f}"
+            old = before.get(r.name, {}).get(name)
+            if old:
+                line += f"  {old['best_ms'] / s.best_ms:>5.2f}× faster" if s.best_ms else ""
+            print(line)
+
+
+def update_expected(fixtures: List[Fixture], directory: Path = FIXTURES_DIR) -> None:
+    for fixture in fixtures:
+        path = directory / f"{fixture.name}.expected.json"
+        parsed = PARSERS[fixture.kind](fixture.html)
+        path.write_text(json.dumps(parsed, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Recorded {path}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the page parsers and check their output.")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR)
+    parser.add_argument("--oversized", type=int, default=1, help="size factor of synthetic pages (0: none)")
+    parser.add_argument("--only", help="only fixtures whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per stage")
+    parser.add_argument("--check", action="store_true", help="only check the outputs")
+    parser.add_argument("--update-expected", action="store_true", help="re-record the outputs of the fixtures")
+    parser.add_argument("--out", type=Path, default=OUT_FILE, help="where to write the JSON results")
+    parser.add_argument("--baseline", type=Path, help="earlier results to compare the timings with")
+    parser.add_argument("--backend", action="append", default=[], choices=[b for b in BACKENDS if b != "bs4"],
+                        help="also run (and compare with bs4) the parsers on this tree backend; repeatable")
+    args = parser.parse_args(argv)
+    backends = [get_backend(name) for name in args.backend]
+
+    recorded = load_fixtures(args.fixtures)
+    if args.update_expected:
+        update_expected(recorded, args.fixtures)
+        return 0
+
+    fixtures = recorded + (oversized_fixtures(args.oversized) if args.oversized else [])
+    if args.only:
+        fixtures = [f for f in fixtures if args.only in f.name]
+    results = [run_fixture(f, args.repeat, backends, check_only=args.check) for f in fixtures]
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    print_results(results, baseline)
+    if not args.check:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps({"fixtures": [asdict(r) for r in results]}, indent=2), encoding="utf-8")
+        print(f"Results written to {args.out}")
+
+    different = [r.name for r in results if r.equivalent is False]
+    if different:
+        print(f"Output differs for {', '.join(different)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Query-count regression harness: every GET route of the API may only execute a bounded number of SQL statements.
+
+The harness seeds a synthetic dataset (app.src.bench.synthetic) into a scratch schema of the configured database,
+calls every route through the ASGI app and compares the number of statements each request executed with its
+budget in BUDGETS. Budgets do not depend on the size of the dataset (streamed routes get theirs per batch), so an
+N+1 pattern - e.g. a mapper reading `f.location` without it being eager-loaded - shows up as soon as a route
+touches more than a handful of rows.
+Over-budget requests are reported with the statements they ran; routes without a budget fail as well.
+
+The scratch schema is created next to the real tables and dropped again afterwards; nothing else is touched.
+
+Usage:
+    python -m app.src.bench.query_budget                        # exits with 1 if a budget is exceeded
+    python -m app.src.bench.query_budget --facilities 50 --days 30 -v
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from math import ceil
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel
+
+from app.main import app
+from app.src.bench.synthetic import Scale, SeedIds, scratch_schema, seed_database
+from app.src.config.database import engine
+from app.src.routes.export.export import BATCH_SIZE as EXPORT_BATCH_SIZE
+
+SCHEMA = "query_budget"
+
+
+@dataclass(frozen=True)
+class Case:
+    route: str
+    # a number, or a function of the dataset's scale for routes that legitimately work in batches
+    budget: Union[int, Callable[[Scale], int]]
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: int = 200
+
+    def budget_for(self, scale: Scale) -> int:
+        return self.budget(scale) if callable(self.budget) else self.budget
+
+
+def _export_budget(facilities: Callable[[Scale], int]) -> Callable[[Scale], int]:
+    # the facility query, then per batch: location, type, opening hours, meals, notices, dishes
+    return lambda scale: 1 + 6 * max(1, ceil(facilities(scale) / EXPORT_BATCH_SIZE))
+
+
+_all_facilities = _export_budget(lambda s: s.organizations * s.facilities)
+
+
+# route template → maximum number of statements per request; path parameters are filled in from SeedIds.
+# Budgets are the current counts: raise one only together with the change that needs the extra statement.
+BUDGETS: List[Case] = [
+    Case("/", 0),
+    Case("/organization", 1),
+    Case("/organization/{organization_id}/locations", 1),
+    Case("/organization/{organization_id}/facilities", 4),
+    Case("/organization/{organization_id}/facilities", 4, {"location_id": "{location_id}"}),
+    Case("/organization/{organization_id}/facilities", 4, {"type_id": "{facility_type_id}"}),
+    Case("/locations/", 1),
+    Case("/facility/uuid/{facility_uuid}", 4),
+    Case("/facility/id/{facility_id}", 4),
+    Case("/facility/id/{facility_id}/opening_hours", 1),
+    Case("/facility/id/{facility_id}/opening_hours/history", 1),
+    Case("/facility/id/{facility_id}/opening_hours/history/{opening_hours_id}", 1),
+    Case("/facility/id/{facility_id}/notices", 1),
+    Case("/facility/id/{facility_id}/notices/history", 1),
+    Case("/facility/id/{facility_id}/notices/history/{notice_id}", 1),
+    Case("/facility/id/{facility_id}/meals", 2),
+    Case("/facility/uuid/{facility_uuid}/image", 3, status=404),
+    Case("/export/facilities.ndjson", _all_facilities),
+    Case("/export/facilities.ndjson", _export_budget(lambda s: s.facilities),
+         {"organization_id": "{organization_id}", "gzip": "true"}),
+    Case("/export/facilities.ndjson", _all_facilities, {"since": "2000-01-01T00:00:00Z"}),
+    Case("/statistics/facility/{facility_id}", 4),
+    Case("/statistics/facility/{facility_id}", 4, {"period": "day"}),
+    Case("/statistics/organization/{organization_id}", 1),
+    Case("/dish/{dish_id}", 1),
+    Case("/runs/", 1),
+    Case("/runs/", 1, {"job": "db_updater"}),
+    # latest run and latest successful run per job
+    Case("/runs/latest", 2),
+]
+
+
+@dataclass
+class Result:
+    route: str
+    url: str
+    status: int
+    statements: List[str]
+    budget: int
+    expected_status: int
+
+    @property
+    def ok(self) -> bool:
+        return self.status == self.expected_status and len(self.statements) <= self.budget
+
+
+class StatementLog:
+    """Collects the SQL of every statement the engine executes while recording."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self.recording = False
+        self._lock = threading.Lock()
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording:
+            with self._lock:
+                self.statements.append(statement)
+
+    @contextmanager
+    def record(self):
+        self.statements = []
+        self.recording = True
+        try:
+            yield self.statements
+        finally:
+            self.recording = False
+
+
+def get_routes(app) -> set[str]:
+    return {r.path_format for r in app.routes
+            if isinstance(r, APIRoute) and r.include_in_schema and "GET" in r.methods}
+
+
+def _fill(value: str, ids: Dict[str, Any]) -> str:
+    return value.format(**ids)
+
+
+async def run_cases(app, cases: List[Case], scale: Scale, ids: SeedIds, log: StatementLog) -> List[Result]:
+    values = asdict(ids)
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://query-budget") as client:
+        for case in cases:
+            url = _fill(case.route, values)
+            params = {k: _fill(v, values) for k, v in case.params.items()}
+            with log.record() as statements:
+                response = await client.get(url, params=params)
+            results.append(Result(case.route, response.request.url.raw_path.decode(),
+                                  response.status_code, list(statements), case.budget_for(scale), case.status))
+    return results
+
+
+def report(results: List[Result], missing: set[str], verbose: bool = False) -> bool:
+    for r in results:
+        if r.ok and not verbose:
+            continue
+        mark = "ok  " if r.ok else "FAIL"
+        print(f"{mark} {len(r.statements):>3}/{r.budget:<3} {r.status}  {r.url}")
+        if r.status != r.expected_status:
+            print(f"       expected status {r.expected_status}")
+        if len(r.statements) > r.budget or verbose:
+            for i, statement in enumerate(r.statements, 1):
+                print(f"       [{i}] {' '.join(statement.split())[:300]}")
+    for route in sorted(missing):
+        print(f"FAIL no budget for route {route}")
+
+    failed = sum(not r.ok for r in results) + len(missing)
+    print(f"{len(results)} requests, {failed} failures")
+    return failed == 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the number of SQL statements per API request.")
+    parser.add_argument("--organizations", type=int, default=Scale.organizations)
+    parser.add_argument("--facilities", type=int, default=Scale.facilities, help="facilities per organization")
+    parser.add_argument("--days", type=int, default=Scale.days, help="daily versions per facility")
+    parser.add_argument("--menu-size", type=int, default=Scale.menu_size, help="dishes per menu day")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-v", "--verbose", action="store_true", help="list the statements of every request")
+    args = parser.parse_args(argv)
+    scale = Scale(args.organizations, args.facilities, args.days, args.menu_size)
+
+    log = StatementLog()
+    with scratch_schema(SCHEMA):
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as db:
+            ids = seed_database(db, scale, seed=args.seed)
+        event.listen(engine, "before_cursor_execute", log)
+        try:
+            results = asyncio.run(run_cases(app, BUDGETS, scale, ids, log))
+        finally:
+            event.remove(engine, "before_cursor_execute", log)
+
+    missing = get_routes(app) - {case.route for case in BUDGETS}
+    return 0 if report(results, missing, verbose=args.verbose) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Benchmark and smoke check of the db_updater's work queue (app.src.cron.db_updater.work_queue).
+
+The benchmark enqueues one run of `--items` facilities into a scratch schema of the configured database and lets
+`--workers` threads claim and complete them, as `db_updater --queue` workers do (without the facility writes).
+It reports claimed items per second and fails if an item was not completed exactly once.
+
+With --check it instead runs the lease scenarios on a few items and exits with 1 if one of them misbehaves:
+  - an expired lease is handed to the next worker, and the old worker can no longer complete the item,
+  - an item whose lease expires on its last attempt ends up failed (with an error), not claimed forever,
+  - a run whose items are all done or failed is finished.
+
+The scratch schema is created next to the real tables and dropped again afterwards; nothing else is touched.
+
+Usage:
+    python -m app.src.bench.queue_bench --items 2000 --workers 8
+    python -m app.src.bench.queue_bench --check
+"""
+
+import argparse
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from sqlmodel import Session, SQLModel, select
+
+from app.src.bench.synthetic import Scale, scratch_schema, seed_database
+from app.src.config.database import engine, Facility, WorkItem
+from app.src.cron.db_updater.work_queue import MAX_ATTEMPTS, claim, complete, enqueue, queue_status, run_finished
+
+SCHEMA = "queue_bench"
+RUN = "bench"
+
+
+def _facility_ids(db: Session, count: int) -> List[int]:
+    seed_database(db, Scale(organizations=1, facilities=count, days=1, menu_size=1))
+    return list(db.exec(select(Facility.id).order_by(Facility.id)).all())
+
+
+def run_workers(facility_ids: List[int], workers: int) -> float:
+    """Drain one run with `workers` threads; returns the elapsed seconds."""
+    with Session(engine) as db:
+        enqueue(db, RUN, facility_ids)
+
+    def work(n: int):
+        with Session(engine) as db:
+            while (item := claim(db, RUN, f"bench-{n}")) is not None:
+                if complete(db, item[0], f"bench-{n}"):
+                    db.commit()
+                else:
+                    db.rollback()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started
+
+
+def check_leases(facility_ids: List[int]) -> List[str]:
+    """Run the lease scenarios; returns a description of every failed expectation."""
+    failures = []
+
+    def expect(ok: bool, what: str):
+        print(f"{'ok  ' if ok else 'FAIL'} {what}")
+        if not ok:
+            failures.append(what)
+
+    with Session(engine) as db:
+        # a crashed worker: its lease runs out right away and the item goes to the next one
+        enqueue(db, "reclaim", facility_ids[:1])
+        first = claim(db, "reclaim", "crashed", lease_seconds=0)
+        second = claim(db, "reclaim", "healthy")
+        expect(first is not None and second == first, "an expired lease is claimed by the next worker")
+        expect(not complete(db, first[0], "crashed"), "the worker that lost its lease cannot complete the item")
+        db.rollback()
+        expect(complete(db, second[0], "healthy"), "the new lease holder completes the item")
+        db.commit()
+
+        # every attempt crashes: after the last one the item must be given up
+        enqueue(db, "exhausted", facility_ids[:2])
+        for attempt in range(MAX_ATTEMPTS):
+            claim(db, "exhausted", f"crashed-{attempt}", lease_seconds=0)
+        done = claim(db, "exhausted", "healthy")
+        expect(done is not None and complete(db, done[0], "healthy"), "the other item of the run can still be claimed")
+        db.commit()
+        expect(claim(db, "exhausted", "healthy") is None, "nothing is left to claim")
+        item = db.exec(select(WorkItem).where(WorkItem.run == "exhausted", WorkItem.id != done[0])).one()
+        expect(item.status == "failed" and item.attempts == MAX_ATTEMPTS,
+               f"a lease expiring on the last attempt marks the item failed (status {item.status!r})")
+        expect(bool(item.error), "the failed item records why it was given up")
+        expect(run_finished(db, "exhausted"), "a run of done and failed items is finished")
+    return failures
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark and smoke check the db_updater's work queue.")
+    parser.add_argument("--items", type=int, default=500, help="facilities in the benchmark run")
+    parser.add_argument("--workers", type=int, default=4, help="worker threads")
+    parser.add_argument("--check", action="store_true", help="run the lease scenarios instead of the benchmark")
+    args = parser.parse_args(argv)
+
+    with scratch_schema(SCHEMA):
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as db:
+            facility_ids = _facility_ids(db, 2 if args.check else args.items)
+
+        if args.check:
+            failures = check_leases(facility_ids)
+            print(f"{len(failures)} failed checks" if failures else "✅ All lease checks passed")
+            return 1 if failures else 0
+
+        seconds = run_workers(facility_ids, args.workers)
+        with Session(engine) as db:
+            status = queue_status(db, RUN)
+            attempts = db.exec(select(WorkItem.attempts).where(WorkItem.run == RUN)).all()
+
+    items = len(facility_ids)
+    print(f"{items} items, {args.workers} workers: {seconds:.2f} s, {items / seconds:.0f} items/s")
+    print(f"status: {status}")
+    if status != {"done": items} or any(a != 1 for a in attempts):
+        print("❌ Not every item was completed exactly once")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
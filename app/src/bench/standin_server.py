@@ -0,0 +1,288 @@
+"""
+Local stand-in for the web sites of the Studierendenwerke, so the fetcher can be benchmarked and tuned offline.
+
+The server serves the pages of a fetched snapshot (`{snapshot}/{uuid}/detail.html|menu.html`, recorded or
+synthetic) as `/{uuid}/detail` and `/{uuid}/menu`, each wrapped into a full page (head, navigation, scripts, footer)
+like the real site, so the adapters trim them as usual. How it answers is configurable:
+  - latency and jitter per response,
+  - a rate of 5xx answers and of connections closed without an answer,
+  - throttling with a token bucket: requests beyond `--rate` per second (after a burst) get a 429 with Retry-After,
+  - ETags: stable (If-None-Match is answered with 304), none, or unstable (a new one on every response).
+
+Requests, status codes, bytes sent, conditional requests and repeated requests of the same page (retries) are
+counted; GET /_stats returns them as JSON and POST /_reset sets them back to zero.
+
+Usage:
+    python -m app.src.bench.standin_server --pages assets/fetched/20251013_060000 \\
+        --facilities assets/facilities.json --registry-out /tmp/facilities.json --latency 80 --error-rate 0.05
+The facilities.json written to `--registry-out` points all detail and menu URLs at the server.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import uuid as uuid_lib
+from collections import Counter
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ETAG_MODES = ("strong", "none", "unstable")
+
+PAGE_HEAD = ('<!DOCTYPE html>\n<html lang="de"><head><meta charset="utf-8"><title>Stand-in</title>'
+             '<script>window.dataLayer = window.dataLayer || [];</script></head><body>\n')
+PAGE_FOOT = '\n<footer class="footer"><p>Stand-in for the pages of the Studierendenwerk</p></footer></body></html>'
+
+
+@dataclass
+class Behaviour:
+    latency_ms: float = 50.0
+    jitter_ms: float = 25.0
+    error_rate: float = 0.0     # share of 5xx answers
+    drop_rate: float = 0.0      # share of connections closed without an answer
+    etag: str = "strong"        # one of ETAG_MODES
+    rate: float = 0.0           # requests per second before throttling (0: unlimited)
+    burst: int = 10
+    seed: int = 0
+
+
+@dataclass
+class Page:
+    body: bytes
+    etag: str
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.bytes_sent = 0
+        self.conditional = 0
+        self.dropped = 0
+        self.statuses: Counter = Counter()
+        self.per_page: Counter = Counter()
+
+    def as_json(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "pages": len(self.per_page),
+                # every request of a page after its first one
+                "retries": self.requests - len(self.per_page),
+                "max_requests_per_page": max(self.per_page.values(), default=0),
+                "bytes_sent": self.bytes_sent,
+                "conditional": self.conditional,
+                "dropped": self.dropped,
+                "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            }
+
+
+def wrap_page(html: str, padding_kib: int) -> str:
+    """`html` inside a full page, with `padding_kib` KiB of navigation around it like on the real site."""
+    nav_item = '<li class="nav-item"><a href="/essen-trinken/mensen-cafeterien">Mensen &amp; Cafeterien</a></li>'
+    nav = "".join(nav_item for _ in range(padding_kib * 1024 // len(nav_item)))
+    return (f'{PAGE_HEAD}<header><nav><ul>{nav}</ul></nav></header>\n'
+            f'<main>{html}\n<script>init()</script></main>{PAGE_FOOT}')
+
+
+def load_pages(snapshot_dir: Path, padding_kib: int = 32) -> Dict[str, Page]:
+    """Pages of a fetched snapshot by URL path."""
+    pages = {}
+    for path in sorted(snapshot_dir.glob("*/*.html")):
+        body = wrap_page(path.read_text(encoding="utf-8"), padding_kib).encode("utf-8")
+        pages[f"/{path.parent.name}/{path.stem}"] = Page(body, f'"{hashlib.sha1(body).hexdigest()[:16]}"')
+    return pages
+
+
+def rewrite_registry(registry: List[Dict[str, Any]], base_url: str) -> List[Dict[str, Any]]:
+    """Copy of the content of a facilities.json with all detail and menu URLs pointing at the server."""
+    registry = json.loads(json.dumps(registry))
+    for org in registry:
+        for loc in org["facilities"]:
+            for item in loc.get("canteens", []) + loc.get("cafeterias", []):
+                item["detail_url"] = f"{base_url}/{item['id']}/detail"
+                if item.get("menu_url"):
+                    item["menu_url"] = f"{base_url}/{item['id']}/menu"
+    return registry
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pages: Dict[str, Page], behaviour: Behaviour):
+        super().__init__(address, StandinHandler)
+        self.pages = pages
+        self.behaviour = behaviour
+        self.stats = Stats()
+        self.bucket = TokenBucket(behaviour.rate, behaviour.burst)
+        self.rng = random.Random(behaviour.seed)
+        self.rng_lock = threading.Lock()
+
+    def random(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server: StandinServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None,
+              count: bool = True) -> None:
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        if not count:
+            return
+        with self.server.stats.lock:
+            self.server.stats.statuses[status] += 1
+            self.server.stats.bytes_sent += len(body)
+
+    def do_POST(self):
+        if self.path == "/_reset":
+            with self.server.stats.lock:
+                self.server.stats.reset()
+            self._send(204, count=False)
+        else:
+            self._send(404, count=False)
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            self._send(200, json.dumps(self.server.stats.as_json()).encode("utf-8"),
+                       {"Content-Type": "application/json"}, count=False)
+            return
+
+        server, behaviour = self.server, self.server.behaviour
+        with server.stats.lock:
+            server.stats.requests += 1
+            server.stats.per_page[self.path] += 1
+            if "If-None-Match" in self.headers:
+                server.stats.conditional += 1
+
+        if not server.bucket.take():
+            self._send(429, b"Too Many Requests", {"Retry-After": "1"})
+            return
+        delay = behaviour.latency_ms + (2 * server.random() - 1) * behaviour.jitter_ms
+        time.sleep(max(0.0, delay) / 1000)
+
+        if server.random() < behaviour.drop_rate:
+            with server.stats.lock:
+                server.stats.dropped += 1
+            self.close_connection = True
+            return
+        if server.random() < behaviour.error_rate:
+            self._send((500, 502, 503)[int(server.random() * 3)], b"Server Error")
+            return
+        page = server.pages.get(self.path)
+        if page is None:
+            self._send(404, b"Not Found")
+            return
+
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if behaviour.etag == "strong":
+            headers["ETag"] = page.etag
+            if self.headers.get("If-None-Match") == page.etag:
+                self._send(304, headers={"ETag": page.etag})
+                return
+        elif behaviour.etag == "unstable":
+            headers["ETag"] = f'"{uuid_lib.uuid4().hex[:16]}"'
+        self._send(200, page.body, headers)
+
+    do_HEAD = do_GET
+
+
+def add_behaviour_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=Behaviour.latency_ms, help="ms per response")
+    parser.add_argument("--jitter", type=float, default=Behaviour.jitter_ms, help="± ms per response")
+    parser.add_argument("--error-rate", type=float, default=Behaviour.error_rate, help="share of 5xx answers")
+    parser.add_argument("--drop-rate", type=float, default=Behaviour.drop_rate,
+                        help="share of connections closed without an answer")
+    parser.add_argument("--etag", choices=ETAG_MODES, default=Behaviour.etag)
+    parser.add_argument("--rate", type=float, default=Behaviour.rate,
+                        help="requests per second before answering 429 (0: unlimited)")
+    parser.add_argument("--burst", type=int, default=Behaviour.burst, help="requests allowed above --rate at once")
+    parser.add_argument("--padding", type=int, default=32, help="KiB of markup around every page")
+
+
+def behaviour_from_args(args: argparse.Namespace) -> Behaviour:
+    return Behaviour(args.latency, args.jitter, args.error_rate, args.drop_rate, args.etag, args.rate, args.burst,
+                     args.seed)
+
+
+def behaviour_to_argv(behaviour: Behaviour, padding_kib: int) -> List[str]:
+    return ["--latency", str(behaviour.latency_ms), "--jitter", str(behaviour.jitter_ms),
+            "--error-rate", str(behaviour.error_rate), "--drop-rate", str(behaviour.drop_rate),
+            "--etag", behaviour.etag, "--rate", str(behaviour.rate), "--burst", str(behaviour.burst),
+            "--seed", str(behaviour.seed), "--padding", str(padding_kib)]
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve fetched pages like the site of a Studierendenwerk.")
+    parser.add_argument("--pages", type=Path, required=True, help="fetched snapshot directory to serve")
+    parser.add_argument("--facilities", type=Path, help="facilities.json of the pages")
+    parser.add_argument("--registry-out", type=Path, help="where to write the facilities.json pointing at the server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0: any free port")
+    parser.add_argument("--seed", type=int, default=0)
+    add_behaviour_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = StandinServer((args.host, args.port), load_pages(args.pages, args.padding), behaviour_from_args(args))
+    if args.facilities and args.registry_out:
+        registry = json.loads(args.facilities.read_text(encoding="utf-8"))
+        args.registry_out.write_text(json.dumps(rewrite_registry(registry, server.url), ensure_ascii=False, indent=2),
+                                     encoding="utf-8")
+    # the first line tells a parent process where to connect
+    print(f"Serving {len(server.pages)} pages on {server.url}", flush=True)
+    print(f"Behaviour: {asdict(server.behaviour)}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+"""
+Synthetic, deterministic datasets for benchmarks, regression harnesses and migrations at realistic volumes.
+
+A dataset has `organizations` × `facilities` facilities (every third one a cafeteria, the others canteens) with
+`days` days of history: opening hours that change about once a month, notices that change daily and - for
+canteens - two-week menus of `menu_size` dishes per day, picked from a pool of recurring dishes. The same `seed`
+always produces the same data, so statement counts and timings of different runs are comparable.
+
+It can be written as
+  - a facilities.json in the shape of assets/facilities.json,
+  - fetched snapshots of the last days (`fetched/{YYYYMMDD_HHMMSS}/{uuid}/detail.html|menu.html`) in the
+    `.gastronomy` markup the swerk-wue.de parsers read, so parsing them yields exactly the stored documents,
+  - history rows bulk-loaded into the configured database as one published generation.
+
+Usage:
+    python -m app.src.bench.synthetic --organizations 10 --facilities 100 --days 365 --menu-size 6
+    python -m app.src.bench.synthetic --facilities 20 --snapshots 3 --load-db
+"""
+
+import argparse
+import json
+import random
+import uuid as uuid_lib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from html import escape
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.src.config.database import (
+    engine, create_db_and_tables, Dish, Facility, FacilityType, Location, Meal, Notice, OpeningHour,
+)
+from app.src.cron.init_db import upsert_by_name, upsert_facilities, upsert_organizations
+from app.src.cron.publish.publish import publish
+from app.src.cron.registry import BASE_DIR, CAFETERIA, CANTEEN
+from app.src.storage.dishes import dish_hash
+from app.src.storage.generations import open_generation
+
+OUT_DIR = BASE_DIR / "assets" / "synthetic"
+BATCH_SIZE = 1000
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+GERMAN_WEEKDAYS = ("Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag")
+GERMAN_MONTHS = ("Januar", "Februar", "März", "April", "Mai", "Juni", "Juli", "August", "September", "Oktober",
+                 "November", "Dezember")
+ALLERGENS = ("Gluten", "Ei", "Milch", "Soja", "Sellerie", "Senf", "Nüsse")
+TAGS = ("Vegan", "Vegetarisch", "Rind", "Schwein", "Geflügel", "Fisch")
+NOTICES = ("Heute geänderte Öffnungszeiten", "Kartenzahlung derzeit gestört", "Aktionswoche: Regionale Küche",
+           "Die Cafeteria bleibt am Freitag geschlossen")
+
+
+@dataclass(frozen=True)
+class Scale:
+    organizations: int = 2
+    # per organization
+    facilities: int = 10
+    # days of history per facility
+    days: int = 14
+    # dishes per menu day
+    menu_size: int = 4
+
+
+@dataclass
+class SeedIds:
+    """Ids of one seeded canteen and its rows, to fill in path parameters."""
+    organization_id: int
+    location_id: int
+    facility_type_id: int
+    facility_id: int
+    facility_uuid: str
+    notice_id: int
+    opening_hours_id: int
+    dish_id: int
+    generation_id: int
+
+
+def _rng(seed: int, *key) -> random.Random:
+    # string seeds are hashed deterministically, unlike tuples
+    return random.Random("/".join(map(str, (seed, *key))))
+
+
+# --- documents ------------------------------------------------------------------------------------------------
+
+def generate_registry(scale: Scale, seed: int = 0) -> List[Dict[str, Any]]:
+    """Content of a facilities.json with the dataset's organizations, locations and facilities."""
+    rng = _rng(seed, "registry")
+    organizations = []
+    for o in range(scale.organizations):
+        domain = f"studierendenwerk-{o}.example"
+        locations: Dict[str, Dict[str, Any]] = {}
+        for i in range(scale.facilities):
+            name = f"Stadt {o}-{i % max(1, scale.facilities // 10)}"
+            location = locations.setdefault(name, {"location": name, "canteens": [], "cafeterias": []})
+            canteen = i % 3 != 2
+            detail_url = f"https://www.{domain}/{name.lower().replace(' ', '-')}/mensa-{i}"
+            item = {
+                "facility_name": f"{'Mensa' if canteen else 'Cafeteria'} {o}-{i}",
+                "id": str(uuid_lib.UUID(int=rng.getrandbits(128), version=4)),
+                "address": f"Campusweg {i} {90000 + o} {name}",
+                "description": f"Synthetische {'Mensa' if canteen else 'Cafeteria'} mit {rng.randint(50, 800)} Plätzen.",
+                "detail_url": detail_url,
+            }
+            if canteen:
+                item["menu_url"] = f"{detail_url}/menu"
+            location["canteens" if canteen else "cafeterias"].append(item)
+        organizations.append({
+            "organization_name": f"Studierendenwerk {o}",
+            "organization_domain": domain,
+            "facilities": list(locations.values()),
+        })
+    return organizations
+
+
+def iter_facilities(registry: List[Dict[str, Any]]) -> Iterator[tuple[Dict[str, Any], str, str, Dict[str, Any]]]:
+    """(organization, location, facility type, facility item) of every facility in a generated registry."""
+    for org in registry:
+        for loc in org["facilities"]:
+            for ftype, key in ((CANTEEN, "canteens"), (CAFETERIA, "cafeterias")):
+                for item in loc[key]:
+                    yield org, loc["location"], ftype, item
+
+
+def dish_pool(scale: Scale, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = _rng(seed, "dishes")
+    return [
+        {
+            "title": f"Gericht {n}",
+            "tags": rng.sample(TAGS, rng.randint(0, 2)),
+            "allergens": rng.sample(ALLERGENS, rng.randint(0, 3)),
+        }
+        for n in range(max(scale.menu_size * 10, 1))
+    ]
+
+
+def opening_hours_doc(seed: int, uuid: str, day: date) -> Dict[str, Dict[str, Optional[str]]]:
+    """Opening hours per weekday (like parse_html_detail's by_day); they change about once a month."""
+    rng = _rng(seed, uuid, "hours", day.toordinal() // 30)
+    opens = rng.choice(("07:30", "08:00", "11:00"))
+    closes = rng.choice(("14:30", "15:00", "16:00"))
+    food_until = rng.choice((None, "14:00"))
+    friday_closes = rng.choice((closes, "14:00"))
+    saturday = rng.random() < 0.2
+
+    doc = {}
+    for i, key in enumerate(WEEKDAYS):
+        if i < 5 or (i == 5 and saturday):
+            doc[key] = {"opens": opens, "closes": friday_closes if i == 4 else closes, "food_until": food_until}
+        else:
+            doc[key] = {"opens": None, "closes": None, "food_until": None}
+    return doc
+
+
+def notices_doc(seed: int, uuid: str, day: date) -> List[str]:
+    rng = _rng(seed, uuid, "notices", day.isoformat())
+    return [f"<p>{rng.choice(NOTICES)}</p>" for _ in range(rng.choice((0, 0, 1, 2)))]
+
+
+def menu_day(seed: int, uuid: str, day: date, dishes: List[Dict[str, Any]], menu_size: int) -> List[Dict[str, Any]]:
+    """Entries of one day (like parse_html_menu's), the same in every version of the menu that shows this day."""
+    rng = _rng(seed, uuid, "menu", day.isoformat())
+    return [
+        {
+            "id": str(rng.randint(1, 99999)),
+            **dish,
+            "prices": {"student": round(rng.uniform(2.0, 5.0), 2), "servant": 4.5, "guest": 6.1},
+            "co2_g": rng.randint(150, 900),
+            "climate_plate": rng.random() < 0.2,
+        }
+        for dish in rng.sample(dishes, min(menu_size, len(dishes)))
+    ]
+
+
+def german_date_label(day: date) -> str:
+    return f"{GERMAN_WEEKDAYS[day.weekday()]}, {day.day}. {GERMAN_MONTHS[day.month - 1]} {day.year}"
+
+
+def menu_doc(seed: int, uuid: str, day: date, dishes: List[Dict[str, Any]], menu_size: int) -> List[Dict[str, Any]]:
+    """The menu as published on `day`: this and the next week, monday to friday (like parse_html_menu's weeks)."""
+    monday = day - timedelta(days=day.weekday())
+    weeks = []
+    for week in range(2):
+        days = []
+        for weekday in range(5):
+            d = monday + timedelta(days=7 * week + weekday)
+            days.append({
+                "day_id": d.isoformat(),
+                "date_label": german_date_label(d),
+                "date_iso": d.isoformat(),
+                "entries": menu_day(seed, uuid, d, dishes, menu_size),
+                "is_closed": False,
+            })
+        weeks.append({"week": str(week), "days": days})
+    return weeks
+
+
+# --- HTML snapshots -------------------------------------------------------------------------------------------
+
+def _price(value: float) -> str:
+    return f"{value:.2f}".replace(".", ",")
+
+
+def render_detail_html(notices: List[str], opening_hours: Dict[str, Dict[str, Optional[str]]]) -> str:
+    """Trimmed detail page (as the fetcher stores it) that parses into `notices` and `opening_hours`."""
+    parts = ['<div class="gastronomy">']
+    for notice in notices:
+        parts.append(f'<div class="notice"><span class="icon-mi">info</span>{notice}</div>')
+
+    # consecutive days with the same hours become one range, closed days are left out
+    groups: List[tuple[int, int]] = []
+    for i, key in enumerate(WEEKDAYS):
+        if opening_hours[key]["opens"] is None:
+            continue
+        if groups and groups[-1][1] == i - 1 and opening_hours[WEEKDAYS[groups[-1][0]]] == opening_hours[key]:
+            groups[-1] = (groups[-1][0], i)
+        else:
+            groups.append((i, i))
+
+    parts.append('<div class="opening-times_detail">'
+                 '<div class="opening-time_state"><span class="icon-mi">schedule</span> Geöffnet</div>'
+                 '<div class="opening-time_listing-all">')
+    for first, last in groups:
+        hours = opening_hours[WEEKDAYS[first]]
+        label = GERMAN_WEEKDAYS[first] if first == last else f"{GERMAN_WEEKDAYS[first]} - {GERMAN_WEEKDAYS[last]}"
+        meta = f"Essensausgabe bis {hours['food_until']} Uhr" if hours["food_until"] else ""
+        parts.append(
+            f'<div class="opening-time_days"><div class="opening-time-day-range">{label}</div>'
+            f'<div class="opening-time_set"><div class="opening-time">'
+            f'<div class="opening-times__time">{hours["opens"]} - {hours["closes"]} Uhr</div>'
+            f'<div class="opening-times__meta">{meta}</div></div></div></div>'
+        )
+    parts.append("</div></div></div>")
+    return "\n".join(parts)
+
+
+def _render_entry(entry: Dict[str, Any]) -> str:
+    icons = "".join(f'<span class="food-icon {escape(t.lower())}" data-type-title="{escape(t)}"></span>'
+                    for t in entry["tags"])
+    prices = entry["prices"]
+    allergens = "".join(f"<li>{escape(a)}</li>" for a in entry["allergens"])
+    climate = '<div class="climate-plate"></div>' if entry["climate_plate"] else ""
+    return (
+        f'<article data-dispo="{entry["id"]}"><div class="menu-entry_main-row"><h5>{escape(entry["title"])}</h5>\n'
+        f'<div class="food-type">{icons}</div>\n'
+        f'<div class="price" data-price-student="{_price(prices["student"])}" '
+        f'data-price-servant="{_price(prices["servant"])}" data-price-guest="{_price(prices["guest"])}"></div></div>\n'
+        f'<div class="menu-entry_additives-row">{climate}<div class="additives"><div class="additive-list">'
+        f'<div class="co2-per-serving"><span>{entry["co2_g"]} g</span></div><ul>{allergens}</ul></div></div></div>'
+        f'</article>'
+    )
+
+
+def render_menu_html(weeks: List[Dict[str, Any]]) -> str:
+    """Trimmed menu page (as the fetcher stores it) that parses into `weeks`."""
+    parts = ['<div class="gastronomy">']
+    for week in weeks:
+        parts.append(f'<div class="week-menu" data-week="{week["week"]}">')
+        for day in week["days"]:
+            entries = "".join(_render_entry(e) for e in day["entries"])
+            parts.append(f'<div class="day-menu" data-day="{day["day_id"]}"><h3>{day["date_label"]}</h3>'
+                         f'<div class="day-menu-entries">{entries}</div></div>')
+        parts.append("</div>")
+    parts.append("</div>")
+    return "\n".join(parts)
+
+
+def write_files(registry: List[Dict[str, Any]], scale: Scale, out_dir: Path, snapshots: int = 1,
+                seed: int = 0) -> List[Path]:
+    """Write facilities.json and the fetched snapshots of the last `snapshots` days; returns the snapshot dirs."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "facilities.json").write_text(json.dumps(registry, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    dishes = dish_pool(scale, seed)
+    today = datetime.now(timezone.utc).date()
+    written = []
+    for back in reversed(range(snapshots)):
+        day = today - timedelta(days=back)
+        snapshot_dir = out_dir / "fetched" / f"{day:%Y%m%d}_060000"
+        for _, _, ftype, item in iter_facilities(registry):
+            facility_dir = snapshot_dir / item["id"]
+            facility_dir.mkdir(parents=True, exist_ok=True)
+            detail = render_detail_html(notices_doc(seed, item["id"], day), opening_hours_doc(seed, item["id"], day))
+            (facility_dir / "detail.html").write_text(detail, encoding="utf-8")
+            if ftype == CANTEEN:
+                menu = render_menu_html(menu_doc(seed, item["id"], day, dishes, scale.menu_size))
+                (facility_dir / "menu.html").write_text(menu, encoding="utf-8")
+        written.append(snapshot_dir)
+    return written
+
+
+# --- database -------------------------------------------------------------------------------------------------
+
+def _compact(entry: Dict[str, Any], dish_ids: Dict[str, int]) -> Dict[str, Any]:
+    """An entry as store_menu keeps it (see app.src.storage.dishes), without a round trip per menu."""
+    h = dish_hash(entry["title"], entry["allergens"], entry["tags"])
+    out = {k: v for k, v in entry.items() if k not in ("title", "tags", "allergens")}
+    out["dish_id"] = dish_ids[h]
+    return out
+
+
+def _insert_dishes(db: Session, dishes: List[Dict[str, Any]]) -> Dict[str, int]:
+    rows = {}
+    for d in dishes:
+        h = dish_hash(d["title"], d["allergens"], d["tags"])
+        rows[h] = {"hash": h, **d}
+    db.execute(insert(Dish).values(list(rows.values())).on_conflict_do_nothing(index_elements=[Dish.hash]))
+    return {h: i for i, h in db.exec(select(Dish.id, Dish.hash).where(Dish.hash.in_(rows.keys()))).all()}
+
+
+def _flush_rows(db: Session, model, rows: List[Dict[str, Any]]) -> None:
+    if rows:
+        db.execute(insert(model).values(rows))
+        rows.clear()
+
+
+def seed_database(db: Session, scale: Scale = Scale(), seed: int = 0,
+                  registry: Optional[List[Dict[str, Any]]] = None) -> SeedIds:
+    """
+    Upsert the dataset's facilities into the database behind `db` and bulk-load their history as one published
+    generation (one row per facility and day; the caller's database should not hold other synthetic data).
+    Rows are written day by day in batches, so memory stays flat for any number of days. Commits.
+    """
+    registry = registry or generate_registry(scale, seed)
+    facilities = list(iter_facilities(registry))
+
+    type_ids = upsert_by_name(db, FacilityType, [{"name": CANTEEN}, {"name": CAFETERIA}])
+    org_ids = upsert_organizations(db, [{"name": o["organization_name"], "domain": o["organization_domain"]}
+                                        for o in registry])
+    location_ids = upsert_by_name(db, Location, [{"name": loc["location"]} for o in registry for loc in o["facilities"]])
+    upsert_facilities(db, [
+        {
+            "uuid": item["id"],
+            "name": item["facility_name"],
+            "address": item["address"],
+            "description": item["description"],
+            "organization_id": org_ids[org["organization_domain"]],
+            "location_id": location_ids[location],
+            "facility_type_id": type_ids[ftype],
+        }
+        for org, location, ftype, item in facilities
+    ])
+    ids_by_uuid = dict(db.exec(select(Facility.uuid, Facility.id)
+                               .where(Facility.uuid.in_([item["id"] for *_, item in facilities]))).all())
+
+    generation_id = open_generation(db, f"synthetic seed={seed}")
+    dishes = dish_pool(scale, seed)
+    dish_ids = _insert_dishes(db, dishes)
+
+    today = datetime.now(timezone.utc).date()
+    notices, opening_hours, meals = [], [], []
+    for back in reversed(range(scale.days)):
+        day = today - timedelta(days=back)
+        timestamp = datetime.combine(day, time(6), timezone.utc)
+        for _, _, ftype, item in facilities:
+            uuid = item["id"]
+            common = {"facility_id": ids_by_uuid[uuid], "timestamp": timestamp, "generation_id": generation_id}
+            notices.append({**common, "notices": notices_doc(seed, uuid, day)})
+            opening_hours.append({**common, "opening_hours": opening_hours_doc(seed, uuid, day)})
+            if ftype == CANTEEN:
+                weeks = menu_doc(seed, uuid, day, dishes, scale.menu_size)
+                compact = [{**w, "days": [{**d, "entries": [_compact(e, dish_ids) for e in d["entries"]]}
+                                          for d in w["days"]]} for w in weeks]
+                meals.append({**common, "meals": compact})
+            for model, rows in ((Notice, notices), (OpeningHour, opening_hours), (Meal, meals)):
+                if len(rows) >= BATCH_SIZE:
+                    _flush_rows(db, model, rows)
+    for model, rows in ((Notice, notices), (OpeningHour, opening_hours), (Meal, meals)):
+        _flush_rows(db, model, rows)
+
+    publish(db, generation_id)
+    db.commit()
+
+    org, location, ftype, item = next(((o, l, t, i) for o, l, t, i in facilities if t == CANTEEN), facilities[0])
+    facility_id = ids_by_uuid[item["id"]]
+
+    def first_row(model) -> int:
+        return db.exec(select(func.min(model.id)).where(model.facility_id == facility_id)).one()
+
+    return SeedIds(
+        organization_id=org_ids[org["organization_domain"]],
+        location_id=location_ids[location],
+        facility_type_id=type_ids[ftype],
+        facility_id=facility_id,
+        facility_uuid=item["id"],
+        notice_id=first_row(Notice),
+        opening_hours_id=first_row(OpeningHour),
+        dish_id=min(dish_ids.values()),
+        generation_id=generation_id,
+    )
+
+
+@contextmanager
+def scratch_schema(schema: str):
+    """Point every new connection of the app's engine at an empty `schema` and drop it afterwards."""
+    def set_search_path(dbapi_connection, connection_record):
+        # outside of a transaction, so a rollback does not reset it
+        autocommit = dbapi_connection.autocommit
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f'SET search_path TO "{schema}"')
+        dbapi_connection.autocommit = autocommit
+
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    event.listen(engine, "connect", set_search_path)
+    engine.dispose()
+    try:
+        yield
+    finally:
+        event.remove(engine, "connect", set_search_path)
+        engine.dispose()
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset for load and scale tests.")
+    parser.add_argument("--organizations", type=int, default=Scale.organizations)
+    parser.add_argument("--facilities", type=int, default=Scale.facilities, help="facilities per organization")
+    parser.add_argument("--days", type=int, default=Scale.days, help="days of history loaded into the database")
+    parser.add_argument("--menu-size", type=int, default=Scale.menu_size, help="dishes per menu day")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=OUT_DIR, help="directory for facilities.json and snapshots")
+    parser.add_argument("--snapshots", type=int, default=1, help="fetched snapshots to write (of the last days)")
+    parser.add_argument("--load-db", action="store_true", help="also load facilities and history into the database")
+    args = parser.parse_args(argv)
+    scale = Scale(args.organizations, args.facilities, args.days, args.menu_size)
+
+    registry = generate_registry(scale, args.seed)
+    snapshot_dirs = write_files(registry, scale, args.out, snapshots=args.snapshots, seed=args.seed)
+    print(f"✅ Wrote {args.out / 'facilities.json'} and {len(snapshot_dirs)} snapshots to {args.out / 'fetched'}")
+
+    if args.load_db:
+        create_db_and_tables()
+        with Session(engine) as db:
+            ids = seed_database(db, scale, seed=args.seed, registry=registry)
+        print(f"✅ Loaded {scale.organizations * scale.facilities} facilities with {scale.days} days of history "
+              f"(generation {ids.generation_id})")
+
+
+if __name__ == "__main__":
+    main()
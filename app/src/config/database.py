@@ -1,10 +1,12 @@
 from typing import List, Any
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
+from sqlalchemy import BigInteger, DateTime, UniqueConstraint
 from sqlmodel import Field, SQLModel, Relationship, Column, create_engine, Session
 from sqlalchemy.dialects.postgresql import JSONB
 
-from app.src.config.env import db_username, db_password, db_url, db_name
+from app.src.config.env import db_username, db_password, db_url, db_name, db_echo
+from app.src.metrics.instrumentation import InstrumentedQueuePool, instrument_engine
 
 connection_string = f'postgresql+psycopg2://{db_username}:{db_password}@{db_url}/{db_name}'
 
@@ -71,6 +73,33 @@ class Facility(SQLModel, table=True):
     )
 
 
+class Generation(SQLModel, table=True):
+    """
+    One updater run (or daemon publish interval, or backfill run). Its rows stay invisible to the API while the
+    generation is "staging"; publishing or rolling it back only changes this row and the publish pointer.
+    """
+    __tablename__ = "generation"
+
+    id: int | None = Field(default=None, primary_key=True)
+
+    # what wrote it, e.g. "db_updater 20250101_060000"
+    label: str = Field(max_length=100)
+
+    # "staging", "published" or "rolled_back"
+    status: str = Field(default="staging", max_length=12)
+
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True))
+    published_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
+
+
+class PublishPointer(SQLModel, table=True):
+    """Single row pointing at the current generation; readers see published generations up to it."""
+    __tablename__ = "publish_pointer"
+
+    id: int = Field(default=1, primary_key=True)
+    generation_id: int | None = Field(default=None, foreign_key="generation.id")
+
+
 class Notice(SQLModel, table=True):
     __tablename__ = "notice"
 
@@ -82,11 +111,18 @@ class Notice(SQLModel, table=True):
     # when the notice was recorded (tz-aware)
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-    # JSON array of notices (e.g., strings or objects)
+    # JSON array of notices (e.g., strings or objects); may be NULL for delta versions (see app.src.storage.history)
     notices: dict[str, Any] = Field(
         sa_column=Column(JSONB)
     )
 
+    # delta history: keyframes are always stored in full, other versions as JSON patch against their predecessor
+    is_keyframe: bool = Field(default=True, sa_column_kwargs={"server_default": "true"})
+    patch: list[Any] | None = Field(default=None, sa_column=Column(JSONB, nullable=True))
+
+    # updater run that wrote this row; NULL for rows from before generations (see app.src.storage.generations)
+    generation_id: int | None = Field(default=None, foreign_key="generation.id", index=True)
+
     # relationship back to Facility
     facility: Facility = Relationship(back_populates="notices")
 
@@ -102,11 +138,18 @@ class OpeningHour(SQLModel, table=True):
     # when the notice was recorded (tz-aware)
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-    # JSON array of notices (e.g., strings or objects)
+    # JSON array of notices (e.g., strings or objects); may be NULL for delta versions (see app.src.storage.history)
     opening_hours: dict[str, Any] = Field(
         sa_column=Column(JSONB)
     )
 
+    # delta history: keyframes are always stored in full, other versions as JSON patch against their predecessor
+    is_keyframe: bool = Field(default=True, sa_column_kwargs={"server_default": "true"})
+    patch: list[Any] | None = Field(default=None, sa_column=Column(JSONB, nullable=True))
+
+    # updater run that wrote this row; NULL for rows from before generations (see app.src.storage.generations)
+    generation_id: int | None = Field(default=None, foreign_key="generation.id", index=True)
+
     # relationship back to Facility
     facility: Facility = Relationship(back_populates="opening_hours")
 
@@ -127,15 +170,177 @@ class Meal(SQLModel, table=True):
         sa_column=Column(JSONB)
     )
 
+    # updater run that wrote this row; NULL for rows from before generations (see app.src.storage.generations)
+    generation_id: int | None = Field(default=None, foreign_key="generation.id", index=True)
+
     # relationship back to Facility
     facility: Facility = Relationship(back_populates="meals")
 
 
-engine = create_engine(connection_string, echo=True)
+class Dish(SQLModel, table=True):
+    """A dish as it appears on menus, shared by all days and facilities serving it."""
+    __tablename__ = "dish"
+
+    id: int | None = Field(default=None, primary_key=True)
+
+    # sha256 over normalized title + allergens + tags (see app.src.storage.dishes.dish_hash)
+    hash: str = Field(max_length=64, unique=True)
+
+    title: str
+    tags: list[str] = Field(sa_column=Column(JSONB))
+    allergens: list[str] = Field(sa_column=Column(JSONB))
+
+    # when the dish was seen for the first time (tz-aware)
+    first_seen: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class ProcessedInput(SQLModel, table=True):
+    """Content hash of the last page the db_updater processed per facility and page kind."""
+    __tablename__ = "processed_input"
+    __table_args__ = (UniqueConstraint("facility_id", "kind"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+
+    # foreign key
+    facility_id: int = Field(foreign_key="facility.id", nullable=False)
+
+    # "detail" or "menu"
+    kind: str = Field(max_length=10)
+    content_hash: str = Field(max_length=64)
+
+    processed_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    # generation the page was stored in; hashes of unpublished or rolled back generations do not count
+    generation_id: int | None = Field(default=None, foreign_key="generation.id")
+
+
+class MealRollup(SQLModel, table=True):
+    """Precomputed price and CO2 statistics per facility and day/week, kept current by the db_updater."""
+    __tablename__ = "meal_rollup"
+    __table_args__ = (UniqueConstraint("facility_id", "period", "period_start"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+
+    # foreign key
+    facility_id: int = Field(foreign_key="facility.id", nullable=False, index=True)
+
+    # "day" or "week" (weeks start on monday)
+    period: str = Field(max_length=5)
+    period_start: date
+
+    # number of meal entries in this period
+    count: int
+
+    student_min: float | None = None
+    student_mean: float | None = None
+    student_max: float | None = None
+    servant_min: float | None = None
+    servant_mean: float | None = None
+    servant_max: float | None = None
+    guest_min: float | None = None
+    guest_mean: float | None = None
+    guest_max: float | None = None
+    co2_g_min: float | None = None
+    co2_g_mean: float | None = None
+    co2_g_max: float | None = None
+
+    # share of entries marked as climate plate (0..1)
+    climate_plate_share: float = 0.0
+
+    # when the menu it was computed from was current (the snapshot time for backfilled rows)
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class WorkItem(SQLModel, table=True):
+    """
+    One facility of one snapshot in the db_updater's work queue. Workers claim items with
+    SELECT ... FOR UPDATE SKIP LOCKED and hold them for a lease; expired leases are claimed again.
+    """
+    __tablename__ = "work_item"
+    __table_args__ = (UniqueConstraint("run", "facility_id"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+
+    # name of the snapshot directory (assets/fetched/{YYYYMMDD_HHMMSS})
+    run: str = Field(max_length=32, index=True)
+
+    # foreign key
+    facility_id: int = Field(foreign_key="facility.id", nullable=False)
+
+    # "pending", "claimed", "done" or "failed"
+    status: str = Field(default="pending", max_length=10)
+    worker: str | None = Field(default=None, max_length=100)
+    # database time, so workers on different nodes agree on expiry
+    lease_until: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
+    attempts: int = 0
+    error: str | None = None
+
+
+class PageSchedule(SQLModel, table=True):
+    """Change history of one page the daemon polls, from which its adaptive schedule derives the polling interval."""
+    __tablename__ = "page_schedule"
+
+    id: int | None = Field(default=None, primary_key=True)
+    url: str = Field(max_length=500, unique=True)
+
+    # facility uuid and page kind ("detail" or "menu")
+    facility_uuid: str = Field(max_length=36)
+    kind: str = Field(max_length=10)
+
+    # sha256 of the page when it was last fetched
+    content_hash: str | None = Field(default=None, max_length=64)
+    # current polling interval in seconds, before mealtime/weekday boosts
+    interval: float
+
+    checks: int = 0
+    changes: int = 0
+    # number of changes seen per weekday (monday = 0) and per hour of the day, in local time
+    changes_by_weekday: list[int] = Field(default_factory=lambda: [0] * 7, sa_column=Column(JSONB))
+    changes_by_hour: list[int] = Field(default_factory=lambda: [0] * 24, sa_column=Column(JSONB))
+
+    last_checked: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
+    last_changed: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
+
+
+class JobRun(SQLModel, table=True):
+    """One run of a cron job with its per-stage timings and counters (see app.src.cron.run_report)."""
+    __tablename__ = "job_run"
+
+    id: int | None = Field(default=None, primary_key=True)
+
+    # "fetcher" or "db_updater"
+    job: str = Field(max_length=20, index=True)
+    # snapshot directory the run wrote or read (assets/fetched/{YYYYMMDD_HHMMSS}) and when it was fetched
+    snapshot: str | None = Field(default=None, max_length=32)
+    snapshot_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
+
+    # "ok" or "failed"
+    status: str = Field(max_length=10)
+    error: str | None = None
+
+    started_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)
+    finished_at: datetime = Field(sa_type=DateTime(timezone=True))
+    duration_seconds: float
+    # peak resident set size of the process (the traced peak of Python allocations is in the report)
+    peak_memory_kib: float | None = None
+
+    bytes_read: int = Field(default=0, sa_type=BigInteger)
+    rows_inserted: int = 0
+    # history rows not written because their page or document did not change
+    rows_skipped: int = 0
+
+    # the full report: stages and all counters
+    report: dict[str, Any] = Field(sa_column=Column(JSONB))
+
+
+engine = create_engine(connection_string, echo=db_echo, pool_pre_ping=True, poolclass=InstrumentedQueuePool)
+instrument_engine(engine)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
+# Route handlers using it are plain `def`s: FastAPI runs them in its threadpool, so a request waiting for a pooled
+# connection does not block the event loop (and with it the requests that would give their connections back).
 def get_session():
     with Session(engine) as session:
         yield session
\ No newline at end of file
@@ -12,4 +12,17 @@ if not production_environment:
 db_username = os.getenv("DB_USERNAME")
 db_password = os.getenv("DB_PASSWORD")
 db_url = os.getenv("DB_URL")
-db_name = os.getenv("DB_NAME")
\ No newline at end of file
+db_name = os.getenv("DB_NAME")
+# Log every SQL statement (expensive; for debugging only)
+db_echo = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+
+# How notice / opening hours history is written: "full" (every version as a full document) or "delta"
+history_storage_mode = os.getenv("HISTORY_STORAGE_MODE", "full")
+# In delta mode, every n-th version is stored as a full keyframe
+history_keyframe_interval = int(os.getenv("HISTORY_KEYFRAME_INTERVAL", "10"))
+
+# Tree the page parsers run on: "bs4" (the reference), "lxml" or "selectolax" (optional packages, faster)
+html_parser_backend = os.getenv("HTML_PARSER_BACKEND", "bs4").lower()
+# Let the fetcher store the parse result of every page next to its HTML (detail.json / menu.json), parsed from the
+# tree it trimmed the page on, so the updater does not parse the page again
+fetch_store_parsed = os.getenv("FETCH_STORE_PARSED", "false").lower() in ("1", "true", "yes")
@@ -0,0 +1,60 @@
+"""
+Registry of per-organization scraper adapters.
+
+Every Studierendenwerk gets one adapter, keyed by the `organization_domain` used in facilities.json.
+An adapter knows how to fetch a page of its site (returning the trimmed HTML we keep as snapshot) and how to
+parse detail and menu pages into the structures the db_updater stores:
+
+    parse_detail(html) -> {"notices_html": [...], "opening_times": {"by_day": {...}, ...}}
+    parse_menu(html)   -> {"weeks": [...], ...}
+
+An adapter may also offer `fetch_parsed(url, kind)`, which returns the trimmed HTML together with its parse result
+("detail" or "menu"), taken from the tree it trimmed the page on. The fetcher uses it to store parse results in
+the snapshot, so the page is not parsed again by the updater.
+
+To add a city, create a module next to swerk_wue.py that calls `register_adapter(...)` and list it in
+BUILTIN_ADAPTERS.
+"""
+
+import importlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+BUILTIN_ADAPTERS = (
+    "app.src.cron.adapters.swerk_wue",
+)
+
+
+@dataclass(frozen=True)
+class OrganizationAdapter:
+    domain: str
+    fetch_page: Callable[[str], Optional[str]]
+    parse_detail: Callable[[str], Dict[str, Any]]
+    parse_menu: Callable[[str], Dict[str, Any]]
+    # (url, kind) -> (trimmed HTML, parse result or None), or None if the page could not be fetched
+    fetch_parsed: Optional[Callable[[str, str], Optional[Tuple[str, Optional[Dict[str, Any]]]]]] = None
+    # upper bound of pages fetched / facilities processed in parallel for this organization
+    max_concurrency: int = 4
+
+
+ADAPTERS: Dict[str, OrganizationAdapter] = {}
+_builtins_loaded = False
+
+
+def register_adapter(adapter: OrganizationAdapter) -> OrganizationAdapter:
+    if adapter.domain in ADAPTERS:
+        raise ValueError(f"An adapter for {adapter.domain} is already registered")
+    ADAPTERS[adapter.domain] = adapter
+    return adapter
+
+
+def get_adapter(domain: str) -> OrganizationAdapter:
+    global _builtins_loaded
+    if not _builtins_loaded:
+        for module in BUILTIN_ADAPTERS:
+            importlib.import_module(module)
+        _builtins_loaded = True
+    try:
+        return ADAPTERS[domain]
+    except KeyError:
+        raise KeyError(f"No scraper adapter registered for organization domain {domain!r}") from None
@@ -0,0 +1,86 @@
+"""
+Adapter for the Studierendenwerk Würzburg (swerk-wue.de): scrapes the <div class="gastronomy"> part of its pages.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from bs4 import BeautifulSoup, Tag
+
+from app.src.cron import run_report
+from app.src.cron.adapters.base import OrganizationAdapter, register_adapter
+from app.src.cron.db_updater.detail_parser import parse_detail_element, parse_html_detail
+from app.src.cron.db_updater.meal_parser import parse_html_menu, parse_menu_element
+
+
+def _fetch_gastronomy(url: str) -> Tag | None:
+    """Fetch a page and return its <div class="gastronomy">, cleaned and detached from the rest of the page."""
+    resp = requests.get(url, timeout=10)
+    resp.raise_for_status()
+    soup = BeautifulSoup(resp.text, "html.parser")
+
+    # 1. Find <main>
+    main = soup.find("main")
+    if not main:
+        return None
+
+    # 2. Find <div class="gastronomy"
+    gastronomy = main.find("div", class_="gastronomy")
+    if not gastronomy:
+        return None
+
+    # 3. Remove unwanted sections - currently:
+    # - <div class="gallery">
+    # - <div class="gastronomy-detail_bottom">
+    for unwanted in gastronomy.find_all("div", class_=["gallery", "gastronomy-detail_bottom"]):
+        unwanted.decompose()
+
+    # 4. Remove all <script> tags
+    for script in gastronomy.find_all("script"):
+        script.decompose()
+
+    # parsed on its own, the element is the root of the tree, like when the saved HTML is parsed again
+    return gastronomy.extract()
+
+
+def fetch_html(url: str) -> str | None:
+    """Fetch HTML and return only the <div class="gastronomy"> content, cleaned."""
+    try:
+        gastronomy = _fetch_gastronomy(url)
+        return str(gastronomy) if gastronomy else None
+
+    except Exception as e:
+        print(f"❌ Failed to fetch {url}: {e}")
+        return None
+
+
+def fetch_parsed(url: str, kind: str) -> Tuple[str, Optional[Dict[str, Any]]] | None:
+    """Like fetch_html, plus the parse result of the page, taken from the same tree (no second parse)."""
+    try:
+        gastronomy = _fetch_gastronomy(url)
+    except Exception as e:
+        print(f"❌ Failed to fetch {url}: {e}")
+        return None
+    if not gastronomy:
+        return None
+
+    # serialize first: parsing removes icons from the tree
+    html = str(gastronomy)
+    try:
+        with run_report.stage(f"parse_{kind}"):
+            parsed = parse_detail_element(gastronomy) if kind == "detail" else parse_menu_element(gastronomy)
+    except Exception as e:
+        # the updater parses the saved HTML instead
+        print(f"⚠️ Failed to parse {url}: {e!r}")
+        parsed = None
+    return html, parsed
+
+
+register_adapter(OrganizationAdapter(
+    domain="swerk-wue.de",
+    fetch_page=fetch_html,
+    parse_detail=parse_html_detail,
+    parse_menu=parse_html_menu,
+    fetch_parsed=fetch_parsed,
+    max_concurrency=4,
+))
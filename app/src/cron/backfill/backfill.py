@@ -0,0 +1,310 @@
+"""
+This job re-derives the database from the snapshots already stored in assets/fetched/, e.g. after a parser fix.
+
+1. Enumerates all snapshot directories ({YYYYMMDD_HHMMSS}) within --from/--to.
+2. Parses every detail/menu page in a process pool (results are shared with the db_updater's parse memo).
+   Pages whose content hash the db_updater already processed are skipped, unless --force is given; a page that
+   fails to parse is counted and its snapshot is left out of the checkpoint, so the next run retries it.
+3. Writes notices, opening hours and meals per snapshot with bulk INSERTs, using the snapshot time as timestamp,
+   into one staging generation for the whole run.
+4. Records every finished snapshot in a checkpoint file; an interrupted run continues where it stopped, in the
+   same generation.
+5. Publishes the generation at the end, replacing rows that already existed for a facility at exactly a backfilled
+   timestamp (so runs can be repeated). Its publish time is backdated to the newest snapshot it covers, so the
+   publish-ordered exports (meal_export, /export?since=) do not send the old data again as new.
+
+Notices and opening hours are written as full keyframes in the middle of the existing history. Delta versions after
+them would no longer patch their predecessor, so the backfill refuses to run with HISTORY_STORAGE_MODE=delta, or
+while the tables still hold delta versions written in that mode.
+Meal rollups are refreshed as well, but only where no rollup computed from a newer menu exists.
+"""
+
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from datetime import datetime
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, false, func, insert, tuple_
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.src.config.database import engine, Facility, FacilityType, Generation, Notice, OpeningHour, Meal
+from app.src.config.env import history_storage_mode
+from app.src.cron.db_updater.content_loader import FETCHED_DIR, BASE_DIR, file_hash, read_file
+from app.src.cron.db_updater.db_updater import load_processed_hashes
+from app.src.cron.db_updater.html_backends import configured_backend
+from app.src.cron.adapters.base import get_adapter
+from app.src.cron.db_updater.parse_cache import cached_parse
+from app.src.cron.db_updater.rollups import compute_rollups, upsert_rollups
+from app.src.cron.publish.publish import publish
+from app.src.cron.registry import get_registry
+from app.src.storage.dishes import intern_meal_documents
+from app.src.storage.generations import STAGING, open_generation
+
+SNAPSHOT_FORMAT = "%Y%m%d_%H%M%S"
+GENERATION_LABEL = "backfill"
+CHECKPOINT_FILE = BASE_DIR / "assets" / "cache" / "backfill_checkpoint.json"
+DELTA_MODE_ERROR = "the backfill inserts full keyframes into the history and needs HISTORY_STORAGE_MODE=full"
+DELTA_ROWS_ERROR = "the history still holds delta versions, which the backfill's keyframes would break"
+
+# (snapshot name, organization domain, facility uuid, detail.html path or None, menu.html path or None,
+#  processed detail hash or None, processed menu hash or None)
+Job = Tuple[str, str, str, Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def snapshot_time(name: str) -> Optional[datetime]:
+    try:
+        # the fetcher names snapshots after its local time
+        return datetime.strptime(name, SNAPSHOT_FORMAT).astimezone()
+    except ValueError:
+        return None
+
+
+def list_snapshots(start: Optional[str], end: Optional[str]) -> List[Path]:
+    """Snapshot directories with start <= YYYYMMDD <= end, oldest first."""
+    if not FETCHED_DIR.exists():
+        return []
+    dirs = [p for p in FETCHED_DIR.iterdir() if p.is_dir() and snapshot_time(p.name)]
+    dirs = [p for p in dirs
+            if (start is None or p.name[:8] >= start) and (end is None or p.name[:8] <= end)]
+    return sorted(dirs, key=lambda p: p.name)
+
+
+def load_checkpoint(path: Path) -> set[str]:
+    if not path.exists():
+        return set()
+    return set(json.loads(path.read_text(encoding="utf-8"))["done"])
+
+
+def save_checkpoint(path: Path, done: set[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"done": sorted(done)}, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _parse_job(job: Job) -> Dict[str, Any]:
+    """Runs in a worker process."""
+    snapshot, domain, uuid, detail_path, menu_path, detail_processed, menu_processed = job
+    adapter = get_adapter(domain)
+    out: Dict[str, Any] = {"snapshot": snapshot, "uuid": uuid, "detail": None, "menu": None, "skipped": 0}
+    if detail_path:
+        path = Path(detail_path)
+        digest = file_hash(path)
+        if digest == detail_processed:
+            out["skipped"] += 1
+        else:
+            out["detail"] = cached_parse(f"{domain}/detail", digest, lambda: read_file(path),
+                                         adapter.parse_detail, html_path=path)
+    if menu_path:
+        path = Path(menu_path)
+        digest = file_hash(path)
+        if digest == menu_processed:
+            out["skipped"] += 1
+        else:
+            out["menu"] = cached_parse(f"{domain}/menu", digest, lambda: read_file(path),
+                                       adapter.parse_menu, html_path=path)["weeks"]
+    return out
+
+
+def _jobs(snapshots: List[Path],
+          canteen_by_uuid: Dict[str, bool],
+          domain_by_uuid: Dict[str, str],
+          processed: Dict[Tuple[str, str], str]) -> Iterator[Job]:
+    for snapshot in snapshots:
+        for uuid, is_canteen in canteen_by_uuid.items():
+            detail = snapshot / uuid / "detail.html"
+            menu = snapshot / uuid / "menu.html"
+            detail_path = str(detail) if detail.exists() else None
+            menu_path = str(menu) if is_canteen and menu.exists() else None
+            if detail_path or menu_path:
+                yield (snapshot.name, domain_by_uuid[uuid], uuid, detail_path, menu_path,
+                       processed.get((uuid, "detail")), processed.get((uuid, "menu")))
+
+
+def _bounded_map(pool: Executor, fn: Callable, jobs: Iterable, max_pending: int) -> Iterator[Tuple[Any, Future]]:
+    """
+    Like pool.map, but never more than `max_pending` results are in flight or waiting to be written.
+    Yields (job, finished future) in job order, so the caller decides what a failed job means.
+    """
+    pending = deque()
+    for job in jobs:
+        pending.append((job, pool.submit(fn, job)))
+        if len(pending) >= max_pending:
+            job, future = pending.popleft()
+            future.exception()  # waits for it
+            yield job, future
+    while pending:
+        job, future = pending.popleft()
+        future.exception()
+        yield job, future
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def backfill_generation(db: Session) -> int:
+    """The staging generation of an interrupted backfill, or a new one (the caller commits)."""
+    existing = db.exec(
+        select(Generation.id)
+        .where(Generation.label == GENERATION_LABEL, Generation.status == STAGING)
+        .order_by(Generation.id.desc())
+    ).first()
+    return existing if existing is not None else open_generation(db, GENERATION_LABEL)
+
+
+def write_snapshot(db: Session,
+                   snapshot: str,
+                   results: List[Dict[str, Any]],
+                   facility_ids: Dict[str, int],
+                   batch_size: int,
+                   generation_id: int) -> int:
+    """Write all rows of one snapshot into the backfill generation in a single transaction; returns the row count."""
+    if history_storage_mode == "delta":
+        raise RuntimeError(DELTA_MODE_ERROR)
+    ts = snapshot_time(snapshot)
+    ids = [facility_ids[r["uuid"]] for r in results]
+
+    # a snapshot written before (e.g. with --restart) is replaced within the generation
+    for model in (Notice, OpeningHour, Meal):
+        db.execute(delete(model).where(model.generation_id == generation_id,
+                                       model.facility_id.in_(ids), model.timestamp == ts))
+
+    notices, opening_hours, menus = [], [], []
+    for r in results:
+        facility_id = facility_ids[r["uuid"]]
+        if r["detail"] is not None:
+            notices.append({"facility_id": facility_id, "timestamp": ts, "is_keyframe": True,
+                            "generation_id": generation_id, "notices": r["detail"]["notices_html"]})
+            opening_hours.append({"facility_id": facility_id, "timestamp": ts, "is_keyframe": True,
+                                  "generation_id": generation_id,
+                                  "opening_hours": r["detail"]["opening_times"]["by_day"]})
+        if r["menu"] is not None:
+            menus.append((facility_id, r["menu"]))
+
+    compact = intern_meal_documents(db, [weeks for _, weeks in menus])
+    meals = [{"facility_id": facility_id, "timestamp": ts, "generation_id": generation_id, "meals": doc}
+             for (facility_id, _), doc in zip(menus, compact)]
+
+    for model, rows in ((Notice, notices), (OpeningHour, opening_hours), (Meal, meals)):
+        for chunk in _chunks(rows, batch_size):
+            db.execute(insert(model), chunk)
+
+    rollups: Dict[tuple, Dict[str, Any]] = {}
+    for facility_id, weeks in menus:
+        for row in compute_rollups(facility_id, weeks, as_of=ts):
+            rollups[(row["facility_id"], row["period"], row["period_start"])] = row
+    for chunk in _chunks(list(rollups.values()), batch_size):
+        # rollups computed from newer menus (a later snapshot or the regular updater) are kept
+        upsert_rollups(db, chunk, keep_newer=True)
+
+    db.commit()
+    return len(notices) + len(opening_hours) + len(meals)
+
+
+def publish_backfill(db: Session, generation_id: int) -> bool:
+    """
+    Replace the rows of other generations at the backfilled facilities and timestamps and publish the generation,
+    backdated to its newest snapshot, in one transaction. Returns False if it stored nothing.
+    """
+    newest = None
+    for model in (Notice, OpeningHour, Meal):
+        backfilled = aliased(model)
+        db.execute(
+            delete(model)
+            .where(model.generation_id.is_distinct_from(generation_id),
+                   tuple_(model.facility_id, model.timestamp).in_(
+                       select(backfilled.facility_id, backfilled.timestamp)
+                       .where(backfilled.generation_id == generation_id)))
+            .execution_options(synchronize_session=False)
+        )
+        latest = db.exec(select(func.max(model.timestamp)).where(model.generation_id == generation_id)).one()
+        if latest is not None and (newest is None or latest > newest):
+            newest = latest
+    if newest is None:
+        db.delete(db.get(Generation, generation_id))
+        db.commit()
+        return False
+    published = publish(db, generation_id, published_at=newest)
+    db.commit()
+    return published
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Reprocess stored snapshots into the database.")
+    parser.add_argument("--from", dest="start", metavar="YYYYMMDD", help="first snapshot day (inclusive)")
+    parser.add_argument("--to", dest="end", metavar="YYYYMMDD", help="last snapshot day (inclusive)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="parser processes (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per INSERT (default: %(default)s)")
+    parser.add_argument("--checkpoint", type=Path, default=CHECKPOINT_FILE, help="checkpoint file (default: %(default)s)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and process every snapshot again")
+    parser.add_argument("--force", action="store_true", help="also reprocess pages the db_updater already processed")
+    args = parser.parse_args(argv)
+    # an unknown or uninstalled HTML_PARSER_BACKEND stops the job here, not at its first page
+    configured_backend()
+    if history_storage_mode == "delta":
+        parser.error(DELTA_MODE_ERROR)
+
+    done = set() if args.restart else load_checkpoint(args.checkpoint)
+    snapshots = [s for s in list_snapshots(args.start, args.end) if s.name not in done]
+    print(f"{len(snapshots)} snapshots to process ({len(done)} already done)")
+
+    registry = get_registry()
+    known_uuids = registry.by_uuid.keys()
+    domain_by_uuid = {uuid: entry.organization.organization_domain for uuid, entry in registry.by_uuid.items()}
+    with Session(engine) as db:
+        # HISTORY_STORAGE_MODE may have been switched back to full after delta versions were written
+        for model in (Notice, OpeningHour):
+            if db.exec(select(model.id).where(model.is_keyframe == false()).limit(1)).first() is not None:
+                parser.error(DELTA_ROWS_ERROR)
+
+        generation_id = backfill_generation(db)
+        db.commit()
+        rows = db.exec(select(Facility.uuid, Facility.id, FacilityType.name).join(FacilityType)).all()
+        facility_ids = {uuid: fid for uuid, fid, _ in rows if uuid in known_uuids}
+        canteen_by_uuid = {uuid: type_name == "Canteen" for uuid, _, type_name in rows if uuid in known_uuids}
+        uuid_by_id = {fid: uuid for uuid, fid in facility_ids.items()}
+        processed = {} if args.force else {(uuid_by_id[fid], kind): h
+                                           for (fid, kind), h in load_processed_hashes(db).items() if fid in uuid_by_id}
+
+        failed_total = 0
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            jobs = _jobs(snapshots, canteen_by_uuid, domain_by_uuid, processed)
+            finished = _bounded_map(pool, _parse_job, jobs, max_pending=args.workers * 16)
+            # results keep the job order, so they arrive grouped by snapshot
+            for snapshot, group in groupby(finished, key=lambda jf: jf[0][0]):
+                results, skipped, failed = [], 0, 0
+                for job, future in group:
+                    if future.exception() is not None:
+                        failed += 1
+                        print(f"❌ {snapshot}: facility {job[2]} failed: {future.exception()!r}")
+                        continue
+                    result = future.result()
+                    skipped += result["skipped"]
+                    if result["detail"] is not None or result["menu"] is not None:
+                        results.append(result)
+                written = write_snapshot(db, snapshot, results, facility_ids, args.batch_size, generation_id)
+                # a snapshot with failed facilities is tried again by the next run
+                if not failed:
+                    done.add(snapshot)
+                    save_checkpoint(args.checkpoint, done)
+                failed_total += failed
+                print(f"{'✅' if not failed else '⚠️'} {snapshot}: {written} rows, "
+                      f"skipped {skipped} processed pages, {failed} facilities failed")
+        if failed_total:
+            print(f"{failed_total} facilities failed; run again to retry their snapshots.")
+
+        # also publishes the generation of an interrupted run that wrote all its snapshots
+        if publish_backfill(db, generation_id):
+            print(f"✅ Published generation {generation_id}")
+
+
+if __name__ == "__main__":
+    main()
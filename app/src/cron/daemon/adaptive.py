@@ -0,0 +1,193 @@
+"""
+Adaptive polling schedule for the pipeline daemon.
+
+Every page keeps a change history in the page_schedule table (content hash, number of checks and changes,
+changes per weekday and per hour). Observations are kept in memory and written every FLUSH_INTERVAL seconds
+(see AdaptiveSchedule.flush). From it the schedule derives a polling interval per page:
+  - a fetch that found the page changed halves its interval, an unchanged fetch stretches it by a quarter,
+    always within the bounds of its page kind,
+  - menus are polled at least every MEALTIME_INTERVAL seconds around mealtimes on weekdays, and at the latest
+    when the next mealtime starts,
+  - weekdays and hours in which the page changed more often than average halve the interval again.
+
+Run this module to inspect the current schedule:
+    python -m app.src.cron.daemon.adaptive
+"""
+
+import threading
+import time as clock
+from datetime import datetime, time, timedelta
+from typing import Dict, Optional, Set
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.src.config.database import engine, PageSchedule
+from app.src.cron.daemon.schedule import DETAIL, MENU
+
+# (shortest, longest) interval in seconds per page kind
+BOUNDS = {
+    MENU: (10 * 60, 12 * 60 * 60),
+    DETAIL: (60 * 60, 7 * 24 * 60 * 60),
+}
+CHANGED_FACTOR = 0.5
+UNCHANGED_FACTOR = 1.25
+
+# local times around which menus are polled at least every MEALTIME_INTERVAL seconds
+MEALTIMES = ((time(10, 0), time(14, 30)), (time(17, 0), time(19, 30)))
+MEALTIME_INTERVAL = 15 * 60
+
+# seconds between two writes of the observed pages to page_schedule
+FLUSH_INTERVAL = 60
+
+
+def is_mealtime(now: datetime) -> bool:
+    # canteens serve monday to friday
+    return now.weekday() < 5 and any(start <= now.time() <= end for start, end in MEALTIMES)
+
+
+def next_mealtime(now: datetime) -> datetime:
+    """Start of the next mealtime after `now` (in the time zone of `now`)."""
+    for days in range(8):
+        day = now.date() + timedelta(days=days)
+        if day.weekday() >= 5:
+            continue
+        for start, _ in MEALTIMES:
+            begin = datetime.combine(day, start, tzinfo=now.tzinfo)
+            if begin > now:
+                return begin
+    raise AssertionError("every week has a mealtime")
+
+
+def _above_average(counts: list[int], index: int) -> bool:
+    total = sum(counts)
+    return total > 0 and counts[index] * len(counts) > total
+
+
+def effective_interval(page: PageSchedule, now: datetime) -> float:
+    """The interval of `page` with the mealtime and weekday/hour boosts for the time `now` applied."""
+    shortest, _ = BOUNDS[page.kind]
+    interval = page.interval
+    if _above_average(page.changes_by_weekday, now.weekday()):
+        interval /= 2
+    if _above_average(page.changes_by_hour, now.hour):
+        interval /= 2
+    if page.kind == MENU and is_mealtime(now):
+        interval = min(interval, MEALTIME_INTERVAL)
+    interval = max(shortest, interval)
+    if page.kind == MENU and not is_mealtime(now):
+        # a long night or weekend interval must not skip the start of the next mealtime
+        interval = min(interval, (next_mealtime(now) - now).total_seconds())
+    return interval
+
+
+class AdaptiveSchedule:
+    """Schedule for the daemon that learns from the content hashes it observes; state lives in page_schedule."""
+
+    def __init__(self, initial_intervals: Dict[str, int]):
+        self.initial_intervals = initial_intervals
+        self.lock = threading.Lock()
+        with Session(engine) as db:
+            self.pages: Dict[str, PageSchedule] = {p.url: p for p in db.exec(select(PageSchedule)).all()}
+        # urls of pages observed since the last flush
+        self.dirty: Set[str] = set()
+        self.flushed_at = clock.monotonic()
+
+    def _page(self, job) -> PageSchedule:
+        page = self.pages.get(job.url)
+        if page is None:
+            shortest, longest = BOUNDS[job.kind]
+            interval = min(longest, max(shortest, self.initial_intervals[job.kind]))
+            page = PageSchedule(url=job.url, facility_uuid=job.uuid, kind=job.kind, interval=interval)
+            self.pages[job.url] = page
+        return page
+
+    def initial_delay(self, job, now: datetime) -> float:
+        """Pages checked recently are not fetched again right after a restart."""
+        with self.lock:
+            page = self._page(job)
+            if page.last_checked is None:
+                return 0
+            due = page.last_checked + timedelta(seconds=effective_interval(page, now))
+            return max(0.0, (due - now).total_seconds())
+
+    def interval(self, job, now: datetime) -> float:
+        with self.lock:
+            return effective_interval(self._page(job), now)
+
+    def observe(self, job, digest: Optional[str], now: datetime) -> None:
+        if digest is None:
+            return  # a failed fetch or parse says nothing about how often the page changes
+        with self.lock:
+            page = self._page(job)
+            shortest, longest = BOUNDS[job.kind]
+            changed = page.content_hash is not None and page.content_hash != digest
+            if changed:
+                page.changes += 1
+                page.changes_by_weekday = [*page.changes_by_weekday]
+                page.changes_by_weekday[now.weekday()] += 1
+                page.changes_by_hour = [*page.changes_by_hour]
+                page.changes_by_hour[now.hour] += 1
+                page.last_changed = now
+                page.interval = max(shortest, page.interval * CHANGED_FACTOR)
+            elif page.content_hash is not None:
+                page.interval = min(longest, page.interval * UNCHANGED_FACTOR)
+            page.content_hash = digest
+            page.checks += 1
+            page.last_checked = now
+            self.dirty.add(job.url)
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Write the pages observed since the last flush in one statement, at most every FLUSH_INTERVAL seconds
+        unless forced; returns the number of pages written. Pages whose write failed are written next time.
+        """
+        with self.lock:
+            if not self.dirty or (not force and clock.monotonic() - self.flushed_at < FLUSH_INTERVAL):
+                return 0
+            urls, self.dirty = self.dirty, set()
+            self.flushed_at = clock.monotonic()
+            rows = [self.pages[url].model_dump(exclude={"id"}) for url in urls]
+        try:
+            stmt = insert(PageSchedule).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PageSchedule.url],
+                set_={c: stmt.excluded[c] for c in rows[0] if c != "url"},
+            )
+            with Session(engine) as db:
+                db.execute(stmt)
+                db.commit()
+        except Exception:
+            with self.lock:
+                self.dirty |= urls
+            raise
+        return len(rows)
+
+
+def main():
+    now = datetime.now().astimezone()
+    with Session(engine) as db:
+        pages = db.exec(select(PageSchedule)).all()
+    if not pages:
+        print("No pages observed yet; run the daemon with --adaptive first.")
+        return
+
+    rows = []
+    for page in pages:
+        interval = effective_interval(page, now)
+        due = page.last_checked + timedelta(seconds=interval) if page.last_checked else now
+        rows.append((due, page, interval))
+    rows.sort(key=lambda r: r[0])
+
+    print(f"{'next fetch':<20} {'kind':<7} {'interval':>9} {'now':>9} {'changes':>9}  facility / url")
+    for due, page, interval in rows:
+        print(f"{due.strftime('%Y-%m-%d %H:%M:%S'):<20} {page.kind:<7} "
+              f"{page.interval / 60:>8.0f}m {interval / 60:>8.0f}m {page.changes:>4}/{page.checks:<4}  "
+              f"{page.facility_uuid} {page.url}")
+
+    per_day = sum(24 * 60 * 60 / effective_interval(page, now) for page in pages)
+    print(f"\n{len(pages)} pages, about {per_day:.0f} fetches/day at the current rates")
+
+
+if __name__ == "__main__":
+    main()
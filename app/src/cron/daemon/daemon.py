@@ -0,0 +1,377 @@
+"""
+Long-running replacement for the fetcher + db_updater cron jobs.
+
+The daemon imports everything and opens its connection pool once, then runs every page through an in-memory
+pipeline:
+
+    scheduler ──► fetch workers ──► parse workers ──► write workers
+               (bounded queues between the stages, so a slow stage holds back the ones before it)
+
+Each page (detail or menu of a facility) is fetched again after the interval its schedule gives it, so menus can
+be polled often and detail pages rarely. Unchanged pages (same content hash as stored last) are not parsed.
+With --adaptive, intervals follow how often each page actually changes (see adaptive.py).
+Every fetched page is also written in the fetcher's layout, assets/fetched/{YYYYMMDD_HHMMSS}/{facility uuid}/
+{detail,menu}.html, one snapshot per --publish-interval. These snapshots are marked partial: the db_updater takes the
+pages they lack from the snapshots before them, and the backfill can replay them like fetcher snapshots.
+
+Write workers store into a shared staging generation that is published every --publish-interval seconds (and at
+shutdown), so readers see the pages of one interval at once and the generation table grows by one row per interval
+instead of one per page.
+
+While the daemon runs it holds the db_updater's run lock, so cron-started updaters exit instead of racing it.
+
+Usage:
+    python -m app.src.cron.daemon.daemon [--menu-interval 1800] [--detail-interval 21600] [--schedule file.json | --adaptive]
+"""
+
+import argparse
+import heapq
+import queue
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app.src.config.database import engine, Facility
+from app.src.cron.adapters.base import get_adapter
+from app.src.cron.daemon.adaptive import AdaptiveSchedule
+from app.src.cron.daemon.schedule import DETAIL, MENU, DEFAULT_INTERVALS, FixedSchedule
+from app.src.cron.db_updater.content_loader import FETCHED_DIR, PARTIAL_MARKER
+from app.src.cron.db_updater.db_updater import RUN_LOCK_KEY, load_processed_hashes, store_detail, store_menu
+from app.src.cron.db_updater.html_backends import configured_backend
+from app.src.cron.db_updater.parse_cache import cached_parse, content_hash
+from app.src.cron.publish.publish import publish_or_discard
+from app.src.cron.registry import CANTEEN, get_registry
+from app.src.storage.generations import open_generation
+
+SNAPSHOT_FORMAT = "%Y%m%d_%H%M%S"
+PUBLISH_INTERVAL = 60
+
+
+@dataclass(order=True)
+class PageJob:
+    due: float                                  # time.monotonic() at which the page should be fetched
+    uuid: str = field(compare=False)
+    kind: str = field(compare=False)            # DETAIL or MENU
+    url: str = field(compare=False)
+    domain: str = field(compare=False)
+    facility_id: int = field(compare=False)
+
+
+def build_jobs(facility_ids: Dict[str, int]) -> List[PageJob]:
+    """One job per page of every registered facility that exists in the database, all due right away."""
+    now = time.monotonic()
+    jobs = []
+    for entry in get_registry().entries():
+        facility = entry.facility
+        if facility.id not in facility_ids:
+            continue
+        domain = entry.organization.organization_domain
+        if facility.detail_url:
+            jobs.append(PageJob(now, facility.id, DETAIL, facility.detail_url, domain, facility_ids[facility.id]))
+        if facility.menu_url and entry.facility_type == CANTEEN:
+            jobs.append(PageJob(now, facility.id, MENU, facility.menu_url, domain, facility_ids[facility.id]))
+    return jobs
+
+
+def save_snapshot(job: PageJob, html: str, fetched_at: datetime, interval: float) -> None:
+    """Write the page into the partial snapshot of the interval it was fetched in (a later fetch replaces it)."""
+    interval = max(1.0, interval)
+    start = datetime.fromtimestamp(fetched_at.timestamp() // interval * interval)
+    snapshot = FETCHED_DIR / start.strftime(SNAPSHOT_FORMAT)
+    (snapshot / job.uuid).mkdir(parents=True, exist_ok=True)
+    (snapshot / PARTIAL_MARKER).touch()
+    path = snapshot / job.uuid / f"{job.kind}.html"
+    tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+    tmp.write_bytes(html.encode("utf-8"))  # untranslated, so the file hashes like content_hash(html)
+    tmp.replace(path)
+
+
+class GenerationBatch:
+    """The staging generation the write workers share; publish_due() swaps in a new one and publishes the old."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.cond = threading.Condition()
+        self.generation_id: Optional[int] = None
+        self.opened = 0.0
+        # generation id → writes in progress
+        self.writing: Dict[int, int] = {}
+
+    @contextmanager
+    def write(self) -> Iterator[int]:
+        """Hold the current generation (opening one if needed) for the duration of one page write."""
+        with self.cond:
+            if self.generation_id is None:
+                with Session(engine) as db:
+                    self.generation_id = open_generation(db, f"daemon {datetime.now():%Y%m%d_%H%M%S}")
+                    db.commit()
+                self.opened = time.monotonic()
+            generation_id = self.generation_id
+            self.writing[generation_id] = self.writing.get(generation_id, 0) + 1
+        try:
+            yield generation_id
+        finally:
+            with self.cond:
+                self.writing[generation_id] -= 1
+                self.cond.notify_all()
+
+    def publish_due(self, force: bool = False) -> Optional[int]:
+        """
+        Publish the current generation once it is `interval` seconds old (right away with `force`), after the
+        writes into it finished. Returns its id if it was published, None if nothing was due or stored.
+        """
+        with self.cond:
+            generation_id = self.generation_id
+            if generation_id is None or (not force and time.monotonic() - self.opened < self.interval):
+                return None
+            # later writes open the next generation
+            self.generation_id = None
+            self.cond.wait_for(lambda: self.writing[generation_id] == 0)
+            del self.writing[generation_id]
+        with Session(engine) as db:
+            published = publish_or_discard(db, generation_id)
+            db.commit()
+        return generation_id if published else None
+
+
+class Pipeline:
+    def __init__(self,
+                 jobs: List[PageJob],
+                 schedule,
+                 processed: Dict[tuple[int, str], str],
+                 fetch_workers: int = 8,
+                 parse_workers: int = 2,
+                 write_workers: int = 2,
+                 queue_size: int = 32,
+                 once: bool = False,
+                 publish_interval: float = PUBLISH_INTERVAL):
+        self.schedule = schedule
+        self.processed = processed
+        self.once = once
+        self.workers = {"fetch": fetch_workers, "parse": parse_workers, "write": write_workers}
+
+        if not once:
+            now = datetime.now().astimezone()
+            for job in jobs:
+                job.due += schedule.initial_delay(job, now)
+        self.heap = list(jobs)
+        heapq.heapify(self.heap)
+        self.remaining = len(jobs)      # only used with once=True
+        self.cond = threading.Condition()
+        self.stop = threading.Event()
+        if once and not jobs:
+            self.stop.set()
+
+        self.fetch_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.parse_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.write_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+
+        # the adapters' max_concurrency still bounds the requests per organization
+        self.limits = {job.domain: threading.BoundedSemaphore(get_adapter(job.domain).max_concurrency)
+                       for job in jobs}
+        self.batch = GenerationBatch(publish_interval)
+        self.stats = {"fetched": 0, "unchanged": 0, "written": 0, "failed": 0, "published": 0}
+        self.stats_lock = threading.Lock()
+
+    # --- bookkeeping ---
+    def _count(self, key: str) -> None:
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def _finish(self, job: PageJob, digest: Optional[str]) -> None:
+        """A page left the pipeline (stored, unchanged or failed): schedule its next fetch."""
+        now = datetime.now().astimezone()
+        self.schedule.observe(job, digest, now)
+        with self.cond:
+            if self.once:
+                self.remaining -= 1
+                if self.remaining == 0:
+                    self.stop.set()
+            else:
+                job.due = time.monotonic() + self.schedule.interval(job, now)
+                heapq.heappush(self.heap, job)
+            self.cond.notify()
+
+    # --- stages ---
+    def _schedule_loop(self) -> None:
+        while not self.stop.is_set():
+            with self.cond:
+                while not self.stop.is_set() and (not self.heap or self.heap[0].due > time.monotonic()):
+                    timeout = self.heap[0].due - time.monotonic() if self.heap else None
+                    self.cond.wait(timeout=min(timeout, 60) if timeout is not None else 60)
+                if self.stop.is_set():
+                    return
+                job = heapq.heappop(self.heap)
+            # blocks while the fetch stage is saturated
+            self.fetch_queue.put(job)
+
+    def _fetch_loop(self) -> None:
+        while (job := self.fetch_queue.get()) is not None:
+            try:
+                with self.limits[job.domain]:
+                    html = get_adapter(job.domain).fetch_page(job.url)
+                if html is None:
+                    self._count("failed")
+                    self._finish(job, None)
+                    continue
+                save_snapshot(job, html, datetime.now(), self.batch.interval)
+                self._count("fetched")
+                self.parse_queue.put((job, html))
+            except Exception as e:
+                print(f"❌ fetch {job.kind} of {job.uuid} failed: {e!r}")
+                self._count("failed")
+                self._finish(job, None)
+
+    def _parse_loop(self) -> None:
+        while (item := self.parse_queue.get()) is not None:
+            job, html = item
+            digest = content_hash(html)
+            try:
+                if self.processed.get((job.facility_id, job.kind)) == digest:
+                    self._count("unchanged")
+                    self._finish(job, digest)
+                    continue
+                adapter = get_adapter(job.domain)
+                parser = adapter.parse_detail if job.kind == DETAIL else adapter.parse_menu
+                parsed = cached_parse(f"{job.domain}/{job.kind}", digest, lambda: html, parser)
+                self.write_queue.put((job, digest, parsed))
+            except Exception as e:
+                print(f"❌ parse {job.kind} of {job.uuid} failed: {e!r}")
+                self._count("failed")
+                # not observed: the page may have changed into something the parser cannot read yet
+                self._finish(job, None)
+
+    def _write_loop(self) -> None:
+        while (item := self.write_queue.get()) is not None:
+            job, digest, parsed = item
+            try:
+                with self.batch.write() as generation_id, Session(engine) as db:
+                    facility = db.get(Facility, job.facility_id)
+                    if job.kind == DETAIL:
+                        store_detail(db, facility, parsed["notices_html"], parsed["opening_times"]["by_day"], digest,
+                                     generation_id)
+                    else:
+                        store_menu(db, facility, parsed["weeks"], digest, generation_id)
+                    db.commit()
+                # a page is only ever in the pipeline once, so no other writer touches this key
+                self.processed[(job.facility_id, job.kind)] = digest
+                self._count("written")
+                self._finish(job, digest)
+            except Exception as e:
+                print(f"❌ write {job.kind} of {job.uuid} failed: {e!r}")
+                self._count("failed")
+                self._finish(job, digest)
+
+    def _publish(self, force: bool = False) -> None:
+        try:
+            if self.batch.publish_due(force) is not None:
+                self._count("published")
+        except Exception as e:
+            # the generation stays staging; processed hashes only count published generations, so the next
+            # start of the daemon stores its pages again
+            print(f"❌ publish failed: {e!r}")
+
+    def _flush_schedule(self, force: bool = False) -> None:
+        try:
+            self.schedule.flush(force)
+        except Exception as e:
+            print(f"❌ saving the schedule failed: {e!r}")
+
+    # --- lifecycle ---
+    def _start(self, target, count: int, name: str) -> List[threading.Thread]:
+        threads = [threading.Thread(target=target, name=f"{name}-{i}", daemon=True) for i in range(count)]
+        for t in threads:
+            t.start()
+        return threads
+
+    def _drain(self, stage: queue.Queue, threads: List[threading.Thread]) -> None:
+        for _ in threads:
+            stage.put(None)
+        for t in threads:
+            t.join()
+
+    def run(self) -> Dict[str, int]:
+        """Run until stop is set (by a signal, or once every page went through with once=True), then drain."""
+        scheduler = self._start(self._schedule_loop, 1, "schedule")
+        fetchers = self._start(self._fetch_loop, self.workers["fetch"], "fetch")
+        parsers = self._start(self._parse_loop, self.workers["parse"], "parse")
+        writers = self._start(self._write_loop, self.workers["write"], "write")
+
+        try:
+            while not self.stop.wait(timeout=1):
+                self._publish()
+                self._flush_schedule()
+        except KeyboardInterrupt:
+            self.stop.set()
+
+        with self.cond:
+            self.cond.notify_all()
+        scheduler[0].join()
+        # pages already in flight are finished before shutting down
+        self._drain(self.fetch_queue, fetchers)
+        self._drain(self.parse_queue, parsers)
+        self._drain(self.write_queue, writers)
+        self._publish(force=True)
+        self._flush_schedule(force=True)
+        return self.stats
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Fetch, parse and store pages continuously.")
+    parser.add_argument("--menu-interval", type=int, default=DEFAULT_INTERVALS[MENU],
+                        help="seconds between two fetches of a menu page")
+    parser.add_argument("--detail-interval", type=int, default=DEFAULT_INTERVALS[DETAIL],
+                        help="seconds between two fetches of a detail page")
+    parser.add_argument("--schedule", type=Path, default=None,
+                        help='JSON file with per-facility intervals: {"<uuid>": {"menu": 600}}')
+    parser.add_argument("--adaptive", action="store_true",
+                        help="adapt each page's interval to how often it changed (the intervals above are the start)")
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--write-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=32, help="capacity of each queue between two stages")
+    parser.add_argument("--once", action="store_true", help="run every page through the pipeline once, then exit")
+    parser.add_argument("--publish-interval", type=int, default=PUBLISH_INTERVAL,
+                        help="seconds between two publishes of the pages written meanwhile (default: %(default)s)")
+    args = parser.parse_args(argv)
+    # an unknown or uninstalled HTML_PARSER_BACKEND stops the job here, not at its first page
+    configured_backend()
+
+    intervals = {MENU: args.menu_interval, DETAIL: args.detail_interval}
+    schedule = AdaptiveSchedule(intervals) if args.adaptive else FixedSchedule.from_file(args.schedule, intervals)
+
+    with engine.connect() as lock:
+        if not lock.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": RUN_LOCK_KEY}):
+            print("A db_updater run, queue workers or another daemon are active; exiting.")
+            return
+        try:
+            with Session(engine) as db:
+                facility_ids = dict(db.exec(select(Facility.uuid, Facility.id)).all())
+                processed = load_processed_hashes(db)
+            jobs = build_jobs(facility_ids)
+
+            pipeline = Pipeline(jobs, schedule, processed,
+                                fetch_workers=args.fetch_workers,
+                                parse_workers=args.parse_workers,
+                                write_workers=args.write_workers,
+                                queue_size=args.queue_size,
+                                once=args.once,
+                                publish_interval=args.publish_interval)
+            signal.signal(signal.SIGTERM, lambda *_: pipeline.stop.set())
+            print(f"Pipeline started with {len(jobs)} pages.")
+            stats = pipeline.run()
+            print(f"Pipeline stopped: {stats}")
+        finally:
+            lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RUN_LOCK_KEY})
+
+
+if __name__ == "__main__":
+    main()
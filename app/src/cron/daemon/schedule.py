@@ -0,0 +1,51 @@
+"""
+Polling schedules for the pipeline daemon: how long to wait before fetching a page again.
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+# page kinds, named like the files of a snapshot
+DETAIL = "detail"
+MENU = "menu"
+
+DEFAULT_INTERVALS = {
+    MENU: 30 * 60,          # menus change daily, sometimes during the day
+    DETAIL: 6 * 60 * 60,    # notices and opening hours change a few times a year
+}
+
+
+@dataclass
+class FixedSchedule:
+    """
+    One interval per page kind, optionally overridden per facility:
+        {"<facility uuid>": {"menu": 600, "detail": 86400}, ...}
+    """
+    intervals: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_INTERVALS))
+    overrides: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    @classmethod
+    def from_file(cls, path: Optional[Path], intervals: Dict[str, int]) -> "FixedSchedule":
+        overrides = json.loads(path.read_text(encoding="utf-8")) if path else {}
+        return cls(intervals=intervals, overrides=overrides)
+
+    def initial_delay(self, job, now: datetime) -> float:
+        """Seconds until the first fetch of a page after the daemon started."""
+        return 0
+
+    def interval(self, job, now: datetime) -> float:
+        """Seconds until the page should be fetched again."""
+        return self.overrides.get(job.uuid, {}).get(job.kind, self.intervals[job.kind])
+
+    def observe(self, job, digest: Optional[str], now: datetime) -> None:
+        """
+        Called after every fetch with the content hash of the page (None if the fetch or parse failed);
+        a fixed schedule does not learn anything from it.
+        """
+
+    def flush(self, force: bool = False) -> int:
+        """Persist what observe learned (called about every second, and with force=True on shutdown); nothing here."""
+        return 0
@@ -1,7 +1,10 @@
+import hashlib
 import json
+import mmap
 import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 # --- Locate project root (dir containing "app") and prepend to sys.path ---
 _PROJECT_ROOT: Optional[Path] = None
@@ -17,20 +20,68 @@ sys.path.insert(0, str(BASE_DIR))
 
 FACILITIES_FILE = BASE_DIR / "assets" / "facilities.json"
 FETCHED_DIR = BASE_DIR / "assets" / "fetched"
+# marks a snapshot that only holds the pages fetched within it (written by the daemon); the other pages are taken
+# from the snapshots before it
+PARTIAL_MARKER = ".partial"
 
 # Import the Pydantic models
 from app.src.cron.db_updater.schema import (
     FacilitiesRoot,
     OrganizationBlock,
+    Facility as FacilitySchema,
 )
+from app.src.cron import run_report
+from app.src.cron.registry import get_registry
+
+EMPTY_HASH = hashlib.sha256(b"").hexdigest()
+
+
+def file_hash(path: Optional[Path]) -> str:
+    """sha256 of a file's bytes, read through mmap; missing and empty files hash like an empty page."""
+    if path is None or not path.exists() or path.stat().st_size == 0:
+        return EMPTY_HASH
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        return hashlib.sha256(m).hexdigest()
+
+
+def read_file(path: Optional[Path]) -> str:
+    """Decode a file straight from its mmap; missing and empty files read as ""."""
+    if path is None or not path.exists() or path.stat().st_size == 0:
+        return ""
+    with run_report.stage("read"), open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        run_report.count("bytes_read", len(m))
+        return str(m, "utf-8")
+
+
+@dataclass
+class FacilityInput:
+    """
+    One facility of a snapshot whose pages are only read when asked for.
+    Nothing is cached here: callers parse the HTML and let it go.
+    """
+    organization: OrganizationBlock
+    location: str
+    facility: FacilitySchema
+    detail_path: Optional[Path] = None
+    menu_path: Optional[Path] = None   # None if the facility has no menu_url
+
+    def detail_hash(self) -> str:
+        return file_hash(self.detail_path)
+
+    def menu_hash(self) -> str:
+        return file_hash(self.menu_path)
+
+    def read_detail(self) -> str:
+        return read_file(self.detail_path)
+
+    def read_menu(self) -> str:
+        return read_file(self.menu_path)
+
 
 class ContentLoader:
-    # --- Step 1: Load JSON & build Pydantic models (urls -> *_html handled in from_json_item) ---
-    def _load_models(self) -> FacilitiesRoot:
-        data = json.loads(FACILITIES_FILE.read_text(encoding="utf-8"))
-        # Build typed models from the raw JSON
-        orgs = [OrganizationBlock.from_json_item(x) for x in data]
-        return FacilitiesRoot(organizations=orgs)
+    # --- Step 1: Pydantic models of facilities.json (parsed once per process by the registry) ---
+    def load_models(self) -> FacilitiesRoot:
+        return get_registry().root
 
     # --- Step 2: Find latest snapshot directory (assets/fetched/{YYYYMMDD_HHMMSS}) ---
     def _get_latest_snapshot_dir(self) -> Optional[Path]:
@@ -39,6 +90,25 @@ class ContentLoader:
         dirs = [p for p in FETCHED_DIR.iterdir() if p.is_dir()]
         return sorted(dirs, key=lambda p: p.name)[-1] if dirs else None
 
+    def _older_snapshot_dirs(self, snapshot_dir: Path) -> list[Path]:
+        """Snapshots before a partial one, newest first; empty for complete snapshots."""
+        if not (snapshot_dir / PARTIAL_MARKER).exists():
+            return []
+        dirs = [p for p in snapshot_dir.parent.iterdir() if p.is_dir() and p.name < snapshot_dir.name]
+        return sorted(dirs, key=lambda p: p.name, reverse=True)
+
+    def _page_path(self, snapshot_dir: Path, older: list[Path], facility_id: str, name: str) -> Path:
+        """A page of the snapshot; missing pages of a partial snapshot come from the newest one before it."""
+        path = snapshot_dir / facility_id / name
+        if path.exists():
+            return path
+        for d in older:
+            if (d / facility_id / name).exists():
+                return d / facility_id / name
+            if not (d / PARTIAL_MARKER).exists():
+                break
+        return path
+
     # --- Step 3: Hydrate detail_html/menu_html from files in latest snapshot ---
     def _read_text_if_exists(self, path: Path) -> str:
         try:
@@ -50,10 +120,10 @@ class ContentLoader:
         if snapshot_dir is None:
             return
 
+        older = self._older_snapshot_dirs(snapshot_dir)
         for facility in root.all_facilities():
-            base = snapshot_dir / facility.id
-            detail = base / "detail.html"
-            menu = base / "menu.html"
+            detail = self._page_path(snapshot_dir, older, facility.id, "detail.html")
+            menu = self._page_path(snapshot_dir, older, facility.id, "menu.html")
 
             if detail.exists():
                 facility.detail_html = self._read_text_if_exists(detail)
@@ -63,9 +133,43 @@ class ContentLoader:
                 facility.menu_html = self._read_text_if_exists(menu)
 
     # --- Public API ---
+    def latest_snapshot(self) -> Optional[Path]:
+        return self._get_latest_snapshot_dir()
+
+    def iter_facilities(self,
+                        organizations: Optional[list[OrganizationBlock]] = None,
+                        snapshot_dir: Optional[Path] = None) -> Iterator[FacilityInput]:
+        """
+        Yield the facilities of a snapshot (default: the latest one) one by one, without reading any HTML.
+        Memory stays flat no matter how many facilities the snapshot holds.
+        """
+        if organizations is None:
+            organizations = self.load_models().organizations
+
+        latest = snapshot_dir or self._get_latest_snapshot_dir()
+        if latest:
+            print(f"Using latest snapshot: {latest}")
+        else:
+            print("No snapshot directory found; all pages will be empty.")
+
+        older = self._older_snapshot_dirs(latest) if latest else []
+        for org in organizations:
+            for loc in org.facilities:
+                for facility in (*loc.canteens, *loc.cafeterias):
+                    yield FacilityInput(
+                        organization=org,
+                        location=loc.location,
+                        facility=facility,
+                        detail_path=self._page_path(latest, older, facility.id, "detail.html") if latest else None,
+                        # Only facilities that originally had a menu_url get a menu
+                        menu_path=(self._page_path(latest, older, facility.id, "menu.html")
+                                   if latest and facility.menu_html is not None else None),
+                    )
+
     def load_content(self) -> FacilitiesRoot:
-        # 1) Load & build Pydantic models
-        root = self._load_models()
+        """Eagerly read every page of the latest snapshot into the models; prefer iter_facilities()."""
+        # 1) Load & build Pydantic models (a copy: the shared registry must not carry any HTML)
+        root = self.load_models().model_copy(deep=True)
         print("Loaded facilities.json into Pydantic models")
 
         # 2) Locate latest snapshot
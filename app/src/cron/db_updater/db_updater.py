@@ -1,53 +1,326 @@
 """
 This cronjob takes the fetched results from fetcher.py, parses them and stores them in the database.
+
+All organizations are processed concurrently, each with its own scraper adapter (see app/src/cron/adapters).
+
+Pages whose content hash equals the one processed last time are skipped entirely (no parse, no write).
+Use --force to parse and store everything again.
+
+Everything a run writes goes into a staging generation that is published in one step at its end
+(see app.src.storage.generations), so the API never shows half of a run.
+
+A regular run refuses to start while another one holds the run lock. With --queue, the facilities of the
+snapshot are shared through a Postgres work queue instead, so several updaters (on several nodes) can run at once;
+they share the run lock, so they never overlap with a regular run or the daemon.
+
+Every run records per-stage timings, its memory peak and the bytes and rows it read, wrote and skipped
+(see app.src.cron.run_report).
 """
 
-from app.src.config.database import get_session, Notice, OpeningHour, Meal
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.src.config.database import engine, Facility, Notice, OpeningHour, Meal, ProcessedInput
+from app.src.cron import run_report
+from app.src.cron.adapters.base import OrganizationAdapter, get_adapter
 from app.src.cron.db_updater.helpers import DynamicFacility
-from app.src.cron.db_updater.schema import OrganizationBlock, LocationFacilities, Facility as FacilitySchema
-from app.src.cron.db_updater.content_loader import ContentLoader
+from app.src.cron.db_updater.content_loader import ContentLoader, FacilityInput
+from app.src.cron.db_updater.html_backends import configured_backend
+from app.src.cron.db_updater.schema import OrganizationBlock
+from app.src.cron.db_updater.work_queue import LEASE_SECONDS, claim, complete, enqueue, queue_status, release, \
+    run_finished, run_generation, worker_name
+from app.src.cron.publish.publish import publish, publish_or_discard
+from app.src.storage.dishes import intern_meal_weeks
+from app.src.storage.generations import open_generation, visible
+from app.src.storage.history import record_version
+
+# pg advisory lock held exclusively by a regular run and the daemon, and shared by --queue workers
+RUN_LOCK_KEY = 0x6D656E7361
+
+
+def load_processed_hashes(db: Session, facility_id: int | None = None) -> dict[tuple[int, str], str]:
+    stmt = (select(ProcessedInput.facility_id, ProcessedInput.kind, ProcessedInput.content_hash)
+            .where(visible(ProcessedInput)))
+    if facility_id is not None:
+        stmt = stmt.where(ProcessedInput.facility_id == facility_id)
+    rows = db.exec(stmt).all()
+    return {(facility_id, kind): h for facility_id, kind, h in rows}
+
+
+def mark_processed(db: Session, facility_id: int, kind: str, digest: str, generation_id: int | None) -> None:
+    stmt = insert(ProcessedInput).values(facility_id=facility_id, kind=kind, content_hash=digest,
+                                         generation_id=generation_id)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProcessedInput.facility_id, ProcessedInput.kind],
+        set_={"content_hash": stmt.excluded.content_hash, "processed_at": stmt.excluded.processed_at,
+              "generation_id": stmt.excluded.generation_id},
+    )
+    db.execute(stmt)
+
+
+def store_detail(db: Session, facility: Facility, notices: Any, opening_hours: Any, digest: str,
+                 generation_id: int) -> int:
+    """
+    Add the contents of a changed detail page to the session, as part of a staging generation.
+    Returns the number of rows added; callers count them as inserted once they are committed.
+    """
+    # Store Notices (full document or delta, depending on HISTORY_STORAGE_MODE)
+    rows = [record_version(db, Notice, "notices", facility=facility, doc=notices, generation_id=generation_id)]
+
+    # Store Opening Hours
+    rows.append(record_version(db, OpeningHour, "opening_hours", facility=facility, doc=opening_hours,
+                               generation_id=generation_id))
+
+    # in delta mode, unchanged documents are not written
+    run_report.count("rows_skipped", sum(row is None for row in rows))
+    mark_processed(db, facility.id, "detail", digest, generation_id)
+    return sum(row is not None for row in rows)
+
+
+def store_menu(db: Session, facility: Facility, menu: list[dict], digest: str, generation_id: int) -> int:
+    """
+    Add the contents of a changed menu page to the session, as part of a staging generation.
+    Its day/week statistics are refreshed when the generation is published. Returns the number of rows added.
+    """
+    # Store Meals (entries reference interned dishes)
+    db.add(Meal(facility=facility, meals=intern_meal_weeks(db, menu), generation_id=generation_id))
+
+    mark_processed(db, facility.id, "menu", digest, generation_id)
+    return 1
+
+
+def store_facility(db: Session,
+                   facility_input: FacilityInput,
+                   adapter: OrganizationAdapter,
+                   processed: dict[tuple[int, str], str],
+                   force: bool,
+                   generation_id: int) -> tuple[int, int]:
+    """
+    Parse one facility and add its changes to the session (uncommitted).
+    Returns (skipped pages, added rows); the rows only count as inserted after the caller committed them.
+    """
+    skipped, added = 0, 0
+    dyn_facility: DynamicFacility = DynamicFacility(facility_input, adapter, db, refresh=force)
+    facility = dyn_facility.get_facility()
+
+    if processed.get((facility.id, "detail")) != dyn_facility.detail_hash:
+        notices, opening_hours = dyn_facility.get_notices(), dyn_facility.get_opening_hours()
+        with run_report.stage("db_write"):
+            added += store_detail(db, facility, notices, opening_hours, dyn_facility.detail_hash, generation_id)
+    else:
+        skipped += 1
+        # notices and opening hours
+        run_report.count("rows_skipped", 2)
+
+    if dyn_facility.is_canteen():
+        if processed.get((facility.id, "menu")) != dyn_facility.menu_hash:
+            menu = dyn_facility.get_menu()
+            with run_report.stage("db_write"):
+                added += store_menu(db, facility, menu, dyn_facility.menu_hash, generation_id)
+        else:
+            skipped += 1
+            run_report.count("rows_skipped")
+
+    run_report.count("pages_skipped", skipped)
+    return skipped, added
 
-def main():
+
+def process_facility(facility_input: FacilityInput,
+                     adapter: OrganizationAdapter,
+                     processed: dict[tuple[int, str], str],
+                     force: bool,
+                     generation_id: int) -> int:
+    """Parse and store one facility in its own session; returns the number of skipped (unchanged) pages."""
+    with Session(engine) as db:
+        skipped, added = store_facility(db, facility_input, adapter, processed, force, generation_id)
+        # data and processed hashes are committed together, so a crash never loses a page
+        with run_report.stage("db_commit"):
+            db.commit()
+        run_report.count("rows_inserted", added)
+    return skipped
+
+
+def process_organization(organization: OrganizationBlock,
+                         content_loader: ContentLoader,
+                         processed: dict[tuple[int, str], str],
+                         force: bool,
+                         generation_id: int) -> tuple[int, int]:
+    """
+    Process all facilities of one organization, at most `max_concurrency` of its adapter at a time.
+    Returns (skipped pages, failed facilities); a failing facility does not stop the others.
+    """
+    domain = organization.organization_domain
+    adapter = get_adapter(domain)
+    with ThreadPoolExecutor(max_workers=adapter.max_concurrency, thread_name_prefix=domain) as pool:
+        futures = {
+            facility_input.facility.id: pool.submit(process_facility, facility_input, adapter, processed, force,
+                                                    generation_id)
+            for facility_input in content_loader.iter_facilities([organization])
+        }
+
+    skipped, failed = 0, 0
+    for uuid, future in futures.items():
+        if future.exception() is not None:
+            failed += 1
+            run_report.count("facilities_failed")
+            print(f"❌ {domain}: facility {uuid} failed: {future.exception()}")
+        else:
+            skipped += future.result()
+    return skipped, failed
+
+
+def queue_worker(run: str,
+                 inputs: dict[int, FacilityInput],
+                 force: bool,
+                 lease_seconds: int,
+                 generation_id: int) -> tuple[int, int]:
+    """
+    Claim and process items of `run` until none are left; returns (done, failed).
+    The worker that finds the run finished publishes its generation.
+    """
+    worker = worker_name()
+    done, failed = 0, 0
+    with Session(engine) as db:
+        while (claimed := claim(db, run, worker, lease_seconds)) is not None:
+            item_id, facility_id = claimed
+            try:
+                facility_input = inputs[facility_id]
+                adapter = get_adapter(facility_input.organization.organization_domain)
+                # read the hashes now: another worker may have stored this facility since we started
+                processed = {} if force else load_processed_hashes(db, facility_id)
+                _, added = store_facility(db, facility_input, adapter, processed, force, generation_id)
+                if not complete(db, item_id, worker):
+                    # lease expired and another worker took over; its writes win
+                    db.rollback()
+                    continue
+                with run_report.stage("db_commit"):
+                    db.commit()
+                run_report.count("rows_inserted", added)
+                done += 1
+            except Exception as e:
+                db.rollback()
+                release(db, item_id, worker, repr(e))
+                failed += 1
+                run_report.count("facilities_failed")
+                print(f"❌ facility {facility_id} failed: {e!r}")
+
+        with run_report.stage("publish"):
+            if run_finished(db, run) and publish_or_discard(db, generation_id):
+                print(f"✅ Published generation {generation_id} of run {run}")
+            db.commit()
+    return done, failed
+
+
+def run_queue(force: bool, threads: int, lease_seconds: int) -> None:
+    """
+    Work-queue mode: enqueue the facilities of the latest snapshot (idempotent) and work through them.
+    Any number of these processes, on any number of nodes, can run against the same database.
+    """
     content_loader = ContentLoader()
-    swerk_wue: OrganizationBlock = content_loader.load_content().organizations[0]
-
-    locations: list[LocationFacilities] = swerk_wue.facilities
-
-    generator = get_session()  # create the generator
-    db = next(generator)  # get the Session it yields
-    try:
-        for location in locations:
-            all_facilities: list[FacilitySchema] = location.canteens + location.cafeterias
-
-            for facility in all_facilities:
-                dyn_facility: DynamicFacility = DynamicFacility(facility, db)
-                # Store Notices
-                new_notice: Notice = Notice(
-                    facility=dyn_facility.get_facility(),
-                    notices=dyn_facility.get_notices(),
-                )
-                db.add(new_notice)
-
-                # Store Opening Hours
-                new_opening_hours: OpeningHour = OpeningHour(
-                    facility=dyn_facility.get_facility(),
-                    opening_hours=dyn_facility.get_opening_hours()
-                )
-                db.add(new_opening_hours)
-
-                if dyn_facility.is_canteen():
-                    # Store Meals
-                    new_meals: Meal = Meal(
-                        facility=dyn_facility.get_facility(),
-                        meals=dyn_facility.get_menu()
-                    )
-                    db.add(new_meals)
-
-                db.commit()
-
-
-    finally:
-        generator.close()  # important: close so the contextmanager runs
+    with run_report.stage("load_json"):
+        content_loader.load_models()
+    snapshot = content_loader.latest_snapshot()
+    if snapshot is None:
+        print("No snapshot directory found; nothing to do.")
+        return
+    run_report.set_snapshot(snapshot.name)
+
+    with run_report.stage("enqueue"), Session(engine) as db:
+        facility_ids = dict(db.exec(select(Facility.uuid, Facility.id)).all())
+        inputs = {facility_ids[fi.facility.id]: fi
+                  for fi in content_loader.iter_facilities(snapshot_dir=snapshot)
+                  if fi.facility.id in facility_ids}
+        generation_id = run_generation(db, snapshot.name)
+        added = enqueue(db, snapshot.name, inputs.keys())
+    print(f"Run {snapshot.name}: {added} facilities enqueued, {threads} worker threads.")
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(queue_worker, snapshot.name, inputs, force, lease_seconds, generation_id)
+                   for _ in range(threads)]
+    done = sum(f.result()[0] for f in futures)
+    failed = sum(f.result()[1] for f in futures)
+
+    with Session(engine) as db:
+        status = queue_status(db, snapshot.name)
+    print(f"Run {snapshot.name}: this process stored {done} and failed {failed} facilities; queue: {status}")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Parse the latest snapshot and store it in the database.")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore recorded content hashes and memoized parse results; rebuild everything")
+    parser.add_argument("--queue", action="store_true",
+                        help="share the work with other updater processes through the work_item table")
+    parser.add_argument("--threads", type=int, default=4, help="worker threads per process in --queue mode")
+    parser.add_argument("--lease", type=int, default=LEASE_SECONDS,
+                        help="seconds before a claimed facility of a crashed worker is handed out again")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also trace the peak of Python allocations for the run report (slows down parsing)")
+    args = parser.parse_args(argv)
+    # an unknown or uninstalled HTML_PARSER_BACKEND stops the job here, not at its first page
+    configured_backend()
+
+    if args.queue:
+        with engine.connect() as lock:
+            # queue workers share the run lock; a regular run or the daemon holds it exclusively
+            if not lock.scalar(text("SELECT pg_try_advisory_lock_shared(:key)"), {"key": RUN_LOCK_KEY}):
+                print("A regular db_updater run or the daemon is in progress; exiting.")
+                return
+            try:
+                with run_report.track_run("db_updater", trace_memory=args.trace_memory):
+                    run_queue(args.force, args.threads, args.lease)
+            finally:
+                lock.execute(text("SELECT pg_advisory_unlock_shared(:key)"), {"key": RUN_LOCK_KEY})
+        return
+
+    content_loader = ContentLoader()
+
+    with engine.connect() as lock:
+        # a run overlapping the next schedule must not write the same pages twice
+        if not lock.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": RUN_LOCK_KEY}):
+            print("Another db_updater run, queue worker or the daemon is in progress; exiting. "
+                  "Use --queue to run several updaters at once.")
+            return
+
+        try:
+            with run_report.track_run("db_updater", trace_memory=args.trace_memory):
+                with run_report.stage("load_json"):
+                    organizations = content_loader.load_models().organizations
+                snapshot = content_loader.latest_snapshot()
+                run_report.set_snapshot(snapshot.name if snapshot else None)
+                with run_report.stage("load_hashes"), Session(engine) as db:
+                    processed = {} if args.force else load_processed_hashes(db)
+                    # everything this run writes stays invisible to the API until it is published below
+                    generation_id = open_generation(db, f"db_updater {snapshot.name if snapshot else '-'}")
+                    db.commit()
+
+                # Organizations run side by side, so adding a city does not slow down the existing ones
+                with ThreadPoolExecutor(max_workers=max(1, len(organizations))) as pool:
+                    futures = {org.organization_domain: pool.submit(process_organization, org, content_loader,
+                                                                    processed, args.force, generation_id)
+                               for org in organizations}
+
+                with run_report.stage("publish"), Session(engine) as db:
+                    published = publish_or_discard(db, generation_id)
+                    db.commit()
+
+                for domain, future in futures.items():
+                    if future.exception() is not None:
+                        print(f"❌ {domain}: {future.exception()}")
+                        run_report.count("organizations_failed")
+                        continue
+                    skipped, failed = future.result()
+                    print(f"{domain}: skipped {skipped} unchanged pages, {failed} facilities failed.")
+        finally:
+            # the connection goes back to the pool, which would keep a session-level lock alive
+            lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RUN_LOCK_KEY})
+
+    print(f"✅ Published generation {generation_id}" if published else "Nothing changed; no generation published.")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,9 @@
-from bs4 import BeautifulSoup
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 import re
 
+from app.src.cron.db_updater.html_backends import HtmlBackend, configured_backend, parse_page
+
 def _clean_text(s: str | None) -> str:
     if not s:
         return ""
@@ -14,46 +16,73 @@ _DAY_KEY   = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday"
 _ALIASES = {
     "mo": "montag", "di": "dienstag", "mi": "mittwoch", "do": "donnerstag",
     "fr": "freitag", "sa": "samstag", "so": "sonntag",
+    # first halves of compounds: "Sonn- und Feiertage", "Sams-, Sonn- und Feiertage"
+    "mon": "montag", "diens": "dienstag", "donners": "donnerstag", "frei": "freitag", "sams": "samstag",
+    "sonn": "sonntag",
 }
+# labels repeat across facilities and runs, so their parses are memoized (per process, bounded)
+_MEMO_SIZE = 1024
+
+# tokens of a day label, matched on its lower-cased text: whole words only, so "und"/"bis" inside a word do not
+# split it; any other word (Feiertage, …) ends a range, days after "außer" are left out
+_DAY_LABEL_RE = re.compile(r"""
+    (?P<day>\b(?:montag|dienstag|mittwoch|donnerstag|freitag|samstag|sonntag)s?\b
+        | \b(?:mo|di|mi|do|fr|sa|so)\b\.?
+        | \b(?:mon|diens|donners|frei|sams|sonn)-(?=\s*(?:,|und\b|/)))
+  | (?P<range>\bbis\b|[-–—])
+  | (?P<list>\bund\b|[,/;&+])
+  | (?P<exclude>\baußer\b|\bohne\b)
+  | (?P<word>\w+)
+""", re.VERBOSE)
 
 def _norm_day_token(tok: str) -> Optional[str]:
-    t = re.sub(r"[.\s]+", "", tok.lower())  # "Mo." -> "mo"
+    t = re.sub(r"[.\s-]+", "", tok.lower())  # "Mo." -> "mo"
+    if t not in _DAY_ORDER and t.endswith("s") and t[:-1] in _DAY_ORDER:
+        t = t[:-1]  # "montags"
     t = _ALIASES.get(t, t)
     return t if t in _DAY_ORDER else None
 
+@lru_cache(maxsize=_MEMO_SIZE)
+def _parse_day_label(text: str) -> tuple[int, ...]:
+    """Day indices of a normalized (cleaned, lower-cased) label; see _expand_days."""
+    idxs: List[int] = []
+    excluded: List[int] = []
+    target = idxs
+    prev: Optional[int] = None  # last day, if a range may start at it
+    in_range = False
+    for m in _DAY_LABEL_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == "day":
+            d = _DAY_ORDER.index(_norm_day_token(m.group()))
+            if in_range and prev is not None:
+                if prev <= d:
+                    target.extend(range(prev, d + 1))
+                else:  # wraparound (rare)
+                    target.extend(list(range(prev, 7)) + list(range(0, d + 1)))
+                prev = None
+            else:
+                target.append(d)
+                prev = d
+            in_range = False
+        elif kind == "range":
+            in_range = True
+        else:
+            prev, in_range = None, False
+            if kind == "exclude":
+                target = excluded
+    # de-dup preserve order
+    return tuple(i for i in dict.fromkeys(idxs) if i not in excluded)
+
 def _expand_days(label: str) -> List[int]:
     """
     Expand a label like:
-      - "Montag - Freitag" / "Montag – Freitag" / "Montag bis Freitag"
+      - "Montag - Freitag" / "Mo.–Fr." / "Montag bis Freitag" / "montags bis freitags"
       - "Montag, Mittwoch und Freitag"
-      - "Samstag/Sonntag"
+      - "Samstag/Sonntag" / "Sonn- und Feiertage"
+      - "Montag bis Freitag außer Mittwoch"
     into a list of day indices (0=Mon .. 6=Sun).
     """
-    text = _clean_text(label).lower()
-    parts = re.split(r"\s*(?:,|und|/|;)\s*", text)  # split lists first
-
-    idxs: List[int] = []
-    for part in parts:
-        rng = re.split(r"\s*(?:-|–|bis)\s*", part)  # handle ranges
-        if len(rng) == 1:
-            d = _norm_day_token(rng[0])
-            if d is not None:
-                idxs.append(_DAY_ORDER.index(d))
-        elif len(rng) == 2:
-            a, b = _norm_day_token(rng[0]), _norm_day_token(rng[1])
-            if a is None or b is None:
-                continue
-            ia, ib = _DAY_ORDER.index(a), _DAY_ORDER.index(b)
-            if ia <= ib:
-                idxs.extend(range(ia, ib + 1))
-            else:  # wraparound (rare)
-                idxs.extend(list(range(ia, 7)) + list(range(0, ib + 1)))
-    # de-dup preserve order
-    seen, out = set(), []
-    for i in idxs:
-        if i not in seen:
-            seen.add(i); out.append(i)
-    return out
+    return list(_parse_day_label(_clean_text(label).lower()))
 
 def _empty_by_day_slots() -> Dict[str, List[Dict[str, str]]]:
     return {k: [] for k in _DAY_KEY}
@@ -71,46 +100,57 @@ def _state_text_without_icon(state_el) -> Optional[str]:
 # --- time parsing helpers -----------------------------------------------------
 
 _TIME_RE = re.compile(r"(\d{1,2})[:.](\d{2})")  # 8:30 / 08.30
+# a span with times or full hours on both sides ("08:30 - 15:00 Uhr", "8.30–14 Uhr", "11 bis 14 Uhr"), or its end
+_SPAN_RE = re.compile(r"""
+    (?:(?P<open_h>\d{1,2})(?:[:.](?P<open_m>\d{2}))?\s*(?:uhr)?\s*)?
+    (?:-|–|—|\bbis\b)\s*
+    (?P<close_h>\d{1,2})(?:[:.](?P<close_m>\d{2}))?(?!\d)
+""", re.VERBOSE | re.IGNORECASE)
+# where the food part of a meta text starts ("Geöffnet bis 15 Uhr, Essen bis 14:00 Uhr"), and its end: a time
+# right after "bis" (14:45, 14.45 or "14 Uhr"), else the first explicit time after it
+_FOOD_WORD_RE = re.compile(r"essen|ausgabe|speise|küche", re.IGNORECASE)
+_FOOD_UNTIL_RE = re.compile(r"""
+    \bbis\s+(?P<h>\d{1,2})(?:[:.](?P<m>\d{2})|(?=\s*uhr))
+  | \bbis\b.*?(?P<later_h>\d{1,2})[:.](?P<later_m>\d{2})
+""", re.VERBOSE | re.IGNORECASE)
+
+def _hhmm(h: str, mnt: Optional[str]) -> Optional[str]:
+    hour, minute = int(h), int(mnt or 0)
+    if 0 <= hour <= 23 and 0 <= minute <= 59:
+        return f"{hour:02d}:{minute:02d}"
+    return None
 
 def _norm_hhmm(s: str) -> Optional[str]:
     """Return 'HH:MM' or None."""
     m = _TIME_RE.search(s)
     if not m:
         return None
-    h, mnt = int(m.group(1)), int(m.group(2))
-    if 0 <= h <= 23 and 0 <= mnt <= 59:
-        return f"{h:02d}:{mnt:02d}"
-    return None
+    return _hhmm(m.group(1), m.group(2))
 
+@lru_cache(maxsize=_MEMO_SIZE)
 def _parse_time_range(text: str) -> tuple[Optional[str], Optional[str]]:
-    """Parse '08:30 - 15:00 Uhr' into ('08:30','15:00')."""
-    # normalize separators, remove 'Uhr'
-    t = text.replace("Uhr", "")
-    # split on -, – or to dash variants
-    parts = re.split(r"\s*(?:-|–|—|bis)\s*", t)
-    if len(parts) >= 2:
-        o = _norm_hhmm(parts[0])
-        c = _norm_hhmm(parts[1])
-        return o, c
+    """Parse '08:30 - 15:00 Uhr' into ('08:30','15:00'); 'bis 14 Uhr' into (None, '14:00')."""
+    m = _SPAN_RE.search(text)
+    if m:
+        o = _hhmm(m.group("open_h"), m.group("open_m")) if m.group("open_h") else None
+        return o, _hhmm(m.group("close_h"), m.group("close_m"))
     # fallback: single time only (rare)
-    single = _norm_hhmm(t)
-    return (single, None)
+    return _norm_hhmm(text), None
 
+@lru_cache(maxsize=_MEMO_SIZE)
 def _extract_food_until(meta: str) -> Optional[str]:
     """
     Extract time from meta like 'Essensausgabe bis 14:45 Uhr' -> '14:45'.
-    Loosely searches for 'bis <time>'.
+    Loosely searches for 'bis <time>' (or 'bis <hour> Uhr'), from the food keyword on if there is one.
     """
     if not meta:
         return None
-    # remove 'Uhr' and look for a time after 'bis'
-    s = meta.replace("Uhr", "")
-    # Prefer a 'bis <time>' capture
-    m = re.search(r"\bbis\b.*?(\d{1,2}[:.]\d{2})", s, flags=re.IGNORECASE)
+    food = _FOOD_WORD_RE.search(meta)
+    m = _FOOD_UNTIL_RE.search(meta, food.start() if food else 0)
     if m:
-        return _norm_hhmm(m.group(1))
+        return _hhmm(m["h"], m["m"]) if m["h"] else _hhmm(m["later_h"], m["later_m"])
     # fallback: any time in string
-    return _norm_hhmm(s)
+    return _norm_hhmm(meta)
 
 # --- main parser --------------------------------------------------------------
 
@@ -118,18 +158,33 @@ def parse_html_detail(html: str) -> Dict[str, Any]:
     """
     Detail page → notices (HTML), opening times by ranges AND per-day compact fields:
       opening_times.by_day = { monday: {opens, closes, food_until}, ... }
+    Parsed with the backend selected by HTML_PARSER_BACKEND.
+    """
+    return parse_page(html, configured_backend(), parse_detail_element, _parse_detail_tree_element, _empty_detail)
+
+def _empty_detail() -> Dict[str, Any]:
+    return {
+        "notices_html": [],
+        "opening_times": {
+            "state": None,
+            "ranges": [],
+            "by_day": _empty_by_day_compact(),
+        },
+    }
+
+def parse_html_detail_bs4(html: str) -> Dict[str, Any]:
+    """The reference implementation on a BeautifulSoup tree; parse_html_detail_tree must return the same."""
+    return parse_page(html, None, parse_detail_element, _parse_detail_tree_element, _empty_detail)
+
+def parse_html_detail_tree(html: str, b: HtmlBackend) -> Dict[str, Any]:
+    """parse_html_detail_bs4 on a tree of backend `b` (see html_backends)."""
+    return parse_page(html, b, parse_detail_element, _parse_detail_tree_element, _empty_detail)
+
+def parse_detail_element(root) -> Dict[str, Any]:
+    """
+    Parse the .gastronomy element of a detail page's BeautifulSoup tree (e.g. the one the fetcher trimmed).
+    Icons are removed from the tree while parsing.
     """
-    soup = BeautifulSoup(html, "html.parser")
-    root = soup.select_one(".gastronomy")
-    if not root:
-        return {
-            "notices_html": [],
-            "opening_times": {
-                "state": None,
-                "ranges": [],
-                "by_day": _empty_by_day_compact(),
-            },
-        }
 
     # Notices (keep HTML)
     notices_html: List[str] = []
@@ -165,6 +220,49 @@ def parse_html_detail(html: str) -> Dict[str, Any]:
             times = extract_time_blocks(rng.select_one(".opening-time_set"))
             ranges.append({"days": days_label, "times": times})
 
+    return _detail_result(notices_html, state_text, ranges)
+
+def _parse_detail_tree_element(b: HtmlBackend, root) -> Dict[str, Any]:
+    """parse_detail_element on the .gastronomy element of a tree of backend `b`."""
+    notices_html: List[str] = []
+    for n in b.select(root, ".notice"):
+        for icon in b.select(n, ".icon-mi, .icon-mi-filled"):
+            b.remove(icon)
+        content_html = b.inner_html(n).strip()
+        if content_html:
+            notices_html.append(content_html)
+
+    opening = b.select_one(root, ".opening-times_detail")
+    state_text = None
+    if opening is not None:
+        state_el = b.select_one(opening, ".opening-time_state")
+        if state_el is not None:
+            for sp in b.select(state_el, ".icon-mi, .icon-mi-filled"):
+                b.remove(sp)
+            state_text = _clean_text(b.text(state_el))
+
+    ranges: List[Dict[str, Any]] = []
+    if opening is not None:
+        for rng in b.select(opening, ".opening-time_listing-all .opening-time_days"):
+            days_el = b.select_one(rng, ".opening-time-day-range")
+            days_label = _clean_text(b.text(days_el if days_el is not None else rng))
+            times: List[Dict[str, str]] = []
+            scope = b.select_one(rng, ".opening-time_set")
+            if scope is not None:
+                for ot in b.select(scope, ".opening-time"):
+                    t = b.select_one(ot, ".opening-times__time")
+                    m = b.select_one(ot, ".opening-times__meta")
+                    times.append({
+                        "time": _clean_text(b.text(t)) if t is not None else "",
+                        "meta": _clean_text(b.text(m)) if m is not None else "",
+                    })
+            ranges.append({"days": days_label, "times": times})
+
+    return _detail_result(notices_html, state_text, ranges)
+
+def _detail_result(notices_html: List[str], state_text: Optional[str],
+                   ranges: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The parse result from the extracted notices and opening time ranges."""
     # Expand to per-day *slots* first (so we can merge easily)
     day_slots = _empty_by_day_slots()
     for r in ranges:
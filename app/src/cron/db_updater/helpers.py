@@ -1,14 +1,20 @@
+from typing import Any, Callable, Dict
+
 from sqlmodel import Session, select
 
 from app.src.config.database import Facility as DBFacility
-from app.src.cron.db_updater.detail_parser import parse_html_detail
-from app.src.cron.db_updater.meal_parser import parse_html_menu
-from app.src.cron.db_updater.schema import Facility as FacilitySchema
+from app.src.cron import run_report
+from app.src.cron.adapters.base import OrganizationAdapter
+from app.src.cron.db_updater.content_loader import FacilityInput
+from app.src.cron.db_updater.parse_cache import cached_parse
 
 
 class DynamicFacility:
     """
     Gets you dynamic information, i.e. meals, opening hours and notices.
+    Pages are only read and parsed (by the organization's adapter) when their information is requested;
+    results are memoized by content hash and the HTML itself is never kept around. Parse results the fetcher
+    stored in the snapshot are used without reading the HTML at all.
     """
     # For future extensions: inspect the returned parsed objects.
     # There is way more information parsed than we store in the database currently.
@@ -18,23 +24,48 @@ class DynamicFacility:
     detail = None
     menu = None
 
-    def __init__(self, facility: FacilitySchema, db: Session):
-        self.db_facility: DBFacility = db.exec(select(DBFacility).where(DBFacility.uuid == facility.id)).first()
+    def __init__(self, facility_input: FacilityInput, adapter: OrganizationAdapter, db: Session,
+                 refresh: bool = False):
+        uuid = facility_input.facility.id
+        self.db_facility: DBFacility = db.exec(select(DBFacility).where(DBFacility.uuid == uuid)).first()
         if not self.db_facility:
-            raise ValueError(f"No facility found with uuid={facility.id}")
-        self.detail = parse_html_detail(facility.detail_html)
+            raise ValueError(f"No facility found with uuid={uuid}")
+        self.input = facility_input
+        self.adapter = adapter
+        self.refresh = refresh
+        with run_report.stage("hash"):
+            self.detail_hash = facility_input.detail_hash()
+            self.menu_hash = facility_input.menu_hash() if self.is_canteen() else None
+
+    @staticmethod
+    def _timed(kind: str, parser: Callable[[str], Dict[str, Any]]) -> Callable[[str], Dict[str, Any]]:
+        def parse(html: str) -> Dict[str, Any]:
+            with run_report.stage(f"parse_{kind}"):
+                return parser(html)
+        return parse
+
+    def _get_detail(self):
+        if self.detail is None:
+            self.detail = cached_parse(f"{self.adapter.domain}/detail", self.detail_hash, self.input.read_detail,
+                                       self._timed("detail", self.adapter.parse_detail), refresh=self.refresh,
+                                       html_path=self.input.detail_path)
+        return self.detail
 
-        if self.db_facility.facility_type.name == "Canteen":
-            self.menu = parse_html_menu(facility.menu_html)
+    def _get_parsed_menu(self):
+        if self.menu is None and self.is_canteen():
+            self.menu = cached_parse(f"{self.adapter.domain}/menu", self.menu_hash, self.input.read_menu,
+                                     self._timed("menu", self.adapter.parse_menu), refresh=self.refresh,
+                                     html_path=self.input.menu_path)
+        return self.menu
 
     def get_facility(self) -> DBFacility:
         return self.db_facility
 
     def get_notices(self):
-        return self.detail['notices_html']
+        return self._get_detail()['notices_html']
 
     def get_menu(self):
-        if not self.menu:
+        if not self._get_parsed_menu():
             raise TypeError("Cafeteria has no menu.")
 
         return self.menu['weeks']
@@ -43,4 +74,4 @@ class DynamicFacility:
         return self.db_facility.facility_type.name == "Canteen"
 
     def get_opening_hours(self):
-        return self.detail['opening_times']['by_day']
\ No newline at end of file
+        return self._get_detail()['opening_times']['by_day']
@@ -0,0 +1,359 @@
+"""
+Faster HTML tree backends for the page parsers.
+
+`parse_html_menu` and `parse_html_detail` build BeautifulSoup trees with "html.parser" and query them through
+soupsieve; that is the reference implementation. Their `*_tree` variants run the same extraction on a tree of one
+of these backends instead, selected with HTML_PARSER_BACKEND:
+
+  - "lxml": libxml2 trees, queried with XPath expressions compiled once per selector,
+  - "selectolax": Lexbor trees, queried with Lexbor's CSS engine.
+
+Both are optional dependencies (requirements-optional.txt), imported when a backend is first used; a backend
+whose package is missing fails with an error naming HTML_PARSER_BACKEND. A backend only answers the questions the
+parsers ask (select, attributes, text, inner HTML), with bs4's semantics: text excludes <script>, <style> and
+<template> contents, and inner HTML is serialized the way bs4 does it, so notices stay byte-identical.
+
+Selectors are a subset of CSS: compounds of a tag and/or classes, descendant and child combinators, lists, and a
+leading ":scope >". Like soupsieve, a combinator may match ancestors outside the node a selector is applied to.
+
+The parse benchmark (app.src.bench.parser_bench --backend ...) checks every backend against the bs4 output on the
+fixtures. Known differences remain on markup the pages do not use: broken nesting is repaired differently
+(html.parser keeps the tags as they are nested, libxml2 and Lexbor follow the HTML5 rules), libxml2 gives valueless
+attributes their name as value (disabled="disabled"), and Lexbor does not expose the contents of <template>.
+"""
+
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from bs4 import BeautifulSoup
+
+from app.src.config.env import html_parser_backend
+
+T = TypeVar("T")
+
+BACKENDS = ("bs4", "lxml", "selectolax")
+
+# the "minimal" output of bs4: void elements as <br/>, &, < and > escaped, raw script and style contents
+_VOID = frozenset((
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr", "image", "img", "input",
+    "isindex", "keygen", "link", "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+))
+_RAW_TEXT = frozenset(("script", "style"))
+# contents bs4 leaves out of get_text()
+_NO_TEXT = frozenset(("script", "style", "template"))
+# attributes bs4 splits into lists and joins with single spaces
+_MULTI_VALUED = frozenset(("class", "rel", "rev", "accept-charset", "headers", "accesskey", "dropzone"))
+
+_COMPOUND_RE = re.compile(r"^([a-zA-Z][a-zA-Z0-9]*)?((?:\.[-_a-zA-Z0-9]+)*)$")
+
+
+def _escape(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _start_tag(tag: str, attrs) -> str:
+    out = [f"<{tag}"]
+    for name, value in attrs:
+        value = value or ""
+        if name in _MULTI_VALUED:
+            value = " ".join(value.split())
+        value = _escape(value)
+        if '"' not in value:
+            out.append(f' {name}="{value}"')
+        elif "'" not in value:
+            out.append(f" {name}='{value}'")
+        else:
+            out.append(f' {name}="{value.replace(chr(34), "&quot;")}"')
+    out.append("/>" if tag in _VOID else ">")
+    return "".join(out)
+
+
+class Selector:
+    """
+    A parsed selector: a list of alternatives, each a list of (combinator, tag, classes) from left to right.
+    The first combinator of an alternative starting with ":scope >" is "scope".
+    """
+
+    def __init__(self, css: str):
+        self.css = css
+        self.alternatives: List[List[tuple[str, Optional[str], tuple[str, ...]]]] = []
+        # the CSS of each alternative
+        self.sources: List[str] = []
+        for alternative in css.split(","):
+            tokens = alternative.replace(">", " > ").split()
+            scoped = bool(tokens) and tokens[0] == ":scope"
+            if scoped:
+                tokens = tokens[1:]
+            steps, combinator = [], ">" if scoped else " "
+            for token in tokens:
+                if token == ">":
+                    combinator = ">"
+                    continue
+                m = _COMPOUND_RE.match(token)
+                if not m:
+                    raise ValueError(f"Unsupported selector {css!r}")
+                steps.append((combinator, m.group(1), tuple(c for c in m.group(2).split(".") if c)))
+                combinator = " "
+            if not steps:
+                raise ValueError(f"Unsupported selector {css!r}")
+            self.sources.append(alternative.strip())
+            self.alternatives.append([("scope" if scoped and i == 0 else c, t, k) for i, (c, t, k) in enumerate(steps)])
+
+
+class HtmlBackend(ABC):
+    name: str
+
+    @abstractmethod
+    def parse(self, html: str) -> Any:
+        """The document root."""
+
+    @abstractmethod
+    def select(self, node, css: str) -> List[Any]:
+        """The elements below `node` matching `css`."""
+
+    def select_one(self, node, css: str) -> Optional[Any]:
+        found = self.select(node, css)
+        return found[0] if found else None
+
+    @abstractmethod
+    def attr(self, node, name: str) -> Optional[str]:
+        """Like bs4's get(), with multi-valued attributes joined by spaces."""
+
+    def classes(self, node) -> List[str]:
+        return (self.attr(node, "class") or "").split()
+
+    def text(self, node) -> str:
+        """Like bs4's get_text()."""
+        return "".join(self.strings(node))
+
+    @abstractmethod
+    def strings(self, node) -> List[str]:
+        """Like bs4's strings, without the contents of _NO_TEXT elements."""
+
+    @abstractmethod
+    def remove(self, node) -> None:
+        """Remove `node` (and its contents) from the tree, like bs4's extract()."""
+
+    @abstractmethod
+    def inner_html(self, node) -> str:
+        """Like bs4's decode_contents()."""
+
+
+class LxmlBackend(HtmlBackend):
+    name = "lxml"
+
+    def __init__(self):
+        try:
+            import lxml.html
+            from lxml import etree
+        except ImportError as e:
+            raise ImportError("The lxml HTML parser backend needs the lxml package: pip install lxml") from e
+        self._html = lxml.html
+        self._etree = etree
+        self._strings = etree.XPath("descendant::text()[not(ancestor::script or ancestor::style or ancestor::template)]")
+        self._compiled: Dict[str, Any] = {}
+
+    def parse(self, html: str):
+        return self._html.document_fromstring(html) if html.strip() else self._html.document_fromstring("<html/>")
+
+    @staticmethod
+    def _predicate(tag: Optional[str], classes: tuple[str, ...]) -> str:
+        conditions = [f"contains(concat(' ', normalize-space(@class), ' '), ' {c} ')" for c in classes]
+        if tag:
+            conditions.insert(0, f"local-name() = '{tag.lower()}'")
+        return "".join(f"[{c}]" for c in conditions)
+
+    def _xpath(self, selector: Selector) -> str:
+        paths = []
+        for steps in selector.alternatives:
+            if steps[0][0] == "scope":
+                # a path of child/descendant steps starting at the node itself
+                path = "."
+                for combinator, tag, classes in steps:
+                    path += ("/*" if combinator in ("scope", ">") else "//*") + self._predicate(tag, classes)
+                paths.append(path)
+                continue
+            # descendants matching the last compound, whose parents/ancestors match the ones before
+            paths.append(".//*" + self._ancestry(steps))
+        return " | ".join(paths)
+
+    def _ancestry(self, steps) -> str:
+        """Predicates of the last compound of `steps` plus, nested, the conditions on its parents/ancestors."""
+        *left, (combinator, tag, classes) = steps
+        predicate = self._predicate(tag, classes)
+        if left:
+            axis = "parent" if combinator == ">" else "ancestor"
+            predicate += f"[{axis}::*{self._ancestry(left)}]"
+        return predicate
+
+    def select(self, node, css: str) -> List[Any]:
+        compiled = self._compiled.get(css)
+        if compiled is None:
+            compiled = self._compiled[css] = self._etree.XPath(self._xpath(Selector(css)))
+        return compiled(node)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+    def strings(self, node) -> List[str]:
+        return [str(s) for s in self._strings(node)]
+
+    def remove(self, node) -> None:
+        node.drop_tree()
+
+    def _serialize(self, node, out: List[str]) -> None:
+        if isinstance(node, self._etree._Comment):
+            out.append(f"<!--{node.text or ''}-->")
+        elif isinstance(node.tag, str):
+            out.append(_start_tag(node.tag, node.attrib.items()))
+            if node.tag not in _VOID:
+                self._serialize_contents(node, out)
+                out.append(f"</{node.tag}>")
+        if node.tail:
+            out.append(_escape(node.tail))
+
+    def _serialize_contents(self, node, out: List[str]) -> None:
+        if node.text:
+            out.append(node.text if node.tag in _RAW_TEXT else _escape(node.text))
+        for child in node:
+            self._serialize(child, out)
+
+    def inner_html(self, node) -> str:
+        out: List[str] = []
+        self._serialize_contents(node, out)
+        return "".join(out)
+
+
+class SelectolaxBackend(HtmlBackend):
+    name = "selectolax"
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+        except ImportError as e:
+            raise ImportError("The selectolax HTML parser backend needs the selectolax package: "
+                              "pip install selectolax") from e
+        self._parser = LexborHTMLParser
+        self._selectors: Dict[str, Selector] = {}
+
+    def parse(self, html: str):
+        return self._parser(html).root
+
+    def select(self, node, css: str) -> List[Any]:
+        selector = self._selectors.get(css)
+        if selector is None:
+            selector = self._selectors[css] = Selector(css)
+        if all(steps[0][0] != "scope" for steps in selector.alternatives):
+            return node.css(css)
+        # matches of a list mixing scoped and unscoped alternatives come per alternative, not in document order
+        found, seen = [], set()
+        for source, steps in zip(selector.sources, selector.alternatives):
+            if steps[0][0] != "scope":
+                current = node.css(source)
+                found.extend(n for n in current if n not in seen and not seen.add(n))
+                continue
+            # Lexbor has no :scope: walk the steps below the node
+            current = [node]
+            for combinator, tag, classes in steps:
+                compound = (tag or "") + "".join(f".{c}" for c in classes)
+                if combinator in ("scope", ">"):
+                    # css_matches() would also accept children with a matching descendant
+                    current = [c for n in current for c in n.iter() if self._matches(c, tag, classes)]
+                else:
+                    current = [c for n in current for c in n.css(compound)]
+            found.extend(n for n in current if n not in seen and not seen.add(n))
+        return found
+
+    @staticmethod
+    def _matches(node, tag: Optional[str], classes: tuple[str, ...]) -> bool:
+        if tag is not None and node.tag != tag.lower():
+            return False
+        return set(classes) <= set((node.attributes.get("class") or "").split())
+
+    def attr(self, node, name: str) -> Optional[str]:
+        value = node.attributes.get(name)
+        # valueless attributes are None here, "" in bs4
+        return "" if value is None and name in node.attributes else value
+
+    def strings(self, node) -> List[str]:
+        if node.css_first("script, style, template") is None:
+            return [n.text_content for n in node.traverse(include_text=True) if n.is_text_node]
+        out: List[str] = []
+        self._collect_strings(node, out)
+        return out
+
+    def _collect_strings(self, node, out: List[str]) -> None:
+        for child in node.iter(include_text=True):
+            if child.is_text_node:
+                out.append(child.text_content)
+            elif child.is_element_node and child.tag not in _NO_TEXT:
+                self._collect_strings(child, out)
+
+    def remove(self, node) -> None:
+        node.decompose()
+
+    def _serialize(self, node, out: List[str]) -> None:
+        if node.is_text_node:
+            parent = node.parent
+            text = node.text_content or ""
+            out.append(text if parent is not None and parent.tag in _RAW_TEXT else _escape(text))
+        elif node.is_comment_node:
+            # comment_content is stripped, the markup is not
+            out.append(node.html)
+        elif node.is_element_node:
+            out.append(_start_tag(node.tag, node.attributes.items()))
+            if node.tag not in _VOID:
+                for child in node.iter(include_text=True):
+                    self._serialize(child, out)
+                out.append(f"</{node.tag}>")
+
+    def inner_html(self, node) -> str:
+        out: List[str] = []
+        for child in node.iter(include_text=True):
+            self._serialize(child, out)
+        return "".join(out)
+
+
+_FACTORIES: Dict[str, Callable[[], HtmlBackend]] = {"lxml": LxmlBackend, "selectolax": SelectolaxBackend}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name: str) -> HtmlBackend:
+    """The tree backend `name` ("lxml" or "selectolax"); "bs4" has none, it is the parsers' own code."""
+    try:
+        factory = _FACTORIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown HTML parser backend {name!r}; choose one of {', '.join(BACKENDS)}") from None
+    return factory()
+
+
+def configured_backend() -> Optional[HtmlBackend]:
+    """
+    The backend selected with HTML_PARSER_BACKEND, or None for the bs4 reference parsers. Jobs call it when they
+    start, so an unknown or uninstalled backend stops them before any page is parsed.
+    """
+    if html_parser_backend == "bs4":
+        return None
+    try:
+        return get_backend(html_parser_backend)
+    except (ImportError, ValueError) as e:
+        raise RuntimeError(f"HTML_PARSER_BACKEND={html_parser_backend}: {e}") from e
+
+
+def parse_page(html: str,
+               backend: Optional[HtmlBackend],
+               parse_bs4: Callable[[Any], T],
+               parse_tree: Callable[[HtmlBackend, Any], T],
+               empty: Callable[[], T],
+               root: str = ".gastronomy") -> T:
+    """
+    Parse the `root` element of a page: on a BeautifulSoup tree with `parse_bs4(element)` if `backend` is None,
+    else on a tree of `backend` with `parse_tree(backend, element)`. Pages without it parse as `empty()`.
+    """
+    if backend is None:
+        element = BeautifulSoup(html, "html.parser").select_one(root)
+        return parse_bs4(element) if element is not None else empty()
+    element = backend.select_one(backend.parse(html), root)
+    return parse_tree(backend, element) if element is not None else empty()
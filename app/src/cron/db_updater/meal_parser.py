@@ -1,7 +1,8 @@
 import dateparser
-from bs4 import BeautifulSoup
 from typing import Any, Dict, List, Optional
 
+from app.src.cron.db_updater.html_backends import HtmlBackend, configured_backend, parse_page
+
 def _clean_text(s: str | None) -> str:
     if not s:
         return ""
@@ -94,11 +95,27 @@ def _parse_date_label(label: Optional[str]) -> Optional[str]:
     return dt.date().isoformat()
 
 
+def _empty_menu() -> Dict[str, Any]:
+    return {"notices": [], "opening_times": {}, "weeks": [], "trimmings": [], "legend": {}}
+
+
 def parse_html_menu(html: str) -> Dict[str, Any]:
-    soup = BeautifulSoup(html, "html.parser")
-    root = soup.select_one(".gastronomy")
-    if not root:
-        return {"notices": [], "opening_times": {}, "weeks": [], "trimmings": [], "legend": {}}
+    """Parse a menu page with the backend selected by HTML_PARSER_BACKEND."""
+    return parse_page(html, configured_backend(), parse_menu_element, _parse_menu_tree_element, _empty_menu)
+
+
+def parse_html_menu_bs4(html: str) -> Dict[str, Any]:
+    """The reference implementation on a BeautifulSoup tree; parse_html_menu_tree must return the same."""
+    return parse_page(html, None, parse_menu_element, _parse_menu_tree_element, _empty_menu)
+
+
+def parse_html_menu_tree(html: str, b: HtmlBackend) -> Dict[str, Any]:
+    """parse_html_menu_bs4 on a tree of backend `b` (see html_backends)."""
+    return parse_page(html, b, parse_menu_element, _parse_menu_tree_element, _empty_menu)
+
+
+def parse_menu_element(root) -> Dict[str, Any]:
+    """Parse the .gastronomy element of a menu page's BeautifulSoup tree (e.g. the one the fetcher trimmed)."""
 
     # --- Notices (collect all) ---
     # NOTE: per request, this parsing is disabled. Keeping code commented for reference.
@@ -253,3 +270,125 @@ def parse_html_menu(html: str) -> Dict[str, Any]:
         "trimmings": trimmings,
         "legend": legend_map,
     }
+
+
+# the closed-day notices _day_has_no_meals_notice looks for
+_NO_MEALS_TRIGGERS = (
+    "aktuell keine daten",
+    "keine daten vorhanden",
+    "heute geschlossen",
+    "geschlossen",
+    "keine ausgabe",
+    "kein angebot",
+)
+
+
+def _parse_price_attrs_tree(b: HtmlBackend, el) -> Dict[str, Optional[float]]:
+    if el is None:
+        return {"student": None, "servant": None, "guest": None}
+    return {
+        "student": _conv_price(b.attr(el, "data-price-student")),
+        "servant": _conv_price(b.attr(el, "data-price-servant")),
+        "guest": _conv_price(b.attr(el, "data-price-guest")),
+    }
+
+
+def _food_tags_tree(b: HtmlBackend, icon_container) -> List[str]:
+    tags: List[str] = []
+    if icon_container is None:
+        return tags
+    for sp in b.select(icon_container, "span.food-icon"):
+        t = _clean_text(b.attr(sp, "data-type-title") or "")
+        if t:
+            tags.append(t)
+            continue
+        classes = [c for c in b.classes(sp) if c != "food-icon"]
+        if classes:
+            tags.append(classes[-1])
+    return tags
+
+
+def _parse_menu_tree_element(b: HtmlBackend, root) -> Dict[str, Any]:
+    """parse_menu_element on the .gastronomy element of a tree of backend `b`."""
+    weeks: List[Dict[str, Any]] = []
+    for w in b.select(root, ".week-menu"):
+        days: List[Dict[str, Any]] = []
+        for day in b.select(w, ":scope > .day-menu"):
+            date_h = b.select_one(day, "h3")
+            date_label = _clean_text(b.text(date_h)) if date_h is not None else None
+
+            entries: List[Dict[str, Any]] = []
+            for art in b.select(day, ".day-menu-entries > article"):
+                main = b.select_one(art, ".menu-entry_main-row")
+                if main is None:
+                    continue
+                title_el = b.select_one(main, "h5")
+
+                add_row = b.select_one(art, ".menu-entry_additives-row")
+                climate = add_row is not None and b.select_one(add_row, ".climate-plate") is not None
+                add_block = b.select_one(add_row, ".additives .additive-list") if add_row is not None else None
+                co2, allergens = None, []
+                if add_block is not None:
+                    co2_el = b.select_one(add_block, ".co2-per-serving span")
+                    raw = _clean_text(b.text(co2_el)) if co2_el is not None else ""
+                    if co2_el is not None and not raw.lower().startswith("kein"):
+                        digits = "".join(ch for ch in raw if ch.isdigit())
+                        co2 = int(digits) if digits.isdigit() else None
+                    allergens = [t for t in (_clean_text(b.text(li)) for li in b.select(add_block, "ul li")) if t]
+
+                entries.append({
+                    "id": b.attr(art, "data-dispo"),
+                    "title": _clean_text(b.text(title_el)) if title_el is not None else "",
+                    "tags": _food_tags_tree(b, b.select_one(main, ".food-type")),
+                    "prices": _parse_price_attrs_tree(b, b.select_one(main, ".price")),
+                    "co2_g": co2,
+                    "allergens": allergens,
+                    "climate_plate": climate,
+                })
+
+            is_closed = False
+            if not entries:
+                msg_el = b.select_one(day, ".day-menu-entries .notice")
+                if msg_el is not None:
+                    txt = " ".join(s.strip() for s in b.strings(msg_el) if s.strip()).casefold()
+                    is_closed = any(t in txt for t in _NO_MEALS_TRIGGERS)
+
+            days.append({
+                "day_id": b.attr(day, "data-day"),
+                "date_label": date_label,
+                "date_iso": _parse_date_label(date_label),
+                "entries": entries,
+                "is_closed": is_closed,
+            })
+
+        weeks.append({"week": b.attr(w, "data-week"), "days": days})
+
+    trimmings: List[Dict[str, Any]] = []
+    for t in b.select(root, ".trimming-entries .menu-entry_main-row"):
+        name_el = b.select_one(t, "h5.name")
+        price_el = b.select_one(t, ".price")
+        if name_el is not None and price_el is not None:
+            trimmings.append({
+                "name": _clean_text(b.text(name_el)),
+                "prices": _parse_price_attrs_tree(b, price_el),
+            })
+
+    legend_map: Dict[str, str] = {}
+    legend = b.select_one(root, ".legend.food-type")
+    if legend is not None:
+        for li in b.select(legend, "li"):
+            sp = b.select_one(li, "span.food-icon")
+            label = _clean_text(b.text(li))
+            if sp is None or not label:
+                continue
+            cls = [c for c in b.classes(sp) if c != "food-icon"]
+            if cls:
+                legend_map[cls[-1]] = label
+
+    return {
+        "notices": [],
+        "opening_times": {"state": None, "today": [], "ranges": []},
+        "weeks": weeks,
+        "trimmings": trimmings,
+        "legend": legend_map,
+    }
@@ -0,0 +1,93 @@
+"""
+On-disk memo of parse results, keyed by the sha256 of the parsed HTML.
+
+A restarted or repeated run finds the result of every page it already parsed in
+assets/cache/parsed/<kind>/<hash>.json instead of running BeautifulSoup/dateparser again.
+Bump PARSER_VERSION whenever a parser changes its output, so stale entries are not reused.
+
+The fetcher can store parse results in the snapshot as well (detail.json / menu.json next to the HTML, see
+write_snapshot_parse); they are used like memo entries as long as version and content hash match.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from app.src.cron import run_report
+
+BASE_DIR = Path(__file__).resolve().parents[4]
+CACHE_DIR = BASE_DIR / "assets" / "cache" / "parsed"
+PARSER_VERSION = 3
+
+
+def content_hash(html: str) -> str:
+    """sha256 of the page as stored (UTF-8, newlines untranslated); equals content_loader.file_hash of the file."""
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def _memo_path(kind: str, digest: str) -> Path:
+    return CACHE_DIR / f"v{PARSER_VERSION}" / kind / f"{digest}.json"
+
+
+def snapshot_parse_path(html_path: Path) -> Path:
+    """Where the fetcher stores the parse result of a snapshot page (detail.html → detail.json)."""
+    return html_path.with_suffix(".json")
+
+
+def write_snapshot_parse(html_path: Path, digest: str, result: Dict[str, Any]) -> None:
+    """Store the parse result of a saved page; `digest` is the hash of the bytes written (see fetcher.save_html)."""
+    path = snapshot_parse_path(html_path)
+    doc = {"parser_version": PARSER_VERSION, "content_hash": digest, "result": result}
+    path.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+
+
+def read_snapshot_parse(html_path: Optional[Path], digest: str) -> Optional[Dict[str, Any]]:
+    """The parse result the fetcher stored for a page, if it belongs to this content and parser version."""
+    if html_path is None:
+        return None
+    try:
+        doc = json.loads(snapshot_parse_path(html_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if doc.get("parser_version") != PARSER_VERSION or doc.get("content_hash") != digest:
+        return None
+    return doc.get("result")
+
+
+def cached_parse(kind: str,
+                 digest: str,
+                 load_html: Callable[[], str],
+                 parser: Callable[[str], Dict[str, Any]],
+                 refresh: bool = False,
+                 html_path: Optional[Path] = None,
+                 ) -> Dict[str, Any]:
+    """
+    Return parser(load_html()) for the page with the given content hash, reusing a memoized result unless
+    `refresh` is set. The HTML is only loaded on a memo miss.
+    With `html_path`, a parse result the fetcher stored next to the page is used first.
+    """
+    if not refresh:
+        result = read_snapshot_parse(html_path, digest)
+        if result is not None:
+            run_report.count("snapshot_parse_hits")
+            return result
+
+    path = _memo_path(kind, digest)
+    if not refresh and path.exists():
+        try:
+            result = json.loads(path.read_text(encoding="utf-8"))
+            run_report.count("parse_cache_hits")
+            return result
+        except (OSError, ValueError):
+            pass  # corrupt entry → parse again and overwrite it
+
+    result = parser(load_html())
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+    return result
@@ -0,0 +1,131 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+from app.src.config.database import Meal, MealRollup
+from app.src.cron.meal_export.columns import MealColumns, PRICE_CLASSES
+from app.src.routes.meal.queries import fetch_latest_meals_for
+from app.src.storage.dishes import dish_ids_in, expand_meal_weeks, fetch_dishes
+
+PERIODS = ("day", "week")
+_METRICS = tuple(f"price_{c}" for c in PRICE_CLASSES) + ("co2_g",)
+_METRIC_PREFIX = {f"price_{c}": c for c in PRICE_CLASSES} | {"co2_g": "co2_g"}
+
+
+def _period_start(dates: np.ndarray, period: str) -> np.ndarray:
+    if period == "day":
+        return dates
+    # 1970-01-01 was a thursday → (days + 3) % 7 is the weekday with monday = 0
+    days = dates.astype(np.int64)
+    return (days - (days + 3) % 7).astype("datetime64[D]")
+
+
+def _none_if_nan(v: float) -> float | None:
+    return None if np.isnan(v) else float(v)
+
+
+def compute_rollups(facility_id: int,
+                    weeks: Iterable[Dict[str, Any]],
+                    as_of: datetime | None = None) -> List[Dict[str, Any]]:
+    """
+    Aggregate one meal document into rollup rows for every day and week it covers.
+    All statistics are computed on NumPy arrays, grouped by period in one pass per metric.
+    `as_of` is when the menu was current and becomes the rows' updated_at (default: now).
+    """
+    now = as_of or datetime.now(timezone.utc)
+    columns = MealColumns()
+    columns.append(facility_id, now, weeks)
+    arrays = columns.to_arrays(tag_vocabulary=())
+
+    dated = ~np.isnat(arrays["date"])
+    if not dated.any():
+        return []
+    dates = arrays["date"][dated]
+    climate = arrays["climate_plate"][dated]
+    values = {m: arrays[m][dated].astype(np.float64) for m in _METRICS}
+
+    rows: List[Dict[str, Any]] = []
+    for period in PERIODS:
+        keys, inverse = np.unique(_period_start(dates, period), return_inverse=True)
+        k = len(keys)
+        count = np.bincount(inverse, minlength=k)
+        climate_share = np.bincount(inverse, weights=climate, minlength=k) / count
+
+        stats: Dict[str, np.ndarray] = {}
+        for metric, v in values.items():
+            valid = ~np.isnan(v)
+            n = np.bincount(inverse[valid], minlength=k)
+            total = np.bincount(inverse[valid], weights=v[valid], minlength=k)
+            mins = np.full(k, np.inf)
+            maxs = np.full(k, -np.inf)
+            np.minimum.at(mins, inverse[valid], v[valid])
+            np.maximum.at(maxs, inverse[valid], v[valid])
+
+            empty = n == 0
+            prefix = _METRIC_PREFIX[metric]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                stats[f"{prefix}_mean"] = np.where(empty, np.nan, total / n)
+            stats[f"{prefix}_min"] = np.where(empty, np.nan, mins)
+            stats[f"{prefix}_max"] = np.where(empty, np.nan, maxs)
+
+        for i, key in enumerate(keys):
+            row = {
+                "facility_id": facility_id,
+                "period": period,
+                "period_start": key.astype(object),  # → datetime.date
+                "count": int(count[i]),
+                "climate_plate_share": float(climate_share[i]),
+                "updated_at": now,
+            }
+            row.update({name: _none_if_nan(col[i]) for name, col in stats.items()})
+            rows.append(row)
+    return rows
+
+
+def upsert_rollups(db: Session, rows: List[Dict[str, Any]], keep_newer: bool = False) -> None:
+    """
+    Insert or replace rollup rows. The latest menu is authoritative for the days and weeks it lists,
+    so periods covered by this run are overwritten and all others are left untouched.
+    With `keep_newer`, rows whose updated_at is later than the new one's are kept (for older menus, e.g. backfills).
+    """
+    if not rows:
+        return
+    stmt = insert(MealRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MealRollup.facility_id, MealRollup.period, MealRollup.period_start],
+        set_={c: stmt.excluded[c] for c in rows[0] if c not in ("facility_id", "period", "period_start")},
+        where=(MealRollup.updated_at <= stmt.excluded.updated_at) if keep_newer else None,
+    )
+    db.execute(stmt)
+
+
+def delete_rollups_of(db: Session, meals: Iterable[Meal], batch_size: int = 1000) -> None:
+    """
+    Delete the rollups of every day and week the given meal rows cover, e.g. before a rollback recomputes them:
+    periods that no visible menu lists anymore would otherwise keep the numbers of the rolled back data.
+    """
+    meals = list(meals)
+    dishes = fetch_dishes(db, set().union(*(dish_ids_in(meal.meals) for meal in meals)))
+    keys = {(row["facility_id"], row["period"], row["period_start"])
+            for meal in meals
+            for row in compute_rollups(meal.facility_id, expand_meal_weeks(meal.meals, dishes))}
+    keys = list(keys)
+    for i in range(0, len(keys), batch_size):
+        db.execute(delete(MealRollup).where(
+            tuple_(MealRollup.facility_id, MealRollup.period, MealRollup.period_start).in_(keys[i:i + batch_size])
+        ))
+
+
+def refresh_rollups(db: Session, facility_ids: Iterable[int], batch_size: int = 1000) -> None:
+    """Recompute the rollups covered by the latest visible menu of each facility, e.g. after a publish or rollback."""
+    latest = fetch_latest_meals_for(db, facility_ids)
+    dishes = fetch_dishes(db, set().union(*(dish_ids_in(meal.meals) for meal in latest.values())))
+    rows = []
+    for facility_id, meal in latest.items():
+        rows.extend(compute_rollups(facility_id, expand_meal_weeks(meal.meals, dishes)))
+    for i in range(0, len(rows), batch_size):
+        upsert_rollups(db, rows[i:i + batch_size])
@@ -1,5 +1,5 @@
 from typing import List, Optional, Any, Dict
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from pydantic import ConfigDict
 
@@ -9,15 +9,17 @@ class Facility(BaseModel):
     facility_name: str
     address: Optional[str] = None
     description: Optional[str] = None
+    detail_url: Optional[str] = None
+    menu_url: Optional[str] = None
 
-    # transformed fields (replacing URLs)
-    detail_html: str = ""               # replaces detail_url
-    menu_html: Optional[str] = None     # replaces menu_url; may remain None if no menu existed
+    # transformed fields (content behind the URLs)
+    detail_html: str = ""               # content of detail_url
+    menu_html: Optional[str] = None     # content of menu_url; may remain None if no menu existed
 
     @classmethod
     def from_json_item(cls, item: Dict[str, Any]) -> "Facility":
-        """Create a Facility from a raw JSON facility item, replacing *_url with *_html."""
-        # keep original keys, drop urls, initialize html fields
+        """Create a Facility from a raw JSON facility item, adding *_html fields for the *_url pages."""
+        # keep original keys, initialize html fields
         detail_html = ""
         menu_html: Optional[str] = None
 
@@ -30,6 +32,8 @@ class Facility(BaseModel):
             facility_name=item["facility_name"],
             address=item.get("address"),
             description=item.get("description"),
+            detail_url=item.get("detail_url"),
+            menu_url=item.get("menu_url"),
             detail_html=detail_html,
             menu_html=menu_html,
         )
@@ -67,18 +71,17 @@ class OrganizationBlock(BaseModel):
 class FacilitiesRoot(BaseModel):
     organizations: List[OrganizationBlock]
 
+    _by_id: Optional[Dict[str, Facility]] = PrivateAttr(default=None)
+
     @classmethod
     def from_json(cls, data: List[Dict[str, Any]]) -> "FacilitiesRoot":
         return cls(organizations=[OrganizationBlock.from_json_item(x) for x in data])
 
     # handy lookups
     def by_id(self, uuid: str) -> Optional[Facility]:
-        for org in self.organizations:
-            for loc in org.facilities:
-                for f in (*loc.canteens, *loc.cafeterias):
-                    if f.id == uuid:
-                        return f
-        return None
+        if self._by_id is None:
+            self._by_id = {f.id: f for f in self.all_facilities()}
+        return self._by_id.get(uuid)
 
     def all_facilities(self) -> List[Facility]:
         out: List[Facility] = []
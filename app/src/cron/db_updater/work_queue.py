@@ -0,0 +1,141 @@
+"""
+Postgres-backed work queue for running several db_updater workers side by side.
+
+Every facility of a snapshot becomes one WorkItem. A worker claims the oldest pending item (or one whose lease
+expired because its worker crashed) with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never wait
+for or claim the same item; an item whose lease expires on its last attempt is marked failed instead. An item is
+completed in the same transaction as the facility's data, and only if the worker still holds its lease, so a
+facility of a run is written exactly once.
+
+All workers of a run write into the same generation, which the worker finishing the last item publishes.
+"""
+
+import os
+import socket
+import threading
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, case, func, or_, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.src.config.database import Generation, WorkItem
+from app.src.storage.generations import STAGING, open_generation
+
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def enqueue(db: Session, run: str, facility_ids: Iterable[int]) -> int:
+    """Add the facilities of a run to the queue; items that already exist are left alone. Returns the number added."""
+    rows = [{"run": run, "facility_id": facility_id} for facility_id in facility_ids]
+    if not rows:
+        return 0
+    stmt = (insert(WorkItem).values(rows)
+            .on_conflict_do_nothing(index_elements=["run", "facility_id"])
+            .returning(WorkItem.id))
+    added = len(db.execute(stmt).all())
+    db.commit()
+    return added
+
+
+def run_generation(db: Session, run: str) -> int:
+    """
+    The generation all workers of `run` write into, opened by the first worker asking for it (the caller commits).
+    Once it was published or rolled back, a resumed or repeated run gets a new one.
+    """
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:run))"), {"run": run})
+    label = f"queue {run}"
+    existing = db.exec(
+        select(Generation.id)
+        .where(Generation.label == label, Generation.status == STAGING)
+        .order_by(Generation.id.desc())
+    ).first()
+    return existing if existing is not None else open_generation(db, label)
+
+
+def run_finished(db: Session, run: str) -> bool:
+    """True once no item of `run` is pending or held by a live worker; items out of attempts are given up."""
+    unfinished = db.exec(
+        select(func.count())
+        .select_from(WorkItem)
+        .where(WorkItem.run == run,
+               or_(WorkItem.status == "pending",
+                   and_(WorkItem.status == "claimed",
+                        or_(WorkItem.lease_until >= func.now(), WorkItem.attempts < MAX_ATTEMPTS))))
+    ).one()
+    return unfinished == 0
+
+
+def claim(db: Session, run: str, worker: str, lease_seconds: int = LEASE_SECONDS) -> Optional[tuple[int, int]]:
+    """Claim the next available item of a run; returns (item id, facility id) or None if nothing is left."""
+    # an expired lease on the last attempt means its worker crashed; give the item up instead of leaving it claimed
+    db.execute(
+        update(WorkItem)
+        .where(WorkItem.run == run,
+               WorkItem.status == "claimed",
+               WorkItem.lease_until < func.now(),
+               WorkItem.attempts >= MAX_ATTEMPTS)
+        .values(status="failed",
+                lease_until=None,
+                error=f"lease expired on attempt {MAX_ATTEMPTS} of {MAX_ATTEMPTS} (worker crashed or hung)")
+    )
+
+    stmt = (
+        select(WorkItem)
+        .where(WorkItem.run == run,
+               WorkItem.attempts < MAX_ATTEMPTS,
+               or_(WorkItem.status == "pending",
+                   and_(WorkItem.status == "claimed", WorkItem.lease_until < func.now())))
+        .order_by(WorkItem.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    item = db.exec(stmt).first()
+    if item is None:
+        db.commit()
+        return None
+
+    item.status = "claimed"
+    item.worker = worker
+    item.lease_until = func.now() + timedelta(seconds=lease_seconds)
+    item.attempts += 1
+    claimed = (item.id, item.facility_id)
+    db.commit()
+    return claimed
+
+
+def complete(db: Session, item_id: int, worker: str) -> bool:
+    """
+    Mark an item done within the caller's transaction. Returns False if the lease was lost to another worker;
+    the caller must then roll back instead of committing its writes.
+    """
+    item = db.exec(select(WorkItem).where(WorkItem.id == item_id).with_for_update()).one()
+    if item.status != "claimed" or item.worker != worker:
+        return False
+    item.status = "done"
+    item.lease_until = None
+    item.error = None
+    return True
+
+
+def release(db: Session, item_id: int, worker: str, error: str) -> None:
+    """Give a failed item back to the queue, or mark it failed once it used up its attempts."""
+    db.execute(
+        update(WorkItem)
+        .where(WorkItem.id == item_id, WorkItem.worker == worker, WorkItem.status == "claimed")
+        .values(status=case((WorkItem.attempts >= MAX_ATTEMPTS, "failed"), else_="pending"),
+                lease_until=None,
+                error=error[:1000])
+    )
+    db.commit()
+
+
+def queue_status(db: Session, run: str) -> dict[str, int]:
+    rows = db.exec(select(WorkItem.status, func.count()).where(WorkItem.run == run).group_by(WorkItem.status)).all()
+    return {status: count for status, count in rows}
@@ -1,12 +1,14 @@
 import os
-import json
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 from pathlib import Path
 
+from app.src.cron.db_updater.schema import Facility as FacilitySchema
+from app.src.cron.registry import get_registry
+
 """
-1. Loads facilities.json.
+1. Loads facilities.json (through the shared facility registry).
 2. Creates a new timestamped folder under assets/fetched/.
 3. Iterates through each facility.
 4. For each canteen/cafeteria:
@@ -19,7 +21,6 @@ from pathlib import Path
 # Path setup
 BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
 print(BASE_DIR)
-FACILITIES_FILE = BASE_DIR / "assets" / "facilities.json"
 FETCHED_DIR = BASE_DIR / "assets" / "fetched"
 
 def fetch_html(url: str) -> str | None:
@@ -62,25 +63,22 @@ def save_html(content: str, path: Path):
     with open(path, "w", encoding="utf-8") as f:
         f.write(content)
 
-def process_facility(item: dict, base_outdir: Path):
+def process_facility(item: FacilitySchema, base_outdir: Path):
     """Process a single facility (canteen or cafeteria)."""
-    id = item.get("id")
-    if not id:
-        print("⚠️ Skipping facility without id")
-        return
+    id = item.id
 
     facility_dir = base_outdir / id
     facility_dir.mkdir(parents=True, exist_ok=True)
 
     # Detail page
-    detail_url = item.get("detail_url")
+    detail_url = item.detail_url
     if detail_url:
         detail_html = fetch_html(detail_url)
         if detail_html:
             save_html(detail_html, facility_dir / "detail.html")
 
     # Menu page (if exists)
-    menu_url = item.get("menu_url")
+    menu_url = item.menu_url
     if menu_url:
         menu_html = fetch_html(menu_url)
         if menu_html:
@@ -92,16 +90,8 @@ def main():
     outdir = FETCHED_DIR / timestamp
     outdir.mkdir(parents=True, exist_ok=True)
 
-    # Load facilities.json
-    with open(FACILITIES_FILE, encoding="utf-8") as f:
-        data = json.load(f)
-
-    for org in data:
-        for location in org.get("facilities", []):
-            for canteen in location.get("canteens", []):
-                process_facility(canteen, outdir)
-            for cafeteria in location.get("cafeterias", []):
-                process_facility(cafeteria, outdir)
+    for entry in get_registry().entries():
+        process_facility(entry.facility, outdir)
 
     print(f"✅ Finished fetching facilities into {outdir}")
 
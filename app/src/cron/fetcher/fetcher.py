@@ -1,111 +1,144 @@
+import hashlib
 import os
-import json
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.src.config.env import fetch_store_parsed
+from app.src.cron import run_report
+from app.src.cron.adapters.base import OrganizationAdapter, get_adapter
+from app.src.cron.db_updater.parse_cache import write_snapshot_parse
+from app.src.cron.db_updater.schema import Facility as FacilitySchema
+from app.src.cron.registry import get_registry, FacilityRegistry, RegistryEntry
 
 """
 This cronjob is responsible for fetching facilities from facilities.json from the website of the Studierendenwerk.
 
-1. Loads facilities.json.
+1. Loads facilities.json (through the shared facility registry).
 2. Creates a new timestamped folder under assets/fetched/.
-3. Iterates through each facility.
+3. Fetches all organizations concurrently, each through its scraper adapter (see app/src/cron/adapters)
+   and with at most `max_concurrency` requests in flight per organization.
 4. For each canteen/cafeteria:
    - Creates a folder named with its id.
-   - Downloads the raw HTML from detail_url (and menu_url if present).
-   - Extracts only the <main>...</main> section.
+   - Downloads the HTML from detail_url (and menu_url if present) and lets the adapter trim it.
    - Saves them as detail.html and/or menu.html.
+   - With FETCH_STORE_PARSED (or `store_parsed`), also saves their parse results as detail.json / menu.json,
+     taken from the tree the adapter trimmed the page on (`fetch_parsed`), so the updater skips parsing them.
+A failing organization does not affect the others.
+
+Every run records per-stage timings, its memory peak and the pages and bytes it fetched
+(see app.src.cron.run_report).
 """
 
 # Path setup
 BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent.parent
 print(BASE_DIR)
-FACILITIES_FILE = BASE_DIR / "assets" / "facilities.json"
 FETCHED_DIR = BASE_DIR / "assets" / "fetched"
 
-def fetch_html(url: str) -> str | None:
-    """Fetch HTML and return only the <div class="gastronomy"> content, cleaned."""
-    try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        # 1. Find <main>
-        main = soup.find("main")
-        if not main:
-            return None
-
-        # 2. Find <div class="gastronomy"
-        gastronomy = main.find("div", class_="gastronomy")
-        if not gastronomy:
-            return None
-
-        # 3. Remove unwanted sections - currently:
-        # - <div class="gallery">
-        # - <div class="gastronomy-detail_bottom">
-        for unwanted in gastronomy.find_all("div", class_=["gallery", "gastronomy-detail_bottom"]):
-            unwanted.decompose()
-
-        # 4. Remove all <script> tags
-        for script in gastronomy.find_all("script"):
-            script.decompose()
-
-        return str(gastronomy)
-
-    except Exception as e:
-        print(f"❌ Failed to fetch {url}: {e}")
-        return None
 
+def save_html(content: str, path: Path) -> str:
+    """Save HTML string to file; returns the sha256 of the bytes written, as the updater will hash the file."""
+    data = content.encode("utf-8")
+    with run_report.stage("save"), open(path, "wb") as f:
+        run_report.count("bytes_written", f.write(data))
+    return hashlib.sha256(data).hexdigest()
+
+
+def fetch_page(adapter: OrganizationAdapter, url: str, kind: str) -> Optional[str]:
+    with run_report.stage(f"fetch_{kind}"):
+        html = adapter.fetch_page(url)
+    run_report.count("pages_fetched" if html else "pages_failed")
+    return html
+
+def fetch_parsed_page(adapter: OrganizationAdapter, url: str,
+                      kind: str) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
+    """The trimmed page and the parse result of the adapter's `fetch_parsed`, taken from the tree it trimmed on."""
+    with run_report.stage(f"fetch_{kind}"):
+        fetched = adapter.fetch_parsed(url, kind)
+    run_report.count("pages_fetched" if fetched else "pages_failed")
+    return fetched
+
+def save_page(adapter: OrganizationAdapter, url: str, kind: str, facility_dir: Path, store_parsed: bool):
+    path = facility_dir / f"{kind}.html"
+    # without fetch_parsed, storing a parse result would mean parsing the page here as well as in the updater
+    if not store_parsed or adapter.fetch_parsed is None:
+        html = fetch_page(adapter, url, kind)
+        if html:
+            save_html(html, path)
+        return
 
-
-def save_html(content: str, path: Path):
-    """Save HTML string to file."""
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
-
-def process_facility(item: dict, base_outdir: Path):
-    """Process a single facility (canteen or cafeteria)."""
-    id = item.get("id")
-    if not id:
-        print("⚠️ Skipping facility without id")
+    fetched = fetch_parsed_page(adapter, url, kind)
+    if not fetched:
         return
+    html, parsed = fetched
+    digest = save_html(html, path)
+    if parsed is not None:
+        with run_report.stage("save"):
+            write_snapshot_parse(path, digest, parsed)
+        run_report.count("pages_parsed")
+
+def process_facility(item: FacilitySchema, base_outdir: Path, adapter: OrganizationAdapter,
+                     store_parsed: bool = False):
+    """Process a single facility (canteen or cafeteria)."""
+    id = item.id
 
     facility_dir = base_outdir / id
     facility_dir.mkdir(parents=True, exist_ok=True)
 
     # Detail page
-    detail_url = item.get("detail_url")
+    detail_url = item.detail_url
     if detail_url:
-        detail_html = fetch_html(detail_url)
-        if detail_html:
-            save_html(detail_html, facility_dir / "detail.html")
+        save_page(adapter, detail_url, "detail", facility_dir, store_parsed)
 
     # Menu page (if exists)
-    menu_url = item.get("menu_url")
+    menu_url = item.menu_url
     if menu_url:
-        menu_html = fetch_html(menu_url)
-        if menu_html:
-            save_html(menu_html, facility_dir / "menu.html")
-
-def main():
+        save_page(adapter, menu_url, "menu", facility_dir, store_parsed)
+
+def process_organization(domain: str, entries: list[RegistryEntry], outdir: Path, store_parsed: bool = False) -> int:
+    """Fetch all facilities of one organization; returns the number of facilities that failed."""
+    adapter = get_adapter(domain)
+    with ThreadPoolExecutor(max_workers=adapter.max_concurrency, thread_name_prefix=domain) as pool:
+        futures = [pool.submit(process_facility, e.facility, outdir, adapter, store_parsed) for e in entries]
+    failed = 0
+    for f in futures:
+        if f.exception() is not None:
+            failed += 1
+            run_report.count("facilities_failed")
+            print(f"❌ {domain}: {f.exception()}")
+    return failed
+
+def main(registry: Optional[FacilityRegistry] = None, fetched_dir: Path = FETCHED_DIR, report: bool = True,
+         store_parsed: bool = fetch_store_parsed) -> Path:
+    """
+    Fetch all facilities of `registry` (default: facilities.json); returns the new snapshot directory.
+    With `report`, the run is recorded in the job_run table and assets/runs.
+    With `store_parsed`, the parse results of the pages are stored next to them.
+    """
     # Timestamp folder
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    outdir = FETCHED_DIR / timestamp
+    outdir = fetched_dir / timestamp
     outdir.mkdir(parents=True, exist_ok=True)
 
-    # Load facilities.json
-    with open(FACILITIES_FILE, encoding="utf-8") as f:
-        data = json.load(f)
-
-    for org in data:
-        for location in org.get("facilities", []):
-            for canteen in location.get("canteens", []):
-                process_facility(canteen, outdir)
-            for cafeteria in location.get("cafeterias", []):
-                process_facility(cafeteria, outdir)
+    with run_report.track_run("fetcher") if report else nullcontext():
+        run_report.set_snapshot(timestamp)
+        with run_report.stage("load_json"):
+            by_org = (registry or get_registry()).by_organization
+        with ThreadPoolExecutor(max_workers=max(1, len(by_org))) as pool:
+            futures = {domain: pool.submit(process_organization, domain, entries, outdir, store_parsed)
+                       for domain, entries in by_org.items()}
+
+        for domain, future in futures.items():
+            if future.exception() is not None:
+                print(f"❌ {domain}: {future.exception()}")
+                run_report.count("organizations_failed")
+            elif future.result():
+                print(f"⚠️ {domain}: {future.result()} facilities failed")
 
     print(f"✅ Finished fetching facilities into {outdir}")
+    return outdir
 
 if __name__ == "__main__":
     main()
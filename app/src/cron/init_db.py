@@ -1,10 +1,14 @@
 """
-This script seeds the database. It reads the provided facilites.json file and inserts the seed data to the database.
+This script seeds the database. It reads the provided facilites.json file (through the shared facility registry)
+and upserts the seed data into the database.
+
+Everything is written with batched INSERT ... ON CONFLICT DO UPDATE statements, so seeding thousands of
+facilities takes a handful of round trips, and changed names, addresses and descriptions are updated. Organizations
+are keyed by their domain (the key of their scraper adapter), so a renamed organization keeps its row.
 """
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
 
 # --- make the import robust no matter where you run this file ---
@@ -17,89 +21,99 @@ for _ in range(5):
         break
     ROOT = ROOT.parent
 
-from sqlmodel import Session, select
+from sqlalchemy import or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
 
 # Your final models/engine live here:
 from app.src.config.database import (
     engine, create_db_and_tables,
     Organization, Location, FacilityType, Facility,
 )
+from app.src.cron.registry import get_registry, CANTEEN, CAFETERIA
+
+BATCH_SIZE = 1000
 
-BASE_DIR = (Path(__file__).resolve().parent.parent.parent.parent)  # where this script lives
-FACILITIES_FILE = (BASE_DIR / "assets" / "facilities.json").resolve()
-
-def get_or_create(session: Session, model, where: dict, defaults: dict | None = None):
-    """Simple upsert-ish helper: fetch by unique fields; create if missing."""
-    stmt = select(model)
-    for k, v in where.items():
-        stmt = stmt.where(getattr(model, k) == v)
-    obj = session.exec(stmt).first()
-    if obj:
-        return obj, False
-    payload = {**where, **(defaults or {})}
-    obj = model(**payload)
-    session.add(obj)
-    session.flush()  # assign PKs
-    return obj, True
 
 def truncate(s: str | None, max_len: int) -> str | None:
     if s is None:
         return None
     return s if len(s) <= max_len else s[:max_len]
 
+
+def upsert_by_name(session: Session, model, rows: list[dict]) -> dict[str, int]:
+    """Upsert rows keyed by their unique `name`; returns {name: id} for all of them."""
+    if not rows:
+        return {}
+    stmt = insert(model).values(rows)
+    # DO UPDATE (instead of DO NOTHING) so RETURNING also yields the ids of rows that already existed
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[model.name],
+        set_={c: stmt.excluded[c] for c in rows[0]},
+    ).returning(model.id, model.name)
+    return {name: id_ for id_, name in session.execute(stmt)}
+
+
+def upsert_organizations(session: Session, rows: list[dict]) -> dict[str, int]:
+    """Upsert organizations keyed by their unique `domain`; returns {domain: id} for all of them."""
+    if not rows:
+        return {}
+    stmt = insert(Organization).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Organization.domain],
+        set_={c: stmt.excluded[c] for c in rows[0]},
+    ).returning(Organization.id, Organization.domain)
+    return {domain: id_ for id_, domain in session.execute(stmt)}
+
+
+def upsert_facilities(session: Session, rows: list[dict]) -> int:
+    """Insert new facilities and update changed ones (keyed by uuid); returns the number of rows written."""
+    written = 0
+    for i in range(0, len(rows), BATCH_SIZE):
+        stmt = insert(Facility).values(rows[i:i + BATCH_SIZE])
+        updated = {c: stmt.excluded[c] for c in rows[0] if c != "uuid"}
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Facility.uuid],
+            set_=updated,
+            # leave unchanged rows alone
+            where=or_(*(getattr(Facility, c).is_distinct_from(v) for c, v in updated.items())),
+        )
+        written += session.execute(stmt).rowcount
+    return written
+
+
 def main():
     # Ensure tables exist
     create_db_and_tables()
 
-    with open(FACILITIES_FILE, encoding="utf-8") as f:
-        data = json.load(f)  # top-level list of organizations
+    registry = get_registry()
 
     with Session(engine) as session:
-        # Prepare facility types
-        ft_canteen, _ = get_or_create(session, FacilityType, {"name": "Canteen"})
-        ft_cafeteria, _ = get_or_create(session, FacilityType, {"name": "Cafeteria"})
-
-        for org_item in data:
-            org, _ = get_or_create(
-                session,
-                Organization,
-                {"name": org_item["organization_name"]},
-                {"domain": org_item["organization_domain"]},
-            )
-
-            for loc_item in org_item.get("facilities", []):
-                loc, _ = get_or_create(session, Location, {"name": loc_item["location"]})
-
-                # Helper to insert facilities from a collection with a given type
-                def seed_facilities(items, ftype: FacilityType):
-                    for it in items:
-                        # Map JSON → DB fields
-                        uuid = it["id"]  # JSON id == DB uuid
-                        name = truncate(it["facility_name"], 100)
-                        address = truncate(it.get("address", ""), 100)
-                        description = truncate(it.get("description", ""), 250)
-
-                        # Skip if this UUID already exists
-                        existing = session.exec(select(Facility).where(Facility.uuid == uuid)).first()
-                        if existing:
-                            continue
-
-                        fac = Facility(
-                            uuid=uuid,
-                            name=name,
-                            address=address,
-                            description=description,
-                            organization=org,
-                            location=loc,
-                            facility_type=ftype,
-                        )
-                        session.add(fac)
-
-                seed_facilities(loc_item.get("canteens", []), ft_canteen)
-                seed_facilities(loc_item.get("cafeterias", []), ft_cafeteria)
+        type_ids = upsert_by_name(session, FacilityType, [{"name": CANTEEN}, {"name": CAFETERIA}])
+
+        # dicts de-duplicate: one statement must not touch the same row twice
+        orgs = {o.organization_domain: {"name": o.organization_name, "domain": o.organization_domain}
+                for o in registry.organizations()}
+        org_ids = upsert_organizations(session, list(orgs.values()))
+        location_ids = upsert_by_name(session, Location, [{"name": loc} for loc in registry.by_location])
+
+        # Map JSON → DB fields (JSON id == DB uuid)
+        facilities = [
+            {
+                "uuid": e.facility.id,
+                "name": truncate(e.facility.facility_name, 100),
+                "address": truncate(e.facility.address or "", 100),
+                "description": truncate(e.facility.description or "", 250),
+                "organization_id": org_ids[e.organization.organization_domain],
+                "location_id": location_ids[e.location],
+                "facility_type_id": type_ids[e.facility_type],
+            }
+            for e in registry.entries()
+        ]
+        written = upsert_facilities(session, facilities)
 
         session.commit()
-        print("✅ Seeding complete.")
+        print(f"✅ Seeding complete ({len(facilities)} facilities, {written} inserted or updated).")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,82 @@
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+PRICE_CLASSES = ("student", "servant", "guest")
+
+
+def tag_column(tag: str) -> str:
+    """'Vegan' -> 'tag_vegan', 'Geflügel' -> 'tag_geflügel'"""
+    slug = re.sub(r"\W+", "_", tag.strip().casefold()).strip("_")
+    return f"tag_{slug}"
+
+
+def iter_entries(weeks: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    """Flatten a stored meal document (weeks -> days -> entries) into (date_iso, entry) pairs."""
+    for week in weeks or []:
+        for day in week.get("days") or []:
+            for entry in day.get("entries") or []:
+                yield day.get("date_iso"), entry
+
+
+class MealColumns:
+    """
+    Accumulates flattened meal entries column by column and turns them into typed NumPy arrays.
+    Missing prices and CO2 values become NaN, missing dates NaT.
+    """
+
+    def __init__(self):
+        self._snapshot_ts: List[datetime] = []
+        self._date: List[Optional[str]] = []
+        self._facility_id: List[int] = []
+        self._title: List[str] = []
+        self._prices: Dict[str, List[float]] = {c: [] for c in PRICE_CLASSES}
+        self._co2_g: List[float] = []
+        self._climate_plate: List[bool] = []
+        self._tags: List[List[str]] = []
+
+    def __len__(self) -> int:
+        return len(self._title)
+
+    def append(self, facility_id: int, snapshot_ts: datetime, weeks: Iterable[Dict[str, Any]]) -> int:
+        """Flatten one meal document; returns the number of rows added."""
+        before = len(self)
+        for date_iso, entry in iter_entries(weeks):
+            prices = entry.get("prices") or {}
+            co2 = entry.get("co2_g")
+
+            self._snapshot_ts.append(snapshot_ts)
+            self._date.append(date_iso)
+            self._facility_id.append(facility_id)
+            self._title.append(entry.get("title") or "")
+            for c in PRICE_CLASSES:
+                v = prices.get(c)
+                self._prices[c].append(np.nan if v is None else float(v))
+            self._co2_g.append(np.nan if co2 is None else float(co2))
+            self._climate_plate.append(bool(entry.get("climate_plate")))
+            self._tags.append(entry.get("tags") or [])
+        return len(self) - before
+
+    def tags(self) -> set[str]:
+        return {t for tags in self._tags for t in tags}
+
+    def to_arrays(self, tag_vocabulary: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Return {column: array}; one boolean column per tag of the vocabulary."""
+        # NumPy has no tz-aware datetimes → store UTC
+        ts = [t.astimezone(timezone.utc).replace(tzinfo=None) if t.tzinfo else t for t in self._snapshot_ts]
+        arrays: Dict[str, np.ndarray] = {
+            "snapshot_ts": np.array(ts, dtype="datetime64[s]"),
+            "date": np.array([d or "NaT" for d in self._date], dtype="datetime64[D]"),
+            "facility_id": np.array(self._facility_id, dtype=np.int32),
+            "title": np.array(self._title, dtype=np.str_),
+            "co2_g": np.array(self._co2_g, dtype=np.float32),
+            "climate_plate": np.array(self._climate_plate, dtype=np.bool_),
+        }
+        for c in PRICE_CLASSES:
+            arrays[f"price_{c}"] = np.array(self._prices[c], dtype=np.float64)
+
+        for tag in tag_vocabulary:
+            arrays[tag_column(tag)] = np.fromiter((tag in tags for tags in self._tags), dtype=np.bool_, count=len(self))
+        return arrays
@@ -0,0 +1,133 @@
+"""
+This job exports the meal history into compressed, chunked columnar files (NumPy .npz) for analytics.
+
+1. Reads the export state (position of the last exported row, tag vocabulary) from the output directory.
+2. Streams all meal rows published after it from Postgres through a server-side cursor, in publish order, so rows
+   of a run that is published late are not skipped.
+3. Flattens weeks → days → entries into typed columns (see columns.py).
+4. Writes a new .npz chunk every --chunk-rows rows and advances the state, so nightly runs only append new data.
+
+Load all chunks with e.g.:
+    frames = [dict(np.load(p)) for p in sorted(Path("assets/exports/meals").glob("meals_*.npz"))]
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sqlalchemy import func, tuple_
+from sqlmodel import Session, select
+
+from app.src.config.database import engine, Generation, Meal
+from app.src.cron.meal_export.columns import MealColumns
+from app.src.storage.dishes import fetch_dishes, dish_ids_in, expand_meal_weeks
+from app.src.storage.generations import published_since, visible
+
+BASE_DIR = Path(__file__).resolve().parents[4]
+EXPORT_DIR = BASE_DIR / "assets" / "exports" / "meals"
+STATE_FILE_NAME = "_state.json"
+YIELD_PER = 500
+# rows from before generations sort as published at the epoch
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def load_state(outdir: Path) -> Dict[str, Any]:
+    path = outdir / STATE_FILE_NAME
+    if not path.exists():
+        return {"last_published_at": None, "last_id": None, "chunks": 0, "tags": []}
+    state = json.loads(path.read_text(encoding="utf-8"))
+    if "last_published_at" not in state:
+        raise SystemExit(f"{path} tracks recording time instead of publish order; re-export with --full")
+    return state
+
+
+def save_state(outdir: Path, state: Dict[str, Any]) -> None:
+    tmp = outdir / (STATE_FILE_NAME + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, outdir / STATE_FILE_NAME)
+
+
+def write_chunk(outdir: Path, state: Dict[str, Any], columns: MealColumns) -> Path:
+    """Write the buffered rows as the next chunk; extends the tag vocabulary first."""
+    known = set(state["tags"])
+    state["tags"].extend(sorted(columns.tags() - known))
+
+    seq = state["chunks"]
+    path = outdir / f"meals_{seq:06d}.npz"
+    tmp = outdir / f"meals_{seq:06d}.tmp.npz"
+    np.savez_compressed(tmp, **columns.to_arrays(state["tags"]))
+    os.replace(tmp, path)  # a crashed run never leaves a half-written chunk behind
+    state["chunks"] = seq + 1
+    return path
+
+
+def export(outdir: Path, chunk_rows: int, full: bool = False) -> int:
+    outdir.mkdir(parents=True, exist_ok=True)
+    if full:
+        for old in outdir.glob("meals_*.npz"):
+            old.unlink()
+        (outdir / STATE_FILE_NAME).unlink(missing_ok=True)
+    state = load_state(outdir)
+
+    published_at = func.coalesce(Generation.published_at, EPOCH)
+    stmt = (
+        select(Meal.id, Meal.facility_id, Meal.timestamp, Meal.meals, published_at)
+        .outerjoin(Generation, Meal.generation_id == Generation.id)
+        .where(visible(Meal))
+        .order_by(published_at, Meal.id)
+        .execution_options(yield_per=YIELD_PER)
+    )
+    if state["last_published_at"] is not None:
+        last_published = datetime.fromisoformat(state["last_published_at"])
+        stmt = stmt.where(published_since(Meal, last_published),
+                          tuple_(published_at, Meal.id) > tuple_(last_published, state["last_id"]))
+
+    total = 0
+    columns = MealColumns()
+    last: Optional[tuple[datetime, int]] = None
+
+    def flush():
+        nonlocal columns, total
+        if not len(columns):
+            return
+        path = write_chunk(outdir, state, columns)
+        state["last_published_at"], state["last_id"] = last[0].isoformat(), last[1]
+        save_state(outdir, state)
+        total += len(columns)
+        print(f"Wrote {len(columns)} rows to {path.name}")
+        columns = MealColumns()
+
+    dishes = {}
+    with Session(engine) as db:
+        for meal_id, facility_id, timestamp, meals, published in db.exec(stmt):
+            # dishes repeat constantly; only look up the ones not seen yet
+            missing = dish_ids_in(meals) - dishes.keys()
+            if missing:
+                dishes.update(fetch_dishes(db, missing))
+            columns.append(facility_id, timestamp, expand_meal_weeks(meals, dishes))
+            last = (published, meal_id)
+            # chunks end on document boundaries so the state always points at a fully exported row
+            if len(columns) >= chunk_rows:
+                flush()
+        flush()
+
+    return total
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Export the meal history into chunked .npz files.")
+    parser.add_argument("--out", type=Path, default=EXPORT_DIR, help="output directory (default: %(default)s)")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="rows per chunk file (default: %(default)s)")
+    parser.add_argument("--full", action="store_true", help="drop previous chunks and export the whole history again")
+    args = parser.parse_args(argv)
+
+    total = export(args.out, args.chunk_rows, full=args.full)
+    print(f"✅ Exported {total} meal entries into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
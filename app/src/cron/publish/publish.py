@@ -0,0 +1,147 @@
+"""
+Publishing and rolling back generations of updater output (see app.src.storage.generations).
+
+Both operations lock the publish pointer, change generation statuses and the pointer, and bring the derived
+data of the affected facilities up to date (materialized latest history documents, meal rollups), all in the
+caller's transaction: readers switch from the old to the new state with its commit.
+
+Usage:
+    python -m app.src.cron.publish.publish                 # list generations
+    python -m app.src.cron.publish.publish --publish ID    # publish a staging generation
+    python -m app.src.cron.publish.publish --rollback [ID] # go back to generation ID (default: the previous one)
+"""
+
+import argparse
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import union
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.src.config.database import engine, Generation, Meal, Notice, OpeningHour, ProcessedInput, PublishPointer
+from app.src.cron.db_updater.rollups import delete_rollups_of, refresh_rollups
+from app.src.storage.generations import POINTER_ID, PUBLISHED, ROLLED_BACK, STAGING
+from app.src.storage.history import materialize_latest, rechain, versions_to_rechain
+
+HISTORY = ((Notice, "notices"), (OpeningHour, "opening_hours"))
+
+
+def _lock_pointer(db: Session) -> PublishPointer:
+    db.execute(insert(PublishPointer).values(id=POINTER_ID).on_conflict_do_nothing(index_elements=["id"]))
+    return db.exec(select(PublishPointer).where(PublishPointer.id == POINTER_ID).with_for_update()).one()
+
+
+def touched_facilities(db: Session, generation_ids: Iterable[int], models=(Notice, OpeningHour, Meal)) -> list[int]:
+    ids = list(generation_ids)
+    stmt = union(*(select(model.facility_id).where(model.generation_id.in_(ids)) for model in models))
+    return list(db.exec(stmt).scalars())
+
+
+def publish_or_discard(db: Session, generation_id: int) -> bool:
+    """Publish a generation that stored anything, delete one that did not (the caller commits)."""
+    if touched_facilities(db, [generation_id], models=(Notice, OpeningHour, Meal, ProcessedInput)):
+        return publish(db, generation_id)
+    db.delete(db.get(Generation, generation_id))
+    return False
+
+
+def _versions_to_rechain(db: Session, generation_ids: list[int], staged: bool = False) -> list[tuple]:
+    return [(model, field, versions_to_rechain(db, model, field, generation_ids, staged)) for model, field in HISTORY]
+
+
+def _rechain(db: Session, pending: list[tuple]) -> None:
+    for model, field, versions in pending:
+        rechain(db, model, field, versions)
+
+
+def _refresh_derived(db: Session, facility_ids: list[int]) -> None:
+    materialize_latest(db, Notice, "notices", facility_ids)
+    materialize_latest(db, OpeningHour, "opening_hours", facility_ids)
+    refresh_rollups(db, facility_ids)
+
+
+def publish(db: Session, generation_id: int, published_at: Optional[datetime] = None) -> bool:
+    """
+    Make a staging generation visible (the caller commits). Returns False if it is not staging anymore,
+    e.g. because another worker of the same run published it first. `published_at` backdates it in the publish
+    order the exports follow (default: now).
+    """
+    pointer = _lock_pointer(db)
+    generation = db.exec(select(Generation).where(Generation.id == generation_id).with_for_update()).one()
+    if generation.status != STAGING:
+        return False
+
+    # its delta versions may land between visible ones instead of after them
+    pending = _versions_to_rechain(db, [generation.id], staged=True)
+    generation.status = PUBLISHED
+    generation.published_at = published_at or datetime.now(timezone.utc)
+    # runs may finish out of order; an older generation published late must not hide newer ones
+    pointer.generation_id = max(pointer.generation_id or 0, generation.id)
+    db.flush()
+
+    _rechain(db, pending)
+    _refresh_derived(db, touched_facilities(db, [generation.id]))
+    return True
+
+
+def rollback(db: Session, to: Optional[int] = None) -> list[int]:
+    """
+    Move the pointer back to published generation `to` (default: the one before the current one) and mark all
+    newer published generations as rolled back, so later publishes do not bring them back (the caller commits).
+    Returns the rolled back generation ids.
+    """
+    pointer = _lock_pointer(db)
+    published = db.exec(
+        select(Generation.id)
+        .where(Generation.status == PUBLISHED, Generation.id <= (pointer.generation_id or 0))
+        .order_by(Generation.id.desc())
+    ).all()
+    if to is None:
+        to = published[1] if len(published) > 1 else None
+    elif to not in published:
+        raise ValueError(f"Generation {to} is not a published generation up to the current one")
+
+    rolled_back = [g for g in published if to is None or g > to]
+    pending = _versions_to_rechain(db, rolled_back)
+    for generation in db.exec(select(Generation).where(Generation.id.in_(rolled_back))).all():
+        generation.status = ROLLED_BACK
+    pointer.generation_id = to
+    db.flush()
+
+    _rechain(db, pending)
+    delete_rollups_of(db, db.exec(select(Meal).where(Meal.generation_id.in_(rolled_back))).all())
+    _refresh_derived(db, touched_facilities(db, rolled_back))
+    return rolled_back
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="List, publish or roll back generations of updater output.")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--publish", type=int, metavar="ID", help="publish a staging generation")
+    action.add_argument("--rollback", type=int, nargs="?", const=0, metavar="ID",
+                        help="roll back to generation ID (default: the previous published one)")
+    parser.add_argument("--limit", type=int, default=20, help="number of generations to list")
+    args = parser.parse_args(argv)
+
+    with Session(engine) as db:
+        if args.publish is not None:
+            if not publish(db, args.publish):
+                print(f"Generation {args.publish} is not staging.")
+                return
+            db.commit()
+            print(f"✅ Published generation {args.publish}")
+        elif args.rollback is not None:
+            rolled_back = rollback(db, args.rollback or None)
+            db.commit()
+            print(f"✅ Rolled back generations {rolled_back}")
+
+        current = db.exec(select(PublishPointer.generation_id).where(PublishPointer.id == POINTER_ID)).first()
+        generations = db.exec(select(Generation).order_by(Generation.id.desc()).limit(args.limit)).all()
+        for g in generations:
+            marker = "→" if g.id == current else " "
+            print(f"{marker} {g.id:>6}  {g.status:<12} {g.created_at:%Y-%m-%d %H:%M:%S}  {g.label}")
+
+
+if __name__ == "__main__":
+    main()
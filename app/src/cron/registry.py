@@ -0,0 +1,72 @@
+"""
+Single, cached view of facilities.json for all cron jobs.
+
+The file is parsed and validated once per process; lookups by uuid, organization, location and
+facility type are dict lookups instead of walks over the nested organization → location → facility lists.
+"""
+
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.src.cron.db_updater.schema import FacilitiesRoot, OrganizationBlock, Facility as FacilitySchema
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+FACILITIES_FILE = BASE_DIR / "assets" / "facilities.json"
+
+CANTEEN = "Canteen"
+CAFETERIA = "Cafeteria"
+
+
+@dataclass(frozen=True)
+class RegistryEntry:
+    organization: OrganizationBlock
+    location: str
+    facility_type: str      # CANTEEN or CAFETERIA
+    facility: FacilitySchema
+
+
+class FacilityRegistry:
+    def __init__(self, root: FacilitiesRoot):
+        self.root = root
+        self.by_uuid: Dict[str, RegistryEntry] = {}
+        self.by_organization: Dict[str, List[RegistryEntry]] = defaultdict(list)   # key: organization_domain
+        self.by_location: Dict[str, List[RegistryEntry]] = defaultdict(list)
+        self.by_type: Dict[str, List[RegistryEntry]] = defaultdict(list)
+
+        for org in root.organizations:
+            for loc in org.facilities:
+                for ftype, items in ((CANTEEN, loc.canteens), (CAFETERIA, loc.cafeterias)):
+                    for facility in items:
+                        if facility.id in self.by_uuid:
+                            raise ValueError(f"Duplicate facility id {facility.id} in facilities.json")
+                        entry = RegistryEntry(organization=org, location=loc.location,
+                                              facility_type=ftype, facility=facility)
+                        self.by_uuid[facility.id] = entry
+                        self.by_organization[org.organization_domain].append(entry)
+                        self.by_location[loc.location].append(entry)
+                        self.by_type[ftype].append(entry)
+
+    def get(self, uuid: str) -> Optional[RegistryEntry]:
+        return self.by_uuid.get(uuid)
+
+    def entries(self) -> List[RegistryEntry]:
+        return list(self.by_uuid.values())
+
+    def organizations(self) -> List[OrganizationBlock]:
+        return self.root.organizations
+
+
+def get_registry(path: Path = FACILITIES_FILE) -> FacilityRegistry:
+    """Parse, validate and index facilities.json (once per process and path)."""
+    # the cache is keyed on the resolved path, so relative and absolute spellings share one registry
+    return _load_registry(Path(path).resolve())
+
+
+@lru_cache(maxsize=None)
+def _load_registry(path: Path) -> FacilityRegistry:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return FacilityRegistry(FacilitiesRoot.from_json(data))
@@ -0,0 +1,197 @@
+"""
+Structured reports of cron job runs: per-stage timings, memory peak and counters.
+
+A job wraps its run in `track_run(job)`. Code running within it - in any thread - times its stages with
+`with stage(name):` and counts with `count(name, n)`. Outside of a tracked run both do nothing, so code shared
+with other jobs (e.g. store_detail, which the daemon uses as well) can report unconditionally.
+
+At its end a run is written as JSON to assets/runs/{job}/{started_at}.json and as a row of the job_run table,
+which the /runs routes read. Stage times are summed over all threads, so stages running concurrently (parsing
+facilities, fetching pages) can add up to more than the duration of the run.
+"""
+
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from sqlmodel import Session
+
+from app.src.config.database import engine, JobRun
+from app.src.cron.registry import BASE_DIR
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+RUNS_DIR = BASE_DIR / "assets" / "runs"
+# name format of the snapshot directories in assets/fetched (local time)
+SNAPSHOT_FORMAT = "%Y%m%d_%H%M%S"
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    seconds: float = 0.0        # summed over all calls
+    max_seconds: float = 0.0    # slowest single call
+
+
+class RunReport:
+    def __init__(self, job: str):
+        self.job = job
+        self.snapshot: Optional[str] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.status = "running"
+        self.error: Optional[str] = None
+        # peak resident set size of the process; with trace_memory also the peak of Python allocations
+        self.peak_memory_kib: Optional[float] = None
+        self.traced_peak_kib: Optional[float] = None
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Counter = Counter()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                stats = self.stages.setdefault(name, StageStats())
+                stats.calls += 1
+                stats.seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self.lock:
+            self.counters[name] += n
+
+    @property
+    def snapshot_at(self) -> Optional[datetime]:
+        if self.snapshot is None:
+            return None
+        try:
+            return datetime.strptime(self.snapshot, SNAPSHOT_FORMAT).astimezone(timezone.utc)
+        except ValueError:
+            return None
+
+    @property
+    def duration_seconds(self) -> float:
+        return ((self.finished_at or datetime.now(timezone.utc)) - self.started_at).total_seconds()
+
+    def as_json(self) -> Dict[str, Any]:
+        return {
+            "job": self.job,
+            "snapshot": self.snapshot,
+            "status": self.status,
+            "error": self.error,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "peak_memory_kib": self.peak_memory_kib,
+            "traced_peak_kib": self.traced_peak_kib,
+            "stages": {name: asdict(s) for name, s in sorted(self.stages.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def save(self) -> None:
+        """Write the report as JSON file and job_run row."""
+        path = RUNS_DIR / self.job / f"{self.started_at:%Y%m%d_%H%M%S}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.as_json(), indent=2), encoding="utf-8")
+
+        with Session(engine) as db:
+            db.add(JobRun(
+                job=self.job,
+                snapshot=self.snapshot,
+                snapshot_at=self.snapshot_at,
+                status=self.status,
+                error=self.error,
+                started_at=self.started_at,
+                finished_at=self.finished_at,
+                duration_seconds=self.duration_seconds,
+                peak_memory_kib=self.peak_memory_kib,
+                bytes_read=self.counters["bytes_read"],
+                rows_inserted=self.counters["rows_inserted"],
+                rows_skipped=self.counters["rows_skipped"],
+                report=self.as_json(),
+            ))
+            db.commit()
+
+
+# report of the run this process is executing, shared by all its threads
+_active: Optional[RunReport] = None
+
+
+@contextmanager
+def track_run(job: str, trace_memory: bool = False) -> Iterator[RunReport]:
+    """
+    Record the run of `job` that executes within the block; a raising block is recorded as failed.
+    The peak resident set size of the process is always recorded. With `trace_memory`, the peak of Python
+    allocations is traced as well (which slows down allocation-heavy code).
+    """
+    global _active
+    report = RunReport(job)
+    tracing = trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    _active = report
+    try:
+        yield report
+        report.status = "ok"
+    except BaseException as e:
+        report.status = "failed"
+        report.error = repr(e)
+        raise
+    finally:
+        _active = None
+        report.finished_at = datetime.now(timezone.utc)
+        report.peak_memory_kib = _max_rss_kib()
+        if tracing:
+            report.traced_peak_kib = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            tracemalloc.stop()
+        try:
+            report.save()
+            print(f"Run report: {report.duration_seconds:.1f}s, {dict(report.counters)}")
+        except Exception as e:
+            # a lost report must not fail (or hide the error of) the run itself
+            print(f"⚠️ Could not save the run report: {e!r}")
+
+
+def _max_rss_kib() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return float(peak / 1024 if sys.platform == "darwin" else peak)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block as (one call of) stage `name` of the current run."""
+    report = _active
+    if report is None:
+        yield
+        return
+    with report.stage(name):
+        yield
+
+
+def count(name: str, n: int = 1) -> None:
+    if _active is not None:
+        _active.count(name, n)
+
+
+def set_snapshot(name: Optional[str]) -> None:
+    """Name of the snapshot directory the current run writes or reads."""
+    if _active is not None:
+        _active.snapshot = name
@@ -0,0 +1,135 @@
+"""
+Request-level instrumentation of the API.
+
+- MetricsMiddleware times every request until its last body chunk is sent and records its response size.
+- SQLAlchemy engine events count the statements of the current request and the time spent in them
+  (per request through a context variable, so statements from the threadpool are attributed correctly).
+- InstrumentedQueuePool records how long a request waited for a pooled connection.
+
+Everything is collected in REGISTRY and rendered in the Prometheus text format by the /metrics route.
+"""
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.src.metrics.prometheus import Counter, Histogram, Registry
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Requests handled, by route template, method and status code.",
+    ("route", "method", "status")))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last byte of its response.",
+    ("route", "method")))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "Size of response bodies.", ("route",),
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)))
+REQUEST_STATEMENTS = REGISTRY.register(Histogram(
+    "http_request_db_statements", "SQL statements executed per request.", ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500)))
+REQUEST_DB_TIME = REGISTRY.register(Histogram(
+    "http_request_db_seconds", "Time spent executing SQL statements per request.", ("route",)))
+DB_STATEMENTS = REGISTRY.register(Counter(
+    "db_statements_total", "SQL statements executed, inside and outside of requests."))
+DB_STATEMENT_DURATION = REGISTRY.register(Histogram(
+    "db_statement_duration_seconds", "Duration of single SQL statements."))
+POOL_CHECKOUT_WAIT = REGISTRY.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a connection from the pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)))
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+# mutable stats object of the request being handled; shared with threads the request's work runs in
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited (including opening new connections)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    # the start time lives on the statement's execution context, so a failing statement (no after_cursor_execute)
+    # leaves nothing behind on the connection
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        DB_STATEMENTS.inc()
+        DB_STATEMENT_DURATION.observe(elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    # the template, not the actual path, keeps the number of label values bounded
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are timed until their last chunk."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = "500"
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = _route_template(scope)
+            REQUESTS.inc(route, scope["method"], status)
+            REQUEST_LATENCY.observe(time.perf_counter() - start, route, scope["method"])
+            RESPONSE_SIZE.observe(size, route)
+            REQUEST_STATEMENTS.observe(stats.statements, route)
+            REQUEST_DB_TIME.observe(stats.db_seconds, route)
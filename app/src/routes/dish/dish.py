@@ -0,0 +1,21 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlmodel import Session
+
+from app.src.config.database import get_session, Dish
+from app.src.routes.dish.schemas import DishOut
+
+router = APIRouter(prefix="/dish",
+                   tags=["Dish"])
+
+
+@router.get("/{dish_id}",
+            response_model=DishOut)
+def get_dish(dish_id: int, response: Response, db: Session = Depends(get_session)):
+    """Dishes never change once created (a changed dish gets a new id), so clients may cache them forever."""
+    dish = db.get(Dish, dish_id)
+    if dish is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Dish not found")
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return DishOut(id=dish.id, title=dish.title, tags=dish.tags, allergens=dish.allergens)
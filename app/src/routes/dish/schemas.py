@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class DishOut(BaseModel):
+    id: int
+    title: str
+    tags: list[str]
+    allergens: list[str]
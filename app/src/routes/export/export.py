@@ -0,0 +1,76 @@
+import zlib
+from datetime import datetime
+from typing import Iterator, Optional
+
+from fastapi import APIRouter
+from sqlmodel import Session
+from starlette.responses import StreamingResponse
+
+from app.src.config.database import engine
+from app.src.routes.export.queries import iter_facility_batches
+from app.src.routes.export.schemas import FacilityExportOut
+from app.src.routes.meal.queries import fetch_latest_meals_for
+from app.src.routes.notice.queries import fetch_latest_notices_for
+from app.src.routes.opening_hours.queries import fetch_latest_opening_hours_for
+from app.src.routes.organization.mappers import map_facility
+from app.src.storage.dishes import fetch_dishes, dish_ids_in, expand_meal_weeks
+
+BATCH_SIZE = 200
+
+router = APIRouter(prefix="/export",
+                   tags=["Export"])
+
+
+def _ndjson_lines(organization_id: Optional[int], since: Optional[datetime]) -> Iterator[bytes]:
+    # The session lives inside the generator: the request-scoped one may already be closed while the body streams.
+    with Session(engine) as db:
+        for facilities in iter_facility_batches(db, BATCH_SIZE, organization_id=organization_id, since=since):
+            ids = [f.id for f in facilities]
+            latest_oh = fetch_latest_opening_hours_for(db, ids)
+            latest_meals = fetch_latest_meals_for(db, ids)
+            latest_notices = fetch_latest_notices_for(db, ids)
+            dishes = fetch_dishes(db, set().union(*(dish_ids_in(m.meals) for m in latest_meals.values())))
+
+            chunk = []
+            for f in facilities:
+                meal = latest_meals.get(f.id)
+                notice = latest_notices.get(f.id)
+                out = FacilityExportOut(
+                    **map_facility(f, latest_oh).model_dump(),
+                    meals=expand_meal_weeks(meal.meals, dishes) if meal else None,
+                    notices=notice.notices if notice else None,
+                )
+                chunk.append(out.model_dump_json() + "\n")
+            yield "".join(chunk).encode("utf-8")
+
+            # keep the identity map from growing with the dataset; expunge_all() would also detach the identity
+            # map the streaming result loads the next batch into
+            for obj in list(db.identity_map.values()):
+                db.expunge(obj)
+
+
+def _gzipped(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router.get("/facilities.ndjson",
+            response_class=StreamingResponse)
+async def export_facilities(organization_id: Optional[int] = None,
+                            since: Optional[datetime] = None,
+                            gzip: bool = False):
+    """
+    Stream one JSON line per facility with its latest meals, notices and opening hours.
+    Use `since` to only get facilities with data published at or after a given point in time, and `gzip=true` for a
+    compressed body.
+    """
+    body = _ndjson_lines(organization_id, since)
+    headers = {"Cache-Control": "no-store"}
+    if gzip:
+        body = _gzipped(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import union
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from app.src.config.database import Facility, Meal, Notice, OpeningHour
+from app.src.storage.generations import published_since, visible
+
+
+def iter_facility_batches(db: Session,
+                          batch_size: int,
+                          organization_id: Optional[int] = None,
+                          since: Optional[datetime] = None,
+                          ) -> Iterator[list[Facility]]:
+    """
+    Stream facilities from a server-side cursor, `batch_size` rows at a time.
+    With `since`, only facilities having a meal, notice or opening hours row published at or after it are returned.
+    """
+    stmt = (
+        select(Facility)
+        .order_by(Facility.id)
+        .options(
+            selectinload(Facility.location),
+            selectinload(Facility.facility_type),
+        )
+        .execution_options(yield_per=batch_size)
+    )
+    if organization_id is not None:
+        stmt = stmt.where(Facility.organization_id == organization_id)
+    if since is not None:
+        changed_ids = union(
+            select(Meal.facility_id).where(published_since(Meal, since), visible(Meal)),
+            select(Notice.facility_id).where(published_since(Notice, since), visible(Notice)),
+            select(OpeningHour.facility_id).where(published_since(OpeningHour, since), visible(OpeningHour)),
+        )
+        stmt = stmt.where(Facility.id.in_(changed_ids))
+
+    for partition in db.exec(stmt).partitions():
+        yield list(partition)
@@ -0,0 +1,8 @@
+from typing import Any
+
+from app.src.routes.facility.schemas import FacilityOut
+
+
+class FacilityExportOut(FacilityOut):
+    meals: Any | None = None
+    notices: Any | None = None
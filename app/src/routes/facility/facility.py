@@ -1,5 +1,6 @@
 from http import HTTPStatus
 from pathlib import Path
+from typing import List
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -8,16 +9,18 @@ from sqlmodel import Session
 from app.src.config.database import get_session, Facility
 from app.src.routes.facility.file_response import serve_image_by_uuid, serve_image_by_id
 from app.src.routes.facility.queries import fetch_facility_by_uuid, fetch_facility_by_id
-from app.src.routes.facility.schemas import FacilityOut
+from app.src.routes.facility.schemas import FacilityOut, HistoryVersionOut
 from app.src.routes.meal.mappers import map_meal
 from app.src.routes.meal.queries import fetch_latest_meal_for_one
 from app.src.routes.meal.schemas import MealOut
 from app.src.routes.notice.mappers import map_notice
-from app.src.routes.notice.queries import fetch_latest_notice_for_one
+from app.src.routes.notice.queries import fetch_latest_notice_for_one, fetch_notice_versions, fetch_notice_version
 from app.src.routes.notice.schemas import NoticeOut
 from app.src.routes.opening_hours.mappers import map_opening_hours
-from app.src.routes.opening_hours.queries import fetch_latest_opening_hours_for
+from app.src.routes.opening_hours.queries import fetch_latest_opening_hours_for, fetch_opening_hours_versions, \
+    fetch_opening_hours_version
 from app.src.routes.opening_hours.schemas import OpeningHoursOutput
+from app.src.storage.dishes import fetch_dishes, dish_ids_in
 from app.src.routes.organization.mappers import map_facility
 
 IMAGES_DIR = Path(__file__).resolve().parents[4] / "assets" / "images"
@@ -28,7 +31,7 @@ router = APIRouter(prefix="/facility",
 
 @router.get("/uuid/{facility_uuid}",
             response_model=FacilityOut)
-async def get_facility_by_uuid(facility_uuid: UUID, db: Session = Depends(get_session)):
+def get_facility_by_uuid(facility_uuid: UUID, db: Session = Depends(get_session)):
     facility: Facility = fetch_facility_by_uuid(uuid=facility_uuid, db=db)
 
     latest_oh = fetch_latest_opening_hours_for(db, [facility.id])
@@ -37,7 +40,7 @@ async def get_facility_by_uuid(facility_uuid: UUID, db: Session = Depends(get_se
 
 @router.get("/id/{facility_id}",
             response_model=FacilityOut)
-async def get_facility_by_id(facility_id: int, db: Session = Depends(get_session)):
+def get_facility_by_id(facility_id: int, db: Session = Depends(get_session)):
     facility: Facility = fetch_facility_by_id(facility_id=facility_id, db=db)
 
     latest_oh = fetch_latest_opening_hours_for(db, [facility.id])
@@ -46,28 +49,59 @@ async def get_facility_by_id(facility_id: int, db: Session = Depends(get_session
 
 @router.get("/id/{facility_id}/opening_hours",
             response_model=OpeningHoursOutput)
-async def get_opening_hours(facility_id: int, db: Session = Depends(get_session)):
+def get_opening_hours(facility_id: int, db: Session = Depends(get_session)):
     latest_map = fetch_latest_opening_hours_for(db, [facility_id])  # {id: json}
     oh_json = latest_map.get(facility_id)
     return map_opening_hours(oh_json)
 
 
+@router.get("/id/{facility_id}/opening_hours/history",
+            response_model=List[HistoryVersionOut])
+def get_opening_hours_history(facility_id: int, db: Session = Depends(get_session)):
+    return fetch_opening_hours_versions(db, facility_id)
+
+
+@router.get("/id/{facility_id}/opening_hours/history/{opening_hours_id}",
+            response_model=OpeningHoursOutput)
+def get_opening_hours_version(facility_id: int, opening_hours_id: int, db: Session = Depends(get_session)):
+    oh_json = fetch_opening_hours_version(db, facility_id, opening_hours_id)
+    if oh_json is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Version not found")
+    return map_opening_hours(oh_json)
+
+
 @router.get("/id/{facility_id}/notices", response_model=NoticeOut | None)
-async def get_latest_notices(facility_id: int, db: Session = Depends(get_session)):
+def get_latest_notices(facility_id: int, db: Session = Depends(get_session)):
     latest = fetch_latest_notice_for_one(db, facility_id)
     return map_notice(latest)  # returns None → FastAPI responds with `null`
 
 
+@router.get("/id/{facility_id}/notices/history",
+            response_model=List[HistoryVersionOut])
+def get_notices_history(facility_id: int, db: Session = Depends(get_session)):
+    return fetch_notice_versions(db, facility_id)
+
+
+@router.get("/id/{facility_id}/notices/history/{notice_id}",
+            response_model=NoticeOut)
+def get_notices_version(facility_id: int, notice_id: int, db: Session = Depends(get_session)):
+    notices = fetch_notice_version(db, facility_id, notice_id)
+    if notices is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Version not found")
+    return NoticeOut(notices=notices)
+
+
 @router.get("/id/{facility_id}/meals", response_model=MealOut)
-async def get_latest_meals(facility_id: int, db: Session = Depends(get_session)):
+def get_latest_meals(facility_id: int, db: Session = Depends(get_session)):
     latest = fetch_latest_meal_for_one(db, facility_id)
     if not latest:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="No meals found")
-    return map_meal(latest)
+    dishes = fetch_dishes(db, dish_ids_in(latest.meals))
+    return map_meal(latest, dishes)
 
 
 @router.get("/uuid/{facility_uuid}/image")
-async def get_facility_image_by_uuid(
+def get_facility_image_by_uuid(
         facility_uuid: UUID,
         db: Session = Depends(get_session),
 ):
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 from app.src.routes.location.schemas import LocationOut
@@ -19,3 +21,9 @@ class FacilityOut(BaseModel):
     location: LocationOut | None = None
     facility_type: FacilityTypeOut | None = None
     opening_hours: OpeningHoursOutput | None = None
+
+
+class HistoryVersionOut(BaseModel):
+    id: int
+    timestamp: datetime
+    is_keyframe: bool
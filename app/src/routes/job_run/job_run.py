@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+
+from app.src.config.database import get_session
+from app.src.routes.job_run.mappers import map_job_run
+from app.src.routes.job_run.queries import fetch_latest_runs, fetch_runs
+from app.src.routes.job_run.schemas import JobRunOut, LatestRunOut
+
+router = APIRouter(prefix="/runs",
+                   tags=["Runs"])
+
+
+@router.get("/",
+            response_model=List[JobRunOut])
+def get_runs(job: Optional[str] = None,
+             limit: int = Query(20, ge=1, le=500),
+             db: Session = Depends(get_session)):
+    """The latest runs of the cron jobs (fetcher, db_updater), newest first, with their per-stage timings."""
+    return [map_job_run(r) for r in fetch_runs(db, job=job, limit=limit)]
+
+
+@router.get("/latest",
+            response_model=List[LatestRunOut])
+def get_latest_runs(db: Session = Depends(get_session)):
+    """Per job its latest run and its latest successful one, to spot failing jobs and stale data."""
+    now = datetime.now(timezone.utc)
+    successes = {r.job: r for r in fetch_latest_runs(db, status="ok")}
+    out = []
+    for run in fetch_latest_runs(db):
+        success = successes.get(run.job)
+        out.append(LatestRunOut(
+            job=run.job,
+            latest=map_job_run(run),
+            last_success=map_job_run(success) if success else None,
+            seconds_since_success=(now - success.finished_at).total_seconds() if success else None,
+        ))
+    return out
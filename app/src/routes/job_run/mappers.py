@@ -0,0 +1,24 @@
+from app.src.config.database import JobRun
+from app.src.routes.job_run.schemas import JobRunOut, StageOut
+
+
+def map_job_run(r: JobRun) -> JobRunOut:
+    report = r.report or {}
+    return JobRunOut(
+        id=r.id,
+        job=r.job,
+        snapshot=r.snapshot,
+        snapshot_at=r.snapshot_at,
+        status=r.status,
+        error=r.error,
+        started_at=r.started_at,
+        finished_at=r.finished_at,
+        duration_seconds=r.duration_seconds,
+        data_lag_seconds=(r.finished_at - r.snapshot_at).total_seconds() if r.snapshot_at else None,
+        peak_memory_kib=r.peak_memory_kib,
+        bytes_read=r.bytes_read,
+        rows_inserted=r.rows_inserted,
+        rows_skipped=r.rows_skipped,
+        stages={name: StageOut(**s) for name, s in report.get("stages", {}).items()},
+        counters=report.get("counters", {}),
+    )
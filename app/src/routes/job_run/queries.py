@@ -0,0 +1,20 @@
+from typing import Optional
+
+from sqlmodel import Session, select
+
+from app.src.config.database import JobRun
+
+
+def fetch_runs(db: Session, job: Optional[str] = None, limit: int = 20) -> list[JobRun]:
+    stmt = select(JobRun).order_by(JobRun.started_at.desc()).limit(limit)
+    if job is not None:
+        stmt = stmt.where(JobRun.job == job)
+    return db.exec(stmt).all()
+
+
+def fetch_latest_runs(db: Session, status: Optional[str] = None) -> list[JobRun]:
+    """The latest run of every job (with `status`, if given)."""
+    stmt = select(JobRun).distinct(JobRun.job).order_by(JobRun.job, JobRun.started_at.desc())
+    if status is not None:
+        stmt = stmt.where(JobRun.status == status)
+    return db.exec(stmt).all()
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class StageOut(BaseModel):
+    calls: int
+    seconds: float
+    max_seconds: float
+
+
+class JobRunOut(BaseModel):
+    id: int
+    job: str
+    snapshot: Optional[str] = None
+    snapshot_at: Optional[datetime] = None
+    status: str
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: datetime
+    duration_seconds: float
+    # from fetching the snapshot to the end of this run
+    data_lag_seconds: Optional[float] = None
+    peak_memory_kib: Optional[float] = None
+    bytes_read: int
+    rows_inserted: int
+    rows_skipped: int
+    stages: Dict[str, StageOut]
+    counters: Dict[str, int]
+
+
+class LatestRunOut(BaseModel):
+    job: str
+    latest: JobRunOut
+    last_success: Optional[JobRunOut] = None
+    seconds_since_success: Optional[float] = None
@@ -11,6 +11,6 @@ router = APIRouter(prefix="/locations",
 
 @router.get("/",
             response_model=List[Location])
-async def get_all_locations(db: Session = Depends(get_session)):
+def get_all_locations(db: Session = Depends(get_session)):
     locations: List[Location] = db.exec(select(Location)).all()
     return locations
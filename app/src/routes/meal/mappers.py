@@ -1,8 +1,9 @@
 from typing import Optional
-from app.src.config.database import Meal
+from app.src.config.database import Meal, Dish
 from app.src.routes.meal.schemas import MealOut
+from app.src.storage.dishes import expand_meal_weeks
 
-def map_meal(m: Optional[Meal]) -> Optional[MealOut]:
+def map_meal(m: Optional[Meal], dishes_by_id: dict[int, Dish]) -> Optional[MealOut]:
     if not m:
         return None
-    return MealOut(meals=m.meals)
+    return MealOut(meals=expand_meal_weeks(m.meals, dishes_by_id))
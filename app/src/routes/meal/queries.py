@@ -1,12 +1,44 @@
-from typing import Optional
+from typing import Iterable, Optional
+
+from sqlalchemy import func, and_
 from sqlmodel import Session, select
 from app.src.config.database import Meal
+from app.src.storage.generations import visible
 
 def fetch_latest_meal_for_one(db: Session, facility_id: int) -> Optional[Meal]:
     stmt = (
         select(Meal)
-        .where(Meal.facility_id == facility_id)
+        .where(Meal.facility_id == facility_id, visible(Meal))
         .order_by(Meal.timestamp.desc())
         .limit(1)
     )
     return db.exec(stmt).first()
+
+
+def fetch_latest_meals_for(db: Session, facility_ids: Iterable[int]) -> dict[int, Meal]:
+    """Return {facility_id: Meal} for the latest timestamp per facility."""
+    fac_ids = list(facility_ids)
+    if not fac_ids:
+        return {}
+
+    latest_ts_subq = (
+        select(
+            Meal.facility_id,
+            func.max(Meal.timestamp).label("ts"),
+        )
+        .where(Meal.facility_id.in_(fac_ids), visible(Meal))
+        .group_by(Meal.facility_id)
+        .subquery()
+    )
+
+    rows = db.exec(
+        select(Meal).join(
+            latest_ts_subq,
+            and_(
+                Meal.facility_id == latest_ts_subq.c.facility_id,
+                Meal.timestamp == latest_ts_subq.c.ts,
+            ),
+        ).where(visible(Meal))
+    ).all()
+
+    return {row.facility_id: row for row in rows}
@@ -1,12 +1,59 @@
-from typing import Optional
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import func, and_
 from sqlmodel import Session, select
 from app.src.config.database import Notice
+from app.src.storage.generations import visible
+from app.src.storage.history import fetch_versions, reconstruct
 
 def fetch_latest_notice_for_one(db: Session, facility_id: int) -> Optional[Notice]:
     stmt = (
         select(Notice)
-        .where(Notice.facility_id == facility_id)
+        .where(Notice.facility_id == facility_id, visible(Notice))
         .order_by(Notice.timestamp.desc())
         .limit(1)
     )
     return db.exec(stmt).first()
+
+
+def fetch_latest_notices_for(db: Session, facility_ids: Iterable[int]) -> dict[int, Notice]:
+    """Return {facility_id: Notice} for the latest timestamp per facility."""
+    fac_ids = list(facility_ids)
+    if not fac_ids:
+        return {}
+
+    latest_ts_subq = (
+        select(
+            Notice.facility_id,
+            func.max(Notice.timestamp).label("ts"),
+        )
+        .where(Notice.facility_id.in_(fac_ids), visible(Notice))
+        .group_by(Notice.facility_id)
+        .subquery()
+    )
+
+    rows = db.exec(
+        select(Notice).join(
+            latest_ts_subq,
+            and_(
+                Notice.facility_id == latest_ts_subq.c.facility_id,
+                Notice.timestamp == latest_ts_subq.c.ts,
+            ),
+        ).where(visible(Notice))
+    ).all()
+
+    return {row.facility_id: row for row in rows}
+
+
+def fetch_notice_versions(db: Session, facility_id: int) -> list:
+    return fetch_versions(db, Notice, facility_id)
+
+
+def fetch_notice_version(db: Session, facility_id: int, notice_id: int) -> Optional[Any]:
+    """Reconstructed notices of one historical version, or None if it does not exist for this facility."""
+    row = db.exec(
+        select(Notice).where(Notice.id == notice_id, Notice.facility_id == facility_id, visible(Notice))
+    ).first()
+    if row is None:
+        return None
+    return reconstruct(db, Notice, "notices", row)
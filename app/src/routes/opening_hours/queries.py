@@ -1,9 +1,11 @@
-from typing import Iterable
+from typing import Iterable, Optional
 
 from sqlalchemy import func, and_
 from sqlmodel import Session, select
 
 from app.src.config.database import OpeningHour
+from app.src.storage.generations import visible
+from app.src.storage.history import fetch_versions, reconstruct
 
 
 def fetch_latest_opening_hours_for(db: Session, facility_ids: Iterable[int]) -> dict[int, dict]:
@@ -17,7 +19,7 @@ def fetch_latest_opening_hours_for(db: Session, facility_ids: Iterable[int]) ->
             OpeningHour.facility_id,
             func.max(OpeningHour.timestamp).label("ts"),
         )
-        .where(OpeningHour.facility_id.in_(fac_ids))
+        .where(OpeningHour.facility_id.in_(fac_ids), visible(OpeningHour))
         .group_by(OpeningHour.facility_id)
         .subquery()
     )
@@ -29,7 +31,23 @@ def fetch_latest_opening_hours_for(db: Session, facility_ids: Iterable[int]) ->
                 OpeningHour.facility_id == latest_ts_subq.c.facility_id,
                 OpeningHour.timestamp == latest_ts_subq.c.ts,
             ),
-        )
+        ).where(visible(OpeningHour))
     ).all()
 
     return {row.facility_id: row.opening_hours for row in rows}
+
+
+
+def fetch_opening_hours_versions(db: Session, facility_id: int) -> list:
+    return fetch_versions(db, OpeningHour, facility_id)
+
+
+def fetch_opening_hours_version(db: Session, facility_id: int, opening_hours_id: int) -> Optional[dict]:
+    """Reconstructed opening hours of one historical version, or None if it does not exist for this facility."""
+    row = db.exec(
+        select(OpeningHour).where(OpeningHour.id == opening_hours_id, OpeningHour.facility_id == facility_id,
+                                 visible(OpeningHour))
+    ).first()
+    if row is None:
+        return None
+    return reconstruct(db, OpeningHour, "opening_hours", row)
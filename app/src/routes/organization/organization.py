@@ -15,14 +15,14 @@ router = APIRouter(prefix="/organization",
 
 @router.get("",
             response_model=List[Organization])
-async def get_organizations(db: Session = Depends(get_session)):
+def get_organizations(db: Session = Depends(get_session)):
     organizations: List[Organization] = db.exec(select(Organization)).all()
     return organizations
 
 
 @router.get("/{organization_id}/locations",
             response_model=List[Location])
-async def get_locations_for_organization(organization_id: int, db: Session = Depends(get_session)):
+def get_locations_for_organization(organization_id: int, db: Session = Depends(get_session)):
     locations = db.exec(select(Location)
                         .join(Facility)  # Location → Facility
                         .where(Facility.organization_id == organization_id)
@@ -31,10 +31,10 @@ async def get_locations_for_organization(organization_id: int, db: Session = Dep
 
 
 @router.get("/{organization_id}/facilities", response_model=List[FacilityOut])
-async def get_facilities_for_organization(organization_id: int,
-                                          location_id: Optional[int] = None,
-                                          type_id: Optional[int] = None,
-                                          db: Session = Depends(get_session)):
+def get_facilities_for_organization(organization_id: int,
+                                    location_id: Optional[int] = None,
+                                    type_id: Optional[int] = None,
+                                    db: Session = Depends(get_session)):
     facilities: list[Facility] = fetch_facilities(db=db,
                                                   organization_id=organization_id,
                                                   location_id=location_id,
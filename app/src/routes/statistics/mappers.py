@@ -0,0 +1,24 @@
+from app.src.config.database import MealRollup
+from app.src.routes.statistics.schemas import RollupOut, StatsOut
+
+
+def _stats(r: MealRollup, prefix: str) -> StatsOut:
+    return StatsOut(
+        min=getattr(r, f"{prefix}_min"),
+        mean=getattr(r, f"{prefix}_mean"),
+        max=getattr(r, f"{prefix}_max"),
+    )
+
+
+def map_rollup(r: MealRollup) -> RollupOut:
+    return RollupOut(
+        facility_id=r.facility_id,
+        period=r.period,
+        period_start=r.period_start,
+        count=r.count,
+        student=_stats(r, "student"),
+        servant=_stats(r, "servant"),
+        guest=_stats(r, "guest"),
+        co2_g=_stats(r, "co2_g"),
+        climate_plate_share=r.climate_plate_share,
+    )
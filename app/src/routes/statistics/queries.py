@@ -0,0 +1,30 @@
+from datetime import date
+from typing import Optional
+
+from sqlmodel import Session, select
+
+from app.src.config.database import MealRollup, Facility
+
+
+def fetch_rollups(db: Session,
+                  period: str,
+                  facility_id: Optional[int] = None,
+                  organization_id: Optional[int] = None,
+                  start: Optional[date] = None,
+                  end: Optional[date] = None,
+                  ) -> list[MealRollup]:
+    stmt = (
+        select(MealRollup)
+        .where(MealRollup.period == period)
+        .order_by(MealRollup.facility_id, MealRollup.period_start)
+    )
+    if facility_id is not None:
+        stmt = stmt.where(MealRollup.facility_id == facility_id)
+    if organization_id is not None:
+        stmt = stmt.join(Facility).where(Facility.organization_id == organization_id)
+    if start is not None:
+        stmt = stmt.where(MealRollup.period_start >= start)
+    if end is not None:
+        stmt = stmt.where(MealRollup.period_start <= end)
+
+    return db.exec(stmt).all()
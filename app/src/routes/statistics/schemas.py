@@ -0,0 +1,24 @@
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel
+
+Period = Literal["day", "week"]
+
+
+class StatsOut(BaseModel):
+    min: float | None = None
+    mean: float | None = None
+    max: float | None = None
+
+
+class RollupOut(BaseModel):
+    facility_id: int
+    period: Period
+    period_start: date
+    count: int
+    student: StatsOut
+    servant: StatsOut
+    guest: StatsOut
+    co2_g: StatsOut
+    climate_plate_share: float
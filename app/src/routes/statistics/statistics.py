@@ -0,0 +1,39 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends
+from sqlmodel import Session
+
+from app.src.config.database import get_session
+from app.src.routes.facility.queries import fetch_facility_by_id
+from app.src.routes.statistics.mappers import map_rollup
+from app.src.routes.statistics.queries import fetch_rollups
+from app.src.routes.statistics.schemas import RollupOut, Period
+
+router = APIRouter(prefix="/statistics",
+                   tags=["Statistics"])
+
+
+@router.get("/facility/{facility_id}",
+            response_model=List[RollupOut])
+def get_facility_statistics(facility_id: int,
+                            period: Period = "week",
+                            start: Optional[date] = None,
+                            end: Optional[date] = None,
+                            db: Session = Depends(get_session)):
+    """Price and CO2 statistics of one facility per day or week (weeks start on monday)."""
+    fetch_facility_by_id(facility_id=facility_id, db=db)  # 404 for unknown facilities
+    rollups = fetch_rollups(db, period, facility_id=facility_id, start=start, end=end)
+    return [map_rollup(r) for r in rollups]
+
+
+@router.get("/organization/{organization_id}",
+            response_model=List[RollupOut])
+def get_organization_statistics(organization_id: int,
+                                period: Period = "week",
+                                start: Optional[date] = None,
+                                end: Optional[date] = None,
+                                db: Session = Depends(get_session)):
+    """Price and CO2 statistics of all facilities of an organization, e.g. to compare canteens."""
+    rollups = fetch_rollups(db, period, organization_id=organization_id, start=start, end=end)
+    return [map_rollup(r) for r in rollups]
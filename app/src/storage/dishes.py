@@ -0,0 +1,120 @@
+"""
+Interning of menu entries into the `dish` table.
+
+Stored meal documents keep the weeks → days → entries structure, but each entry only holds a `dish_id`
+plus what changes from day to day (prices, CO2, climate plate, the page's entry id):
+
+    {"id": "123", "dish_id": 42, "prices": {...}, "co2_g": 480, "climate_plate": false}
+
+`expand_meal_weeks` turns such a document back into the full shape the API always returned (plus `dish_id`).
+Entries stored before interning existed carry their title etc. themselves and are passed through unchanged.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.src.config.database import Dish
+
+_DISH_FIELDS = ("title", "tags", "allergens")
+
+
+def _norm(s: str) -> str:
+    return " ".join(s.split()).casefold()
+
+
+def dish_hash(title: str, allergens: Iterable[str], tags: Iterable[str]) -> str:
+    """Content hash of a dish; insensitive to case, whitespace and the order of allergens/tags."""
+    key = json.dumps(
+        [_norm(title or ""), sorted(_norm(a) for a in allergens), sorted(_norm(t) for t in tags)],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _iter_entries(weeks: Iterable[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+    for week in weeks or []:
+        for day in week.get("days") or []:
+            yield from day.get("entries") or []
+
+
+def dish_ids_in(weeks: Iterable[Dict[str, Any]]) -> set[int]:
+    return {e["dish_id"] for e in _iter_entries(weeks) if "dish_id" in e}
+
+
+def intern_meal_documents(db: Session, documents: List[List[Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+    """Store all dishes of several parsed menus (one INSERT, one SELECT) and return the compact documents."""
+    dishes: Dict[str, Dict[str, Any]] = {}
+    for weeks in documents:
+        for entry in _iter_entries(weeks):
+            h = dish_hash(entry.get("title") or "", entry.get("allergens") or [], entry.get("tags") or [])
+            dishes.setdefault(h, {
+                "hash": h,
+                "title": entry.get("title") or "",
+                "tags": entry.get("tags") or [],
+                "allergens": entry.get("allergens") or [],
+            })
+
+    ids_by_hash: Dict[str, int] = {}
+    if dishes:
+        # sorted, so concurrent updaters inserting overlapping dishes lock them in the same order (no deadlocks)
+        values = [dishes[h] for h in sorted(dishes)]
+        db.execute(insert(Dish).values(values).on_conflict_do_nothing(index_elements=[Dish.hash]))
+        rows = db.exec(select(Dish.id, Dish.hash).where(Dish.hash.in_(dishes.keys()))).all()
+        ids_by_hash = {h: i for i, h in rows}
+
+    def compact(entry: Dict[str, Any]) -> Dict[str, Any]:
+        h = dish_hash(entry.get("title") or "", entry.get("allergens") or [], entry.get("tags") or [])
+        out = {k: v for k, v in entry.items() if k not in _DISH_FIELDS}
+        out["dish_id"] = ids_by_hash[h]
+        return out
+
+    return [
+        [
+            {**week, "days": [
+                {**day, "entries": [compact(e) for e in day.get("entries") or []]}
+                for day in week.get("days") or []
+            ]}
+            for week in weeks
+        ]
+        for weeks in documents
+    ]
+
+
+def intern_meal_weeks(db: Session, weeks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Store all dishes of a parsed menu and return the compact document."""
+    return intern_meal_documents(db, [weeks])[0]
+
+
+def fetch_dishes(db: Session, dish_ids: Iterable[int]) -> Dict[int, Dish]:
+    ids = list(dish_ids)
+    if not ids:
+        return {}
+    return {d.id: d for d in db.exec(select(Dish).where(Dish.id.in_(ids))).all()}
+
+
+def expand_meal_weeks(weeks: List[Dict[str, Any]], dishes_by_id: Dict[int, Dish]) -> List[Dict[str, Any]]:
+    """Inverse of `intern_meal_weeks`, given the dishes referenced by the document."""
+    def expand(entry: Dict[str, Any]) -> Dict[str, Any]:
+        dish = dishes_by_id.get(entry.get("dish_id"))
+        if dish is None:
+            return entry
+        return {
+            "id": entry.get("id"),
+            "dish_id": dish.id,
+            "title": dish.title,
+            "tags": dish.tags,
+            **{k: v for k, v in entry.items() if k not in ("id", "dish_id")},
+            "allergens": dish.allergens,
+        }
+
+    return [
+        {**week, "days": [
+            {**day, "entries": [expand(e) for e in day.get("entries") or []]}
+            for day in week.get("days") or []
+        ]}
+        for week in weeks or []
+    ]
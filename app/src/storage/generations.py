@@ -0,0 +1,49 @@
+"""
+Blue/green generations of updater output.
+
+Every updater run writes its notices, opening hours, meals and processed hashes into a generation that starts out
+as "staging". Readers only see rows of generations that are published and not newer than the publish pointer
+(plus rows written before generations existed), so a run becomes visible all at once when it is published, and
+disappears all at once when the pointer is moved back. Publishing and rolling back live in app.src.cron.publish.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlmodel import Session, SQLModel, select
+
+from app.src.config.database import Generation, PublishPointer
+
+STAGING = "staging"
+PUBLISHED = "published"
+ROLLED_BACK = "rolled_back"
+
+POINTER_ID = 1
+
+
+def visible(model: type[SQLModel]):
+    """WHERE clause restricting `model` (which has a generation_id column) to rows readers may see."""
+    current = select(PublishPointer.generation_id).where(PublishPointer.id == POINTER_ID).scalar_subquery()
+    published = select(Generation.id).where(Generation.status == PUBLISHED, Generation.id <= current)
+    return or_(model.generation_id.is_(None), model.generation_id.in_(published))
+
+
+def published_since(model: type[SQLModel], since: datetime):
+    """
+    WHERE clause restricting `model` to rows published at or after `since`, whenever they were recorded
+    (rows from before generations count from their timestamp). Combine it with `visible`.
+    """
+    recent = select(Generation.id).where(Generation.published_at >= since)
+    return or_(model.generation_id.in_(recent), and_(model.generation_id.is_(None), model.timestamp >= since))
+
+
+def current_generation(db: Session) -> int | None:
+    return db.exec(select(PublishPointer.generation_id).where(PublishPointer.id == POINTER_ID)).first()
+
+
+def open_generation(db: Session, label: str) -> int:
+    """Add a new staging generation to the session and return its id (the caller commits)."""
+    generation = Generation(label=label[:100], status=STAGING)
+    db.add(generation)
+    db.flush()
+    return generation.id
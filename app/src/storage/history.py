@@ -0,0 +1,224 @@
+"""
+Versioned storage for notices and opening hours.
+
+In "full" mode every run writes a complete document, as it always did.
+In "delta" mode a new version is only written if the document changed, and then
+  - every `history_keyframe_interval`-th version is a keyframe holding the full document,
+  - all other versions hold a JSON patch against their predecessor in `patch`.
+The latest visible version of a facility always keeps its full document as well, so readers that only want the
+current state never need to reconstruct anything. Older non-keyframe versions drop it when a newer generation is
+published (see materialize_latest); new versions are written into a staging generation and chain onto the
+latest *visible* version, and all readers here only look at visible versions (app.src.storage.generations).
+Generations can be published out of order and rolled back, which inserts versions into or removes them from the
+middle of the visible history; publish and rollback re-diff the versions whose predecessor changed (rechain).
+"""
+
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Iterable, Optional, Type
+
+from sqlalchemy import func, or_, tuple_
+from sqlmodel import Session, SQLModel, select
+
+from app.src.config.env import history_storage_mode, history_keyframe_interval
+from app.src.storage import json_patch
+from app.src.storage.generations import visible
+
+
+def _ordered(model: Type[SQLModel]):
+    return model.timestamp.desc(), model.id.desc()
+
+
+def fetch_latest_version(db: Session, model: Type[SQLModel], facility_id: int):
+    stmt = (
+        select(model)
+        .where(model.facility_id == facility_id, visible(model))
+        .order_by(*_ordered(model))
+        .limit(1)
+    )
+    return db.exec(stmt).first()
+
+
+def _versions_since_keyframe(db: Session, model: Type[SQLModel], facility_id: int, limit: int) -> int:
+    """Number of versions after the most recent keyframe (looking at most `limit` versions back)."""
+    flags = db.exec(
+        select(model.is_keyframe)
+        .where(model.facility_id == facility_id, visible(model))
+        .order_by(*_ordered(model))
+        .limit(limit)
+    ).all()
+    count = 0
+    for is_keyframe in flags:
+        if is_keyframe:
+            return count
+        count += 1
+    return count
+
+
+def record_version(db: Session, model: Type[SQLModel], field: str, facility, doc: Any,
+                   generation_id: Optional[int] = None):
+    """
+    Add a new version of `doc` for `facility` to the session, as part of generation `generation_id`.
+    Returns the new row, or None if nothing was written because the document did not change (delta mode only).
+    """
+    if history_storage_mode != "delta":
+        row = model(facility=facility, generation_id=generation_id, **{field: doc})
+        db.add(row)
+        return row
+
+    previous = fetch_latest_version(db, model, facility.id)
+    if previous is None:
+        row = model(facility=facility, generation_id=generation_id, is_keyframe=True, **{field: doc})
+        db.add(row)
+        return row
+
+    previous_doc = reconstruct(db, model, field, previous)
+    patch = json_patch.diff(previous_doc, doc)
+    if not patch:
+        return None
+
+    if _versions_since_keyframe(db, model, facility.id, history_keyframe_interval) + 1 >= history_keyframe_interval:
+        row = model(facility=facility, generation_id=generation_id, is_keyframe=True, **{field: doc})
+    else:
+        row = model(facility=facility, generation_id=generation_id, is_keyframe=False, patch=patch, **{field: doc})
+
+    # `previous` keeps its document until this generation is published (materialize_latest)
+
+    db.add(row)
+    return row
+
+
+def reconstruct(db: Session, model: Type[SQLModel], field: str, row) -> Any:
+    """Rebuild the full document of any version: nearest keyframe at or before it plus all patches up to it."""
+    doc = getattr(row, field)
+    if doc is not None or row.is_keyframe:
+        return doc
+
+    keyframe = db.exec(
+        select(model)
+        .where(model.facility_id == row.facility_id,
+               visible(model),
+               model.is_keyframe.is_(True),
+               model.timestamp <= row.timestamp,
+               model.id != row.id)
+        .order_by(*_ordered(model))
+        .limit(1)
+    ).first()
+
+    stmt = (
+        select(model)
+        .where(model.facility_id == row.facility_id,
+               model.timestamp <= row.timestamp,
+               or_(visible(model), model.id == row.id))
+        .order_by(model.timestamp, model.id)
+    )
+    if keyframe is not None:
+        stmt = stmt.where(model.timestamp >= keyframe.timestamp)
+
+    doc: Optional[Any] = None
+    for version in db.exec(stmt).all():
+        if version.is_keyframe or version.patch is None:
+            doc = getattr(version, field)
+        else:
+            doc = json_patch.apply(doc, version.patch)
+        if version.id == row.id:
+            break
+    return doc
+
+
+def fetch_versions(db: Session, model: Type[SQLModel], facility_id: int) -> list:
+    """All versions of a facility, newest first (without loading their documents)."""
+    return db.exec(
+        select(model.id, model.timestamp, model.is_keyframe)
+        .where(model.facility_id == facility_id, visible(model))
+        .order_by(*_ordered(model))
+    ).all()
+
+
+def materialize_latest(db: Session, model: Type[SQLModel], field: str, facility_ids: Iterable[int]) -> None:
+    """
+    Restore the invariant that only the latest visible version of each facility keeps its full document.
+    Called after the set of visible generations changed (publish or rollback) for the facilities involved.
+    """
+    for facility_id in facility_ids:
+        latest = fetch_latest_version(db, model, facility_id)
+        if latest is None:
+            continue
+        if getattr(latest, field) is None:
+            # a rollback made an older, demoted version the latest one again
+            setattr(latest, field, reconstruct(db, model, field, latest))
+            db.add(latest)
+
+        superseded = db.exec(
+            select(model)
+            .where(model.facility_id == facility_id,
+                   visible(model),
+                   model.is_keyframe.is_(False),
+                   # demoted documents are stored as JSON null
+                   func.jsonb_typeof(getattr(model, field)) != "null",
+                   model.id != latest.id)
+        ).all()
+        for row in superseded:
+            setattr(row, field, None)
+            db.add(row)
+
+
+def versions_to_rechain(db: Session, model: Type[SQLModel], field: str, generation_ids: Iterable[int],
+                        staged: bool = False) -> list[tuple[Any, Any]]:
+    """
+    Delta versions whose predecessor changes when the versions of `generation_ids` appear in or disappear from the
+    visible history, each with its full document. Call it before the change and pass the result to `rechain`.
+    With `staged`, the generations are about to be published and their own delta versions are included as well:
+    they were diffed against the version that was latest when they were recorded, which may not precede them anymore.
+    """
+    ids = list(generation_ids)
+    own = db.exec(select(model.facility_id, model.timestamp, model.id).where(model.generation_id.in_(ids))).all()
+    if not own:
+        return []
+    others = db.exec(
+        select(model.facility_id, model.timestamp, model.id)
+        .where(model.facility_id.in_({facility_id for facility_id, _, _ in own}),
+               visible(model),
+               or_(model.generation_id.is_(None), model.generation_id.not_in(ids)),
+               model.timestamp >= min(timestamp for _, timestamp, _ in own))
+    ).all()
+
+    own_ids = {row_id for _, _, row_id in own}
+    candidates = set(own_ids) if staged else set()
+    # the first other version after a run of own ones gets a new predecessor
+    for _, history in groupby(sorted([*own, *others]), key=itemgetter(0)):
+        after_own = False
+        for _, _, row_id in history:
+            if after_own and row_id not in own_ids:
+                candidates.add(row_id)
+            after_own = row_id in own_ids
+    if not candidates:
+        return []
+
+    rows = db.exec(
+        select(model)
+        .where(model.id.in_(candidates), model.is_keyframe.is_(False), model.patch.is_not(None))
+    ).all()
+    return [(row, reconstruct(db, model, field, row)) for row in rows]
+
+
+def rechain(db: Session, model: Type[SQLModel], field: str, versions: list[tuple[Any, Any]]) -> None:
+    """
+    Re-diff versions collected by versions_to_rechain against their predecessor in the visible history as it is
+    now; a version left without one becomes a keyframe.
+    """
+    for row, doc in sorted(versions, key=lambda version: (version[0].timestamp, version[0].id)):
+        previous = db.exec(
+            select(model)
+            .where(model.facility_id == row.facility_id,
+                   visible(model),
+                   tuple_(model.timestamp, model.id) < tuple_(row.timestamp, row.id))
+            .order_by(*_ordered(model))
+            .limit(1)
+        ).first()
+        if previous is None:
+            row.is_keyframe, row.patch = True, None
+            setattr(row, field, doc)
+        else:
+            row.patch = json_patch.diff(reconstruct(db, model, field, previous), doc)
+        db.add(row)